@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the localization tooling on synthetic inputs.
+
+Generates catalogs shaped like KMReader/Localizable.xcstrings (comments,
+shouldTranslate=false keys, plural variations, a mix of states) for every
+size x language-count combination, plus a stringsdata tree like the one a
+build leaves behind, and times the paths translate.py and localize.py run:
+load_data, find_missing, sort_strings, save_data, load_stringsdata_entries
+and sort_xcstrings_keys, next to plain json for reference. The JSON codec
+(json_codec.py) is also timed on the real KMReader/Localizable.xcstrings
+against the standard library's indent=2 encoder. Each case records its best
+time and tracemalloc peak.
+
+Results are written as JSON and compared with a per-machine baseline
+(.build/misc/benchmark-baseline.json) when one exists.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import json_codec
+import localize
+import localize_sort
+import translate
+import xcstrings
+
+RESULTS_VERSION = 1
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_LANGUAGES = (10, 40)
+# Combinations above this many cells are skipped unless --max-cells is raised.
+DEFAULT_MAX_CELLS = 2_000_000
+# Slower or bigger than the baseline by more than this fraction is a regression...
+DEFAULT_THRESHOLD = 0.2
+# ...unless the difference is below the noise floor.
+NOISE_SECONDS = 0.005
+NOISE_BYTES = 256 * 1024
+STRINGSDATA_ENTRIES_PER_FILE = 40
+STRINGSDATA_ARCHS = ("arm64", "x86_64")
+WORDS = (
+    "book", "chapter", "library", "reader", "series", "page", "download", "server",
+    "settings", "collection", "progress", "offline", "sync", "theme", "font", "cover",
+)
+STATES = ("translated",) * 18 + ("new", "needs_review")
+
+
+def get_project_root() -> Path:
+    return Path(__file__).resolve().parent.parent
+
+
+def default_results_path() -> Path:
+    return get_project_root() / ".build" / "misc" / "benchmark-results.json"
+
+
+def default_baseline_path() -> Path:
+    return get_project_root() / ".build" / "misc" / "benchmark-baseline.json"
+
+
+def synthetic_keys(keys: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    result = []
+    for index in range(keys):
+        key = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 6))).capitalize()
+        result.append(f"{key} {index}")
+    return result
+
+
+def synthetic_catalog(keys: int, languages: int = 10, seed: int = 0) -> str:
+    """Serialized catalog with `keys` entries, deterministic for a given seed."""
+    rng = random.Random(seed)
+    codes = list(xcstrings.LOCALIZATION_KEY_ORDER)[:languages]
+    codes.extend(f"x{index}" for index in range(languages - len(codes)))
+    strings = {}
+    for index, key in enumerate(synthetic_keys(keys, seed)):
+        localizations = {}
+        for code in codes:
+            value = f"{key} [{code}]"
+            if index % 50 == 0:
+                localizations[code] = {
+                    "variations": {
+                        "plural": {
+                            "one": {"stringUnit": {"state": "translated", "value": f"%lld {value}"}},
+                            "other": {"stringUnit": {"state": "translated", "value": f"%lld {value}s"}},
+                        }
+                    }
+                }
+            elif index % 13 == 0 and code != "en":
+                # Missing translation.
+                continue
+            else:
+                localizations[code] = {
+                    "stringUnit": {"state": rng.choice(STATES), "value": value}
+                }
+        entry = {}
+        if index % 100 == 0:
+            entry["comment"] = f"Shown on screen {index % 7}"
+        entry["localizations"] = localizations
+        if index % 90 == 0:
+            entry["shouldTranslate"] = False
+        strings[key] = entry
+    return json.dumps(
+        {"sourceLanguage": "en", "strings": strings, "version": "1.0"},
+        indent=2,
+        ensure_ascii=False,
+        separators=(",", " : "),
+    )
+
+
+def write_stringsdata_tree(root: Path, keys: int, seed: int = 0) -> list[Path]:
+    """
+    A build's stringsdata: one file per source file and architecture, so
+    every entry appears once per architecture, like in DerivedData.
+    """
+    names = synthetic_keys(keys, seed)
+    paths = []
+    for arch in STRINGSDATA_ARCHS:
+        directory = root / "KMReader.build" / "Objects-normal" / arch
+        directory.mkdir(parents=True, exist_ok=True)
+        for start in range(0, len(names), STRINGSDATA_ENTRIES_PER_FILE):
+            entries = [
+                {"comment": f"Shown on screen {index % 7}" if index % 100 == 0 else None, "key": key}
+                for index, key in enumerate(names[start:start + STRINGSDATA_ENTRIES_PER_FILE], start)
+            ]
+            path = directory / f"Source{start // STRINGSDATA_ENTRIES_PER_FILE}.stringsdata"
+            with path.open("w", encoding="utf-8") as f:
+                json.dump({"source": str(path), "tables": {"Localizable": entries}, "version": 1}, f)
+            paths.append(path)
+    return paths
+
+
+def measure(
+    function: Callable[[], object], repeat: int, setup: Callable[[], None] | None = None
+) -> tuple[float, int, int, object]:
+    """(best seconds, peak bytes, retained bytes, result) of calling function; setup is not timed."""
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+        del result
+    if setup is not None:
+        setup()
+    gc.collect()
+    tracemalloc.start()
+    result = function()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, retained, result
+
+
+def format_mb(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f}MB"
+
+
+class Suite:
+    def __init__(self, repeat: int, cases: list[str] | None = None):
+        self.repeat = repeat
+        self.cases = cases
+        self.results: dict[str, dict] = {}
+
+    def wanted(self, name: str) -> bool:
+        return not self.cases or any(pattern in name for pattern in self.cases)
+
+    def run(self, name: str, label: str, function: Callable[[], object], setup: Callable[[], None] | None = None) -> object:
+        if not self.wanted(name):
+            return None
+        seconds, peak, _, result = measure(function, self.repeat, setup)
+        self.results[f"{name} {label}"] = {"seconds": round(seconds, 6), "peak_bytes": peak}
+        print(f"{label:>12}  {name:<26} {seconds * 1000:>9.1f}ms {format_mb(peak):>10}")
+        return result
+
+    def run_catalog(self, keys: int, languages: int, directory: Path) -> bool:
+        """All cases for one synthetic catalog; False if a serializer changed the bytes."""
+        label = f"{keys}x{languages}"
+        text = synthetic_catalog(keys, languages)
+        path = directory / f"Localizable-{label}.xcstrings"
+        path.write_text(text, encoding="utf-8")
+
+        self.run("json.loads", label, lambda: json.loads(text))
+        # The loaded model is released when this returns, before the next cases are measured.
+        if not self._run_model(label, path, text, directory):
+            return False
+
+        # Keys the build no longer extracts get their localizations re-sorted.
+        existing = set(list(json.loads(text)["strings"])[: keys - keys // 100])
+        self.run(
+            "sort_xcstrings_keys",
+            label,
+            lambda: localize.sort_xcstrings_keys(path, existing),
+            setup=lambda: path.write_text(text, encoding="utf-8"),
+        )
+        path.unlink()
+        return True
+
+    def _run_model(self, label: str, path: Path, text: str, directory: Path) -> bool:
+        """Cases on the loaded catalog model."""
+        data = translate.load_data(path)
+        self.run("load_data", label, lambda: translate.load_data(path))
+        self.run("find_missing", label, lambda: translate.find_missing(data))
+
+        output = directory / "saved.xcstrings"
+        self.run("save_data", label, lambda: translate.save_data(output, data))
+        if self.wanted("save_data") and output.read_text(encoding="utf-8") != text:
+            print(f"Error: save_data did not reproduce the {label} catalog byte for byte", file=sys.stderr)
+            return False
+        self.run("xcstrings.dumps", label, lambda: xcstrings.dumps(data))
+
+        original = list(data.strings.items())
+        self.run(
+            "sort_strings",
+            label,
+            lambda: translate.sort_strings(data),
+            setup=lambda: setattr(data, "strings", dict(original)),
+        )
+        return True
+
+    def run_stringsdata(self, keys: int, directory: Path) -> None:
+        if not self.wanted("load_stringsdata_entries"):
+            return
+        root = directory / f"stringsdata-{keys}"
+        write_stringsdata_tree(root, keys)
+        paths = localize.iter_stringsdata_files(root)
+        self.run(
+            "load_stringsdata_entries",
+            f"{keys}",
+            lambda: localize.load_stringsdata_entries(paths),
+        )
+
+    def run_codec(self, path: Path) -> bool:
+        """The codec on a real catalog; False if its output differs from the file."""
+        label = "catalog"
+        text = path.read_text(encoding="utf-8")
+        expected = text[:-1] if text.endswith("\n") else text
+        value = json.loads(text)
+        model = xcstrings.loads(text)
+
+        reference = self.run("json.dumps indent=2", label, lambda: json_codec.reference_dumps(value))
+        fast = self.run("json_codec.dumps_xcode", label, lambda: json_codec.dumps_xcode(value, verify=False))
+        self.run("xcstrings generator", label, lambda: "".join(xcstrings.iter_encode(model)))
+        self.run("xcstrings.dumps", label, lambda: xcstrings.dumps(model))
+        for name, output in (("json.dumps", reference), ("json_codec", fast)):
+            if output is not None and output != expected:
+                print(f"Error: {name} did not reproduce {path} byte for byte", file=sys.stderr)
+                return False
+        reference_result = self.results.get(f"json.dumps indent=2 {label}")
+        fast_result = self.results.get(f"json_codec.dumps_xcode {label}")
+        if reference_result and fast_result:
+            speedup = reference_result["seconds"] / max(fast_result["seconds"], 1e-9)
+            print(f"{'':>12}  json_codec ({json_codec.BACKEND}) is {speedup:.1f}x the standard library")
+        return True
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "comparator": "localizedStandardCompare" if localize_sort.LOCALIZED_COMPARE else "codepoint",
+        "json_codec": json_codec.BACKEND,
+    }
+
+
+def load_results(path: Path) -> dict | None:
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("results"), dict):
+        return None
+    return data
+
+
+def save_results(path: Path, results: dict[str, dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": RESULTS_VERSION,
+                "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "environment": environment(),
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+        f.write("\n")
+
+
+def compare(results: dict[str, dict], baseline: dict, threshold: float) -> list[str]:
+    """Print current vs baseline per case and return the regressed case names."""
+    if baseline.get("environment") != environment():
+        print("Note: the baseline was recorded in a different environment:", baseline.get("environment"))
+    previous = baseline["results"]
+    regressions = []
+    print(f"\n{'case':<40} {'time':>10} {'baseline':>10} {'change':>8} {'peak':>8}")
+    for name, result in results.items():
+        old = previous.get(name)
+        if not old:
+            continue
+        seconds, old_seconds = result["seconds"], old["seconds"]
+        peak, old_peak = result["peak_bytes"], old["peak_bytes"]
+        time_change = seconds / old_seconds - 1 if old_seconds else 0.0
+        peak_change = peak / old_peak - 1 if old_peak else 0.0
+        slower = time_change > threshold and seconds - old_seconds > NOISE_SECONDS
+        bigger = peak_change > threshold and peak - old_peak > NOISE_BYTES
+        flag = "  <- regression" if slower or bigger else ""
+        if flag:
+            regressions.append(name)
+        print(
+            f"{name:<40} {seconds * 1000:>8.1f}ms {old_seconds * 1000:>8.1f}ms "
+            f"{time_change:>+7.0%} {peak_change:>+7.0%}{flag}"
+        )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--keys",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="Catalog sizes to generate (default: 1000 10000 100000)",
+    )
+    parser.add_argument(
+        "--languages",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_LANGUAGES),
+        help="Languages per key (default: 10 40)",
+    )
+    parser.add_argument(
+        "--max-cells",
+        type=int,
+        default=DEFAULT_MAX_CELLS,
+        help=f"Skip size/language combinations with more cells (default: {DEFAULT_MAX_CELLS})",
+    )
+    parser.add_argument(
+        "--catalog",
+        type=Path,
+        default=get_project_root() / "KMReader" / "Localizable.xcstrings",
+        help="Real catalog for the codec cases (default: KMReader/Localizable.xcstrings)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per case; best is reported")
+    parser.add_argument(
+        "--case", dest="cases", action="append", help="Only run cases whose name contains this (repeatable)"
+    )
+    parser.add_argument(
+        "--output", type=Path, default=default_results_path(), help="Results JSON (default: .build/misc/benchmark-results.json)"
+    )
+    parser.add_argument(
+        "--baseline", type=Path, default=default_baseline_path(), help="Baseline JSON to compare with"
+    )
+    parser.add_argument("--update-baseline", action="store_true", help="Record these results as the baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Fraction slower or bigger than the baseline that fails (default: 0.2)",
+    )
+    args = parser.parse_args()
+
+    suite = Suite(args.repeat, args.cases)
+    print(f"{'size':>12}  {'case':<26} {'time':>11} {'peak':>10}")
+    with tempfile.TemporaryDirectory(prefix="kmreader-benchmark-") as tmp:
+        directory = Path(tmp)
+        for keys in args.keys:
+            for languages in args.languages:
+                if keys * languages > args.max_cells:
+                    print(f"{keys}x{languages}: skipped, more than {args.max_cells} cells")
+                    continue
+                if not suite.run_catalog(keys, languages, directory):
+                    return 1
+            suite.run_stringsdata(keys, directory)
+    if args.catalog.is_file() and not suite.run_codec(args.catalog):
+        return 1
+
+    save_results(args.output, suite.results)
+    print(f"\nResults written to {args.output}")
+    if args.update_baseline:
+        save_results(args.baseline, suite.results)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+    baseline = load_results(args.baseline)
+    if baseline is None:
+        print("No baseline to compare with; record one with --update-baseline.")
+        return 0
+    regressions = compare(suite.results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} cases regressed by more than {args.threshold:.0%}.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Persistent build state shared by xcode.py and localize.py.
+Keeps per-platform DerivedData for incremental archives, decides when a clean is required,
+and manages the shared SwiftPM source-package checkout directory.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import subprocess
+import threading
+from pathlib import Path
+
+import proc
+
+FINGERPRINT_FILE = "kmreader-fingerprint.json"
+PACKAGE_STATE_FILE = "kmreader-packages.json"
+SOURCE_PACKAGES_ENV = "KMREADER_SOURCE_PACKAGES"
+MACHO_MAGICS = {
+    b"\xfe\xed\xfa\xce",
+    b"\xfe\xed\xfa\xcf",
+    b"\xce\xfa\xed\xfe",
+    b"\xcf\xfa\xed\xfe",
+    b"\xca\xfe\xba\xbe",
+}
+
+_xcode_version: str | None = None
+_package_lock = threading.Lock()
+_package_args: dict[str, list[str]] = {}
+
+
+def get_project_root() -> Path:
+    return Path(__file__).resolve().parent.parent
+
+
+def xcode_version() -> str:
+    """Return a filesystem-safe Xcode version label, e.g. 16.2-16C5032a."""
+    global _xcode_version
+    if _xcode_version is not None:
+        return _xcode_version
+
+    try:
+        result = proc.run(
+            ["xcodebuild", "-version"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        lines = [line.split()[-1] for line in result.stdout.splitlines() if line.strip()]
+        label = "-".join(lines) or "unknown"
+    except (OSError, subprocess.CalledProcessError):
+        label = "unknown"
+
+    _xcode_version = re.sub(r"[^A-Za-z0-9._-]", "_", label)
+    return _xcode_version
+
+
+def incremental_derived_data_path(scheme: str, platform: str) -> Path:
+    """Persistent DerivedData directory for incremental archives of one platform."""
+    return (
+        get_project_root()
+        / "DerivedData"
+        / "incremental"
+        / f"Xcode-{xcode_version()}"
+        / f"{scheme}-{platform}"
+    )
+
+
+def parallel_build_derived_data_path(scheme: str, platform: str) -> Path:
+    """DerivedData for `xcode.py build --jobs N`, where builds of different platforms overlap."""
+    return get_project_root() / "DerivedData" / "build" / f"{scheme}-{platform}"
+
+
+def run_derived_data_path(scheme: str) -> Path:
+    """DerivedData used by `xcode.py run`, so product paths are known without asking xcodebuild."""
+    return get_project_root() / "DerivedData" / "run" / scheme
+
+
+def built_app_path(derived_data: Path, scheme: str, platform_suffix: str | None) -> Path | None:
+    """
+    Return the most recently built app under a DerivedData directory.
+
+    platform_suffix is the SDK part of the products directory (for example
+    "iphonesimulator" for Debug-iphonesimulator); None matches macOS products,
+    which have no suffix.
+    """
+    products = derived_data / "Build" / "Products"
+    if not products.is_dir():
+        return None
+
+    candidates = []
+    for directory in products.iterdir():
+        if not directory.is_dir():
+            continue
+        suffix = directory.name.partition("-")[2] or None
+        if suffix != platform_suffix:
+            continue
+        app = directory / f"{scheme}.app"
+        if app.is_dir():
+            candidates.append(app)
+
+    if not candidates:
+        return None
+    return max(candidates, key=lambda path: path.stat().st_mtime)
+
+
+def fingerprint_inputs(project: str) -> list[Path]:
+    """Files whose changes invalidate incremental build state."""
+    project_path = Path(project)
+    return [
+        project_path / "project.pbxproj",
+        project_path / "project.xcworkspace" / "xcshareddata" / "swiftpm" / "Package.resolved",
+    ]
+
+
+def project_fingerprint(project: str) -> str:
+    digest = hashlib.sha256()
+    for path in fingerprint_inputs(project):
+        digest.update(path.name.encode("utf-8"))
+        try:
+            digest.update(path.read_bytes())
+        except OSError:
+            digest.update(b"<missing>")
+    return digest.hexdigest()
+
+
+def load_fingerprint(derived_data: Path) -> str | None:
+    try:
+        with (derived_data / FINGERPRINT_FILE).open("r", encoding="utf-8") as f:
+            value = json.load(f).get("fingerprint")
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return None
+    return value if isinstance(value, str) else None
+
+
+def save_fingerprint(derived_data: Path, fingerprint: str) -> None:
+    derived_data.mkdir(parents=True, exist_ok=True)
+    with (derived_data / FINGERPRINT_FILE).open("w", encoding="utf-8") as f:
+        json.dump({"fingerprint": fingerprint, "xcode": xcode_version()}, f, indent=2)
+
+
+def needs_clean(derived_data: Path, fingerprint: str) -> bool:
+    """A clean is required for a fresh directory or when project inputs changed."""
+    return load_fingerprint(derived_data) != fingerprint
+
+
+def _is_macho(path: Path) -> bool:
+    try:
+        with path.open("rb") as f:
+            return f.read(4) in MACHO_MAGICS
+    except OSError:
+        return False
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _archive_files(archive: Path) -> dict[str, Path]:
+    products = archive / "Products"
+    files: dict[str, Path] = {}
+    for path in products.rglob("*"):
+        if not path.is_file() or path.is_symlink():
+            continue
+        relative = path.relative_to(products)
+        # Signatures embed hashes of the binaries, which are never byte-identical.
+        if "_CodeSignature" in relative.parts:
+            continue
+        files[relative.as_posix()] = path
+    return files
+
+
+def compare_archives(incremental: Path, clean: Path) -> list[str]:
+    """
+    Spot-check that an incremental archive matches a clean one.
+
+    Both archives must contain the same product files. Resources must be
+    byte-identical; Mach-O binaries embed build UUIDs, so only their sizes
+    are compared.
+    """
+    left = _archive_files(incremental)
+    right = _archive_files(clean)
+    differences: list[str] = []
+
+    for name in sorted(left.keys() - right.keys()):
+        differences.append(f"only in incremental archive: {name}")
+    for name in sorted(right.keys() - left.keys()):
+        differences.append(f"only in clean archive: {name}")
+
+    for name in sorted(left.keys() & right.keys()):
+        a, b = left[name], right[name]
+        if _is_macho(a) or _is_macho(b):
+            size_a, size_b = a.stat().st_size, b.stat().st_size
+            if size_a != size_b:
+                differences.append(f"binary size differs: {name} ({size_a} vs {size_b} bytes)")
+        elif _sha256(a) != _sha256(b):
+            differences.append(f"content differs: {name}")
+
+    return differences
+
+
+def source_packages_path() -> Path:
+    """Shared -clonedSourcePackagesDirPath; KMREADER_SOURCE_PACKAGES overrides it (e.g. a CI cache)."""
+    override = os.environ.get(SOURCE_PACKAGES_ENV, "").strip()
+    if override:
+        return Path(override).expanduser()
+    return get_project_root() / ".build" / "SourcePackages"
+
+
+def package_resolved_path(project: str) -> Path:
+    return Path(project) / "project.xcworkspace" / "xcshareddata" / "swiftpm" / "Package.resolved"
+
+
+def _package_references(project: str) -> bytes:
+    """The XCRemoteSwiftPackageReference section of project.pbxproj (URLs and requirements)."""
+    try:
+        text = (Path(project) / "project.pbxproj").read_text(encoding="utf-8")
+    except OSError:
+        return b""
+    start = text.find("/* Begin XCRemoteSwiftPackageReference section */")
+    end = text.find("/* End XCRemoteSwiftPackageReference section */")
+    if start < 0 or end < 0:
+        return b""
+    return text[start:end].encode("utf-8")
+
+
+def package_fingerprint(project: str) -> str | None:
+    """Fingerprint of the package resolution inputs, or None before the first resolution."""
+    try:
+        resolved = package_resolved_path(project).read_bytes()
+    except OSError:
+        return None
+    digest = hashlib.sha256()
+    digest.update(xcode_version().encode("utf-8"))
+    digest.update(_package_references(project))
+    digest.update(resolved)
+    return digest.hexdigest()
+
+
+def _load_package_state(directory: Path) -> dict:
+    try:
+        with (directory / PACKAGE_STATE_FILE).open("r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _save_package_state(directory: Path, state: dict) -> None:
+    tmp_path = directory / f"{PACKAGE_STATE_FILE}.{os.getpid()}.tmp"
+    with tmp_path.open("w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, directory / PACKAGE_STATE_FILE)
+
+
+def source_package_args(project: str, scheme: str, log=print) -> list[str]:
+    """
+    Return xcodebuild arguments that use the shared package checkouts.
+
+    When the fingerprint of Package.resolved and the project's package
+    references matches the last successful resolution, packages are not
+    resolved again (-disableAutomaticPackageResolution). Otherwise they are
+    resolved once, under a lock shared by threads and processes, before any
+    build uses the directory. The outcome is reported through log and
+    reused for the rest of the process.
+    """
+    with _package_lock:
+        if project in _package_args:
+            return list(_package_args[project])
+
+        directory = source_packages_path()
+        directory.mkdir(parents=True, exist_ok=True)
+        args = ["-clonedSourcePackagesDirPath", str(directory)]
+
+        with (directory / ".lock").open("w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            state = _load_package_state(directory)
+            hits, misses = state.get("hits", 0), state.get("misses", 0)
+            fingerprint = package_fingerprint(project)
+            checkouts = directory / "checkouts"
+
+            if fingerprint and state.get("fingerprint") == fingerprint and checkouts.is_dir():
+                hits += 1
+                status = "hit"
+                args.append("-disableAutomaticPackageResolution")
+            else:
+                misses += 1
+                if fingerprint is None:
+                    reason = "no Package.resolved"
+                elif not checkouts.is_dir():
+                    reason = "no checkouts"
+                else:
+                    reason = "package inputs changed"
+                result = proc.run(
+                    ["xcodebuild", "-resolvePackageDependencies", "-project", project, "-scheme", scheme]
+                    + args,
+                    label="xcodebuild -resolvePackageDependencies",
+                    capture_output=True,
+                    text=True,
+                )
+                fingerprint = package_fingerprint(project)
+                if result.returncode == 0 and fingerprint:
+                    state["fingerprint"] = fingerprint
+                    status = f"miss ({reason}), resolved"
+                    args.append("-disableAutomaticPackageResolution")
+                else:
+                    status = f"miss ({reason}), resolution failed; xcodebuild will resolve"
+
+            state.update(hits=hits, misses=misses)
+            _save_package_state(directory, state)
+
+        log(f"SwiftPM package cache: {status} [{hits} hits, {misses} misses] {directory}")
+        _package_args[project] = args
+        return list(args)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Parse xcodebuild -showBuildTimingSummary logs into per-phase and per-target reports.
+Runs anywhere Python does, so captured logs can be analyzed without Xcode.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+SUMMARY_HEADER = "Build Timing Summary"
+SUMMARY_LINE = re.compile(
+    r"^\s*(?P<phase>[A-Za-z][\w.-]*)\s+\((?P<tasks>\d+)\s+tasks?\)\s+\|\s+(?P<seconds>\d+(?:\.\d+)?)\s+seconds?\s*$"
+)
+TASK_LINE = re.compile(
+    r"^(?P<phase>[A-Za-z][\w.-]*)\s.*\(in target '(?P<target>[^']+)' from project '(?P<project>[^']+)'\)\s*$"
+)
+RESULT_LINE = re.compile(
+    r"^\*\* (?P<action>[A-Z ]+) (?P<result>SUCCEEDED|FAILED) \*\*(?:\s+\[(?P<seconds>\d+(?:\.\d+)?) sec\])?"
+)
+
+
+def get_project_root() -> Path:
+    return Path(__file__).resolve().parent.parent
+
+
+def reports_dir() -> Path:
+    return get_project_root() / ".build" / "misc" / "build-timing"
+
+
+def parse_build_log(lines: Iterable[str]) -> dict:
+    """
+    Build a report from xcodebuild output.
+
+    Phase totals come from the Build Timing Summary block. xcodebuild does
+    not time individual targets, so per-target seconds are estimated by
+    splitting each phase's total across targets in proportion to how many
+    tasks of that phase each target ran.
+    """
+    phases: dict[str, dict] = {}
+    target_tasks: dict[str, dict[str, int]] = {}
+    in_summary = False
+    total_seconds: float | None = None
+    succeeded: bool | None = None
+
+    for raw_line in lines:
+        line = raw_line.rstrip("\n")
+
+        if line.strip() == SUMMARY_HEADER:
+            in_summary = True
+            continue
+
+        if match := RESULT_LINE.match(line):
+            succeeded = match["result"] == "SUCCEEDED"
+            if match["seconds"]:
+                total_seconds = float(match["seconds"])
+            in_summary = False
+            continue
+
+        if in_summary:
+            if match := SUMMARY_LINE.match(line):
+                phase = phases.setdefault(match["phase"], {"tasks": 0, "seconds": 0.0})
+                phase["tasks"] += int(match["tasks"])
+                phase["seconds"] = round(phase["seconds"] + float(match["seconds"]), 3)
+            continue
+
+        if match := TASK_LINE.match(line):
+            counts = target_tasks.setdefault(match["target"], {})
+            counts[match["phase"]] = counts.get(match["phase"], 0) + 1
+
+    targets: dict[str, dict] = {}
+    for target, counts in target_tasks.items():
+        estimated = 0.0
+        for phase_name, count in counts.items():
+            phase = phases.get(phase_name)
+            if not phase:
+                continue
+            phase_task_total = sum(
+                other.get(phase_name, 0) for other in target_tasks.values()
+            )
+            if phase_task_total:
+                estimated += phase["seconds"] * count / phase_task_total
+        targets[target] = {
+            "tasks": sum(counts.values()),
+            "phases": dict(sorted(counts.items())),
+            "estimated_seconds": round(estimated, 3),
+        }
+
+    return {
+        "succeeded": succeeded,
+        "total_seconds": total_seconds,
+        "phases": dict(sorted(phases.items(), key=lambda item: -item[1]["seconds"])),
+        "targets": dict(
+            sorted(targets.items(), key=lambda item: -item[1]["estimated_seconds"])
+        ),
+    }
+
+
+def _delta(current: float, previous: float | None) -> str:
+    if previous is None:
+        return "new"
+    change = current - previous
+    if previous:
+        return f"{change:+.1f}s ({change / previous:+.0%})"
+    return f"{change:+.1f}s"
+
+
+def format_report(report: dict, previous: dict | None = None, limit: int = 15) -> list[str]:
+    """Render a report as text, with deltas against a previous report when given."""
+    previous_phases = (previous or {}).get("phases", {})
+    previous_targets = (previous or {}).get("targets", {})
+    lines: list[str] = []
+
+    if report.get("total_seconds") is not None:
+        line = f"Total build time: {report['total_seconds']:.1f}s"
+        if previous and previous.get("total_seconds") is not None:
+            line += f"  ({_delta(report['total_seconds'], previous['total_seconds'])})"
+        lines.append(line)
+        lines.append("")
+
+    phases = list(report.get("phases", {}).items())
+    if phases:
+        width = max(len("Phase"), *(len(name) for name, _ in phases[:limit]))
+        lines.append(f"{'Phase':<{width}}  {'Tasks':>6}  {'Seconds':>9}  vs previous")
+        for name, phase in phases[:limit]:
+            before = previous_phases.get(name, {}).get("seconds") if previous else None
+            delta = _delta(phase["seconds"], before) if previous else ""
+            lines.append(
+                f"{name:<{width}}  {phase['tasks']:>6}  {phase['seconds']:>9.1f}  {delta}"
+            )
+        lines.append("")
+
+    targets = list(report.get("targets", {}).items())
+    if targets:
+        width = max(len("Target"), *(len(name) for name, _ in targets[:limit]))
+        lines.append(f"{'Target':<{width}}  {'Tasks':>6}  {'Est. sec':>9}  vs previous")
+        for name, target in targets[:limit]:
+            before = (
+                previous_targets.get(name, {}).get("estimated_seconds") if previous else None
+            )
+            delta = _delta(target["estimated_seconds"], before) if previous else ""
+            lines.append(
+                f"{name:<{width}}  {target['tasks']:>6}  {target['estimated_seconds']:>9.1f}  {delta}"
+            )
+
+    if not phases:
+        lines.append("No Build Timing Summary found in log.")
+    return lines
+
+
+def load_report(path: Path) -> dict | None:
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            report = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return report if isinstance(report, dict) else None
+
+
+def save_report(path: Path, report: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def record_build(platform: str, log_path: Path) -> tuple[dict, dict | None]:
+    """Parse a build log, store it as the latest report for platform, return (report, previous)."""
+    with log_path.open("r", encoding="utf-8", errors="replace") as f:
+        report = parse_build_log(f)
+    report["platform"] = platform
+    report["log"] = str(log_path)
+    report["created_at"] = datetime.now().isoformat(timespec="seconds")
+
+    report_path = reports_dir() / f"{platform}.json"
+    previous = load_report(report_path)
+    save_report(report_path, report)
+    return report, previous
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Summarize an xcodebuild -showBuildTimingSummary log"
+    )
+    parser.add_argument("log", help="Captured xcodebuild output")
+    parser.add_argument("--previous", help="Previous report JSON to compare against")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    with open(args.log, "r", encoding="utf-8", errors="replace") as f:
+        report = parse_build_log(f)
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return 0
+
+    previous = load_report(Path(args.previous)) if args.previous else None
+    for line in format_report(report, previous):
+        print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
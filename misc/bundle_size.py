@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+App bundle size breakdown for IPA, PKG, .app and .xcarchive artifacts.
+Reads zip central directories and pkg payload headers without extracting
+anything to disk, so reports can be produced anywhere Python runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import lzma
+import os
+import plistlib
+import re
+import struct
+import sys
+import xml.etree.ElementTree as ET
+import zipfile
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from release_manifest import format_size, parse_size
+
+CATEGORIES = (
+    "executables",
+    "frameworks",
+    "extensions",
+    "asset_catalogs",
+    "localizations",
+    "readium_css",
+    "fonts",
+    "other",
+)
+FONT_SUFFIXES = {".ttf", ".otf", ".ttc", ".woff", ".woff2"}
+BUNDLE_SUFFIXES = (".app", ".appex", ".framework")
+_GROWTH = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*%\s*$")
+
+
+class SizeEntry:
+    __slots__ = ("path", "size", "compressed")
+
+    def __init__(self, path: str, size: int, compressed: int | None = None):
+        self.path = path
+        self.size = size
+        self.compressed = compressed
+
+
+def get_project_root() -> Path:
+    return Path(__file__).resolve().parent.parent
+
+
+def reports_dir() -> Path:
+    return get_project_root() / ".build" / "misc" / "size-reports"
+
+
+def default_budgets_path() -> Path:
+    return Path(__file__).resolve().parent / "size_budgets.json"
+
+
+def classify(path: str) -> str:
+    """Attribute a file inside an artifact to a size category."""
+    parts = path.split("/")
+    name = parts[-1]
+    lower = path.lower()
+
+    if name == "Assets.car":
+        return "asset_catalogs"
+    if any(part.endswith(".lproj") for part in parts[:-1]):
+        return "localizations"
+    if os.path.splitext(name)[1].lower() in FONT_SUFFIXES:
+        return "fonts"
+    if any(part.endswith(".framework") for part in parts) or (
+        "Frameworks" in parts[:-1] and name.endswith(".dylib")
+    ):
+        return "frameworks"
+    if "readium" in lower:
+        return "readium_css"
+
+    bundle_index = max(
+        (i for i, part in enumerate(parts[:-1]) if part.endswith(BUNDLE_SUFFIXES)),
+        default=None,
+    )
+    if bundle_index is not None:
+        stem = parts[bundle_index].rsplit(".", 1)[0]
+        inner = parts[bundle_index + 1 :]
+        if inner == [stem] or (len(inner) == 3 and inner[:2] == ["Contents", "MacOS"]):
+            return "executables"
+    if any(part.endswith(".appex") for part in parts):
+        return "extensions"
+    return "other"
+
+
+def iter_ipa(path: Path) -> Iterator[SizeEntry]:
+    """Read sizes from the zip central directory; file data is never decompressed."""
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            name = info.filename
+            if name.startswith("Payload/"):
+                name = name[len("Payload/") :]
+            yield SizeEntry(name, info.file_size, info.compress_size)
+
+
+def iter_tree(root: Path, prefix: str = "") -> Iterator[SizeEntry]:
+    """Walk a bundle directory, reporting paths relative to its parent."""
+    base = root.parent
+    for dirpath, _, files in os.walk(root):
+        for name in files:
+            full = os.path.join(dirpath, name)
+            try:
+                stat = os.lstat(full)
+            except OSError:
+                continue
+            rel = Path(full).relative_to(base).as_posix()
+            yield SizeEntry(prefix + rel, stat.st_size)
+
+
+def iter_xcarchive(path: Path) -> Iterator[SizeEntry]:
+    """Walk the applications inside an archive; dSYMs are not shipped and are skipped."""
+    applications = path / "Products" / "Applications"
+    for app in sorted(applications.glob("*.app")):
+        yield from iter_tree(app)
+
+
+class _ChunkReader:
+    """Sequential reader over an iterator of byte chunks."""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._buffer = b""
+        self._pos = 0
+
+    def _fill(self) -> bool:
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def read(self, size: int) -> bytes:
+        while len(self._buffer) - self._pos < size and self._fill():
+            pass
+        data = self._buffer[self._pos : self._pos + size]
+        self._pos += len(data)
+        return data
+
+    def skip(self, size: int) -> None:
+        while size > 0:
+            available = len(self._buffer) - self._pos
+            if available == 0:
+                self._buffer, self._pos = b"", 0
+                if not self._fill():
+                    return
+                continue
+            step = min(size, available)
+            self._pos += step
+            size -= step
+
+
+def _read_range(f, offset: int, length: int, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    f.seek(offset)
+    while length > 0:
+        data = f.read(min(chunk_size, length))
+        if not data:
+            return
+        length -= len(data)
+        yield data
+
+
+def _decode_payload(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Decompress a pkg Payload (gzip, pbzx/xz or plain cpio) as a stream."""
+    reader = _ChunkReader(chunks)
+    head = reader.read(4)
+    if head.startswith(b"\x1f\x8b"):
+        decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        yield decoder.decompress(head)
+        while data := reader.read(1024 * 1024):
+            yield decoder.decompress(data)
+        yield decoder.flush()
+    elif head == b"pbzx":
+        (flags,) = struct.unpack(">Q", reader.read(8))
+        while flags & 0x01000000:
+            header = reader.read(16)
+            if len(header) < 16:
+                return
+            flags, length = struct.unpack(">QQ", header)
+            data = reader.read(length)
+            yield lzma.decompress(data) if data.startswith(b"\xfd7zXZ") else data
+    else:
+        yield head
+        while data := reader.read(1024 * 1024):
+            yield data
+
+
+def _iter_cpio(chunks: Iterator[bytes]) -> Iterator[SizeEntry]:
+    """Yield regular files from an odc or newc cpio stream, skipping their contents."""
+    reader = _ChunkReader(chunks)
+    while True:
+        magic = reader.read(6)
+        if magic == b"070707":
+            header = reader.read(70)
+            mode = int(header[12:18], 8)
+            namesize = int(header[53:59], 8)
+            filesize = int(header[59:70], 8)
+            name = reader.read(namesize).rstrip(b"\0").decode("utf-8", "replace")
+            padding = 0
+        elif magic in (b"070701", b"070702"):
+            header = reader.read(104)
+            fields = [int(header[i : i + 8], 16) for i in range(0, 104, 8)]
+            mode, filesize, namesize = fields[1], fields[6], fields[11]
+            name = reader.read(namesize).rstrip(b"\0").decode("utf-8", "replace")
+            reader.skip((4 - (110 + namesize) % 4) % 4)
+            padding = (4 - filesize % 4) % 4
+        else:
+            return
+
+        if name == "TRAILER!!!":
+            return
+        reader.skip(filesize + padding)
+        if mode & 0o170000 == 0o100000:
+            yield SizeEntry(name[2:] if name.startswith("./") else name, filesize)
+
+
+def iter_pkg(path: Path) -> Iterator[SizeEntry]:
+    """
+    Walk a flat installer package.
+
+    The xar table of contents gives each component's Payload location; the
+    payloads are decompressed in memory and only their cpio headers are
+    kept. Other xar members (Bom, Distribution, scripts) are reported with
+    their stored size.
+    """
+    with path.open("rb") as f:
+        header = f.read(28)
+        if header[:4] != b"xar!":
+            raise ValueError(f"not a flat package: {path}")
+        header_size, _, toc_compressed, _ = struct.unpack(">HHQQ", header[4:24])
+        f.seek(header_size)
+        toc = ET.fromstring(zlib.decompress(f.read(toc_compressed)))
+        heap = header_size + toc_compressed
+
+        def walk(element, prefix: str):
+            for node in element.findall("file"):
+                name = node.findtext("name") or ""
+                node_path = f"{prefix}{name}"
+                if node.findtext("type") == "directory":
+                    yield from walk(node, node_path + "/")
+                    continue
+                data = node.find("data")
+                if data is None:
+                    continue
+                yield node_path, data
+
+        for member_path, data in list(walk(toc.find("toc"), "")):
+            length = int(data.findtext("length") or 0)
+            offset = heap + int(data.findtext("offset") or 0)
+            size = int(data.findtext("size") or length)
+            if member_path.rsplit("/", 1)[-1] != "Payload":
+                yield SizeEntry(member_path, size, length)
+                continue
+            chunks = _read_range(f, offset, length)
+            encoding = data.find("encoding")
+            if encoding is not None and "gzip" in encoding.get("style", ""):
+                decoder = zlib.decompressobj()
+                chunks = (decoder.decompress(chunk) for chunk in chunks)
+            yield from _iter_cpio(_decode_payload(chunks))
+
+
+def iter_entries(artifact: Path) -> Iterator[SizeEntry]:
+    suffix = artifact.suffix.lower()
+    if suffix == ".ipa":
+        return iter_ipa(artifact)
+    if suffix == ".pkg":
+        return iter_pkg(artifact)
+    if suffix == ".xcarchive":
+        return iter_xcarchive(artifact)
+    if suffix == ".app" and artifact.is_dir():
+        return iter_tree(artifact)
+    raise ValueError(f"unsupported artifact: {artifact}")
+
+
+def detect_platform(artifact: Path) -> str:
+    """Best-effort platform from the artifact type and the app's Info.plist."""
+    suffix = artifact.suffix.lower()
+    if suffix == ".pkg":
+        return "macos"
+    info = None
+    try:
+        if suffix == ".ipa":
+            with zipfile.ZipFile(artifact) as archive:
+                for name in archive.namelist():
+                    parts = name.split("/")
+                    if len(parts) == 3 and parts[0] == "Payload" and parts[2] == "Info.plist":
+                        info = plistlib.loads(archive.read(name))
+                        break
+        else:
+            apps = (
+                sorted((artifact / "Products" / "Applications").glob("*.app"))
+                if suffix == ".xcarchive"
+                else [artifact]
+            )
+            for app in apps:
+                if (app / "Contents").is_dir():
+                    return "macos"
+                with (app / "Info.plist").open("rb") as f:
+                    info = plistlib.load(f)
+                break
+    except (OSError, zipfile.BadZipFile, plistlib.InvalidFileException):
+        info = None
+    platforms = (info or {}).get("CFBundleSupportedPlatforms") or []
+    if any("AppleTV" in str(p) for p in platforms) or "tvos" in artifact.name.lower():
+        return "tvos"
+    return "ios"
+
+
+def build_report(artifact: Path, platform: str | None = None, top: int = 20) -> dict:
+    categories = {name: {"files": 0, "bytes": 0, "compressed": 0} for name in CATEGORIES}
+    largest: list[SizeEntry] = []
+    total = 0
+    compressed_total = 0
+    has_compressed = True
+
+    for entry in iter_entries(artifact):
+        category = categories[classify(entry.path)]
+        category["files"] += 1
+        category["bytes"] += entry.size
+        total += entry.size
+        if entry.compressed is None:
+            has_compressed = False
+        else:
+            category["compressed"] += entry.compressed
+            compressed_total += entry.compressed
+        largest.append(entry)
+        if len(largest) > top * 4:
+            largest.sort(key=lambda e: -e.size)
+            del largest[top:]
+
+    largest.sort(key=lambda e: -e.size)
+    if not has_compressed:
+        for category in categories.values():
+            category.pop("compressed")
+    return {
+        "artifact": str(artifact),
+        "platform": platform or detect_platform(artifact),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "total_bytes": total,
+        "compressed_bytes": compressed_total if has_compressed else None,
+        "categories": {name: value for name, value in categories.items() if value["files"]},
+        "largest_files": [{"path": e.path, "bytes": e.size} for e in largest[:top]],
+    }
+
+
+def _delta(current: int, previous: int | None) -> str:
+    if previous is None:
+        return "new"
+    change = current - previous
+    sign = "+" if change >= 0 else "-"
+    text = f"{sign}{format_size(abs(change))}"
+    if previous:
+        text += f" ({change / previous:+.1%})"
+    return text
+
+
+def format_report(report: dict, previous: dict | None = None, top: int = 10) -> list[str]:
+    lines = [f"Bundle size for {report['platform']}: {report['artifact']}"]
+    total = f"  Install size: {format_size(report['total_bytes'])}"
+    if previous:
+        total += f"  ({_delta(report['total_bytes'], previous.get('total_bytes'))})"
+    lines.append(total)
+    if report.get("compressed_bytes") is not None:
+        download = f"  Compressed size: {format_size(report['compressed_bytes'])}"
+        if previous and previous.get("compressed_bytes") is not None:
+            download += f"  ({_delta(report['compressed_bytes'], previous['compressed_bytes'])})"
+        lines.append(download)
+    lines.append("")
+
+    previous_categories = (previous or {}).get("categories", {})
+    names = [name for name in CATEGORIES if name in report["categories"] or name in previous_categories]
+    width = max(len("Category"), *(len(name) for name in names)) if names else len("Category")
+    lines.append(f"{'Category':<{width}}  {'Files':>6}  {'Size':>10}  vs previous")
+    for name in names:
+        current = report["categories"].get(name, {"files": 0, "bytes": 0})
+        before = previous_categories.get(name, {}).get("bytes") if previous else None
+        delta = _delta(current["bytes"], before) if previous else ""
+        lines.append(
+            f"{name:<{width}}  {current['files']:>6}  {format_size(current['bytes']):>10}  {delta}"
+        )
+
+    if report.get("largest_files"):
+        lines.append("")
+        lines.append("Largest files:")
+        for item in report["largest_files"][:top]:
+            lines.append(f"  {format_size(item['bytes']):>10}  {item['path']}")
+    return lines
+
+
+def load_report(path: Path) -> dict | None:
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            report = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return report if isinstance(report, dict) else None
+
+
+def save_report(path: Path, report: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def report_path(platform: str) -> Path:
+    return reports_dir() / f"{platform}.json"
+
+
+def load_budgets(path: Path) -> dict:
+    """Read per-platform budgets; a missing file means no budgets."""
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            budgets = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if not isinstance(budgets, dict):
+        raise ValueError(f"size budgets must be a JSON object: {path}")
+    return budgets
+
+
+def check_budgets(report: dict, previous: dict | None, budgets: dict) -> list[str]:
+    """
+    Return budget violations for the report's platform.
+
+    Budgets look like {"ios": {"max_total": "150M", "max_growth": "5%",
+    "categories": {"frameworks": "60M"}}}; max_growth also accepts a size
+    and is compared with the previous stored report.
+    """
+    budget = budgets.get(report["platform"]) or {}
+    violations = []
+
+    if "max_total" in budget:
+        limit = parse_size(str(budget["max_total"]))
+        if report["total_bytes"] > limit:
+            violations.append(
+                f"total {format_size(report['total_bytes'])} exceeds {format_size(limit)}"
+            )
+
+    for name, value in (budget.get("categories") or {}).items():
+        limit = parse_size(str(value))
+        size = report["categories"].get(name, {}).get("bytes", 0)
+        if size > limit:
+            violations.append(f"{name} {format_size(size)} exceeds {format_size(limit)}")
+
+    if "max_growth" in budget and previous and previous.get("total_bytes"):
+        growth = report["total_bytes"] - previous["total_bytes"]
+        value = str(budget["max_growth"])
+        if match := _GROWTH.match(value):
+            limit = int(previous["total_bytes"] * float(match[1]) / 100)
+        else:
+            limit = parse_size(value)
+        if growth > limit:
+            violations.append(
+                f"grew {format_size(growth)} since the previous report (limit {value})"
+            )
+    return violations
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Break down the size of an app artifact")
+    parser.add_argument("artifact", help="IPA, PKG, .app or .xcarchive")
+    parser.add_argument("--platform", choices=["ios", "macos", "tvos"], default=None)
+    parser.add_argument("--previous", help="Previous report JSON (default: the stored report)")
+    parser.add_argument("--budgets", default=str(default_budgets_path()))
+    parser.add_argument("--save", action="store_true", help="Store as the platform's previous report")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    report = build_report(Path(args.artifact), args.platform)
+    previous = load_report(Path(args.previous) if args.previous else report_path(report["platform"]))
+
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        for line in format_report(report, previous):
+            print(line)
+
+    violations = check_budgets(report, previous, load_budgets(Path(args.budgets)))
+    for violation in violations:
+        print(f"Size budget exceeded: {violation}", file=sys.stderr)
+    if args.save and not violations:
+        save_report(report_path(report["platform"]), report)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Streaming validator for .xcstrings files, behind `translate.py check`.
+
+The file is read in fixed-size chunks by an incremental JSON tokenizer and
+checked in a single pass, so memory depends on nesting depth and the longest
+string, not on file size. Checked:
+
+- Xcode formatting: the whitespace before every token must be what
+  xcstrings.dumps() writes (2-space indent, " : " separators, "{}" for empty
+  objects, at most a final newline), and strings must use canonical escapes.
+- Order: keys of "strings" under localize_sort's comparator, localizations
+  in xcstrings.LOCALIZATION_KEY_ORDER, every other object sorted.
+- Required fields: sourceLanguage/strings/version at the top, state/value in
+  every stringUnit, and a known state.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+
+import localize_sort
+import xcstrings
+
+try:
+    from json.encoder import c_encode_basestring as _encode_string
+except ImportError:  # pragma: no cover - pure-Python json build
+    from json.encoder import py_encode_basestring as _encode_string
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_VIOLATIONS = 20
+STATES = frozenset(("new", "translated", "needs_review", "stale"))
+
+_WHITESPACE = re.compile(r"[ \t\r\n]*")
+_LITERAL = re.compile(r"-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?|true|false|null")
+# Kept in the buffer ahead of each token so whitespace and literals match in one go.
+_LOOKAHEAD = 1024
+
+ROOT = "root"
+STRINGS = "strings"
+ENTRY = "entry"
+LOCALIZATIONS = "localizations"
+LOCALIZATION = "localization"
+UNIT = "unit"
+VARIATIONS = "variations"
+CASES = "cases"
+OTHER = "other"
+
+_REQUIRED = {
+    ROOT: ("sourceLanguage", "strings", "version"),
+    UNIT: ("state", "value"),
+}
+_OBJECT_ROLES = frozenset((ROOT, STRINGS, ENTRY, LOCALIZATIONS, LOCALIZATION, UNIT, VARIATIONS, CASES))
+
+
+class CheckError(Exception):
+    """Malformed JSON; checking cannot continue past it."""
+
+    def __init__(self, line: int, message: str):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+        self.message = message
+
+
+class Violation:
+    __slots__ = ("line", "key", "message")
+
+    def __init__(self, line: int, key: str | None, message: str):
+        self.line = line
+        self.key = key
+        self.message = message
+
+    def __str__(self) -> str:
+        if self.key is None:
+            return self.message
+        return f"{self.key!r}: {self.message}"
+
+
+class Token:
+    __slots__ = ("kind", "value", "raw", "space", "line")
+
+    def __init__(self, kind: str, value: object, raw: str, space: str, line: int):
+        self.kind = kind
+        self.value = value
+        self.raw = raw
+        # Whitespace before the token, truncated to a bounded length.
+        self.space = space
+        self.line = line
+
+    def describe(self) -> str:
+        if self.kind == "eof":
+            return "end of file"
+        if self.kind == "string":
+            return self.raw if len(self.raw) <= 40 else self.raw[:37] + '..."'
+        return repr(self.raw)
+
+
+class Tokenizer:
+    """Incremental JSON tokenizer over a text file object."""
+
+    _SPACE_LIMIT = 256
+
+    def __init__(self, f, chunk_size: int = CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.line = 1
+
+    def _fill(self) -> bool:
+        """Append the next chunk, dropping what was consumed; False at end of file."""
+        if self.eof:
+            return False
+        data = self.f.read(self.chunk_size)
+        if not data:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + data
+        self.position = 0
+        return True
+
+    def _space(self) -> str:
+        """Whitespace run that does not fit in the lookahead; only the first part is kept."""
+        parts = []
+        size = 0
+        while True:
+            match = _WHITESPACE.match(self.buffer, self.position)
+            space = match.group()
+            self.position = match.end()
+            self.line += space.count("\n")
+            if size < self._SPACE_LIMIT:
+                parts.append(space[: self._SPACE_LIMIT - size])
+            size += len(space)
+            if self.position < len(self.buffer) or not self._fill():
+                return "".join(parts)
+
+    def next(self) -> Token:
+        if len(self.buffer) - self.position < _LOOKAHEAD:
+            while len(self.buffer) - self.position < _LOOKAHEAD and self._fill():
+                pass
+        match = _WHITESPACE.match(self.buffer, self.position)
+        if match.end() < len(self.buffer) or self.eof:
+            space = match.group()
+            self.position = match.end()
+            if space:
+                self.line += space.count("\n")
+        else:
+            space = self._space()
+        line = self.line
+        if self.position >= len(self.buffer):
+            return Token("eof", None, "", space, line)
+        char = self.buffer[self.position]
+        if char in "{}[]:,":
+            self.position += 1
+            return Token(char, None, char, space, line)
+        if char == '"':
+            while True:
+                try:
+                    value, end = json.decoder.scanstring(self.buffer, self.position + 1)
+                    break
+                except ValueError as exc:
+                    if not self._fill():
+                        raise CheckError(line, f"invalid string: {exc.msg}") from None
+            raw = self.buffer[self.position:end]
+            self.position = end
+            return Token("string", value, raw, space, line)
+        match = _LITERAL.match(self.buffer, self.position)
+        if match is None:
+            raise CheckError(line, f"unexpected character {char!r}")
+        self.position = match.end()
+        raw = match.group()
+        return Token("literal", json.loads(raw), raw, space, line)
+
+
+def _describe_space(space: str) -> str:
+    if not space:
+        return "nothing"
+    if space == " ":
+        return "one space"
+    if space == "\n":
+        return "a newline"
+    if space.startswith("\n") and space[1:] == " " * (len(space) - 1):
+        return f"a newline and {len(space) - 1} spaces"
+    return repr(space)
+
+
+def _language_rank(language: str) -> tuple[int, int]:
+    try:
+        return 0, xcstrings.LOCALIZATION_KEY_ORDER.index(language)
+    except ValueError:
+        return 1, 0
+
+
+def _child_role(role: str, key: str) -> str:
+    if role == ROOT:
+        return STRINGS if key == "strings" else OTHER
+    if role == STRINGS:
+        return ENTRY
+    if role == ENTRY:
+        return LOCALIZATIONS if key == "localizations" else OTHER
+    if role == LOCALIZATIONS or role == CASES:
+        return LOCALIZATION
+    if role == LOCALIZATION:
+        if key == "stringUnit":
+            return UNIT
+        if key == "variations":
+            return VARIATIONS
+        if key == "substitutions":
+            return OTHER
+    if role == VARIATIONS:
+        return CASES
+    if role == OTHER and key == "variations":
+        return VARIATIONS
+    return OTHER
+
+
+class _Stop(Exception):
+    pass
+
+
+class Checker:
+    def __init__(self, max_violations: int = DEFAULT_MAX_VIOLATIONS):
+        self.max_violations = max_violations
+        self.violations: list[Violation] = []
+        self.truncated = False
+        # Whether keys of "strings" can be checked; plain sorting is not Finder's order.
+        self.check_key_order = localize_sort.LOCALIZED_COMPARE is not None
+        self.entries = 0
+        self._key: str | None = None
+
+    def _report(self, line: int, message: str) -> None:
+        if len(self.violations) >= self.max_violations:
+            self.truncated = True
+            raise _Stop
+        self.violations.append(Violation(line, self._key, message))
+
+    def _expect_space(self, token: Token, expected: str) -> None:
+        if token.space != expected:
+            self._report(
+                token.line,
+                f"expected {_describe_space(expected)} before {token.describe()}, "
+                f"found {_describe_space(token.space)}",
+            )
+
+    def _next(self, tokens: Tokenizer, *kinds: str) -> Token:
+        token = tokens.next()
+        if kinds and token.kind not in kinds:
+            expected = " or ".join(repr(kind) for kind in kinds)
+            raise CheckError(token.line, f"expected {expected}, found {token.describe()}")
+        return token
+
+    def _check_string(self, token: Token) -> None:
+        # Without escapes a valid JSON string is already in canonical form.
+        if "\\" not in token.raw:
+            return
+        canonical = _encode_string(token.value)
+        if token.raw != canonical:
+            self._report(token.line, f"string {token.describe()} is not escaped as {canonical}")
+
+    def _check_order(self, role: str, previous: str, key: str, line: int) -> None:
+        if role == STRINGS:
+            if previous == key:
+                self._report(line, "duplicate key")
+            elif self.check_key_order and localize_sort.compare_strings(previous, key) > 0:
+                self._report(line, f"key out of order after {previous!r}")
+        elif role == LOCALIZATIONS:
+            previous_rank = _language_rank(previous)
+            rank = _language_rank(key)
+            if previous_rank > rank or (
+                previous_rank == rank and localize_sort.compare_strings(previous, key) >= 0
+            ):
+                self._report(line, f"localization {key!r} out of order after {previous!r}")
+        elif previous >= key:
+            self._report(line, f"field {key!r} out of order after {previous!r}")
+
+    def _object(self, tokens: Tokenizer, role: str, depth: int) -> None:
+        token = self._next(tokens)
+        seen: set[str] | None = set() if role != STRINGS else None
+        previous: str | None = None
+        if token.kind == "}":
+            self._expect_space(token, "")
+        else:
+            indent = "\n" + xcstrings.INDENT * (depth + 1)
+            while True:
+                if token.kind != "string":
+                    raise CheckError(token.line, f"expected a key, found {token.describe()}")
+                self._expect_space(token, indent)
+                self._check_string(token)
+                key = token.value
+                if role == STRINGS:
+                    self._key = key
+                    self.entries += 1
+                elif key in seen:
+                    self._report(token.line, f"duplicate field {key!r}")
+                else:
+                    seen.add(key)
+                if previous is not None:
+                    self._check_order(role, previous, key, token.line)
+                previous = key
+                colon = self._next(tokens, ":")
+                self._expect_space(colon, " ")
+                value = self._next(tokens)
+                self._expect_space(value, " ")
+                self._value(tokens, value, _child_role(role, key), depth + 1, key, role)
+                token = self._next(tokens, ",", "}")
+                if token.kind == "}":
+                    self._expect_space(token, "\n" + xcstrings.INDENT * depth)
+                    break
+                self._expect_space(token, "")
+                token = self._next(tokens)
+        if role == STRINGS:
+            self._key = None
+        for field in _REQUIRED.get(role, ()):
+            if field not in seen:
+                self._report(token.line, f"missing required field {field!r}")
+        if role == LOCALIZATION and not seen & {"stringUnit", "variations", "substitutions"}:
+            self._report(token.line, "localization has no stringUnit or variations")
+
+    def _array(self, tokens: Tokenizer, depth: int) -> None:
+        token = self._next(tokens)
+        if token.kind == "]":
+            self._expect_space(token, "")
+            return
+        indent = "\n" + xcstrings.INDENT * (depth + 1)
+        while True:
+            self._expect_space(token, indent)
+            self._value(tokens, token, OTHER, depth + 1, None, OTHER)
+            token = self._next(tokens, ",", "]")
+            if token.kind == "]":
+                self._expect_space(token, "\n" + xcstrings.INDENT * depth)
+                return
+            self._expect_space(token, "")
+            token = self._next(tokens)
+
+    def _value(self, tokens: Tokenizer, token: Token, role: str, depth: int, key: str | None, parent: str) -> None:
+        if token.kind == "{":
+            self._object(tokens, role, depth)
+            return
+        if role in _OBJECT_ROLES:
+            self._report(token.line, f"{key!r} must be an object, found {token.describe()}")
+        if token.kind == "[":
+            self._array(tokens, depth)
+        elif token.kind == "string":
+            self._check_string(token)
+            if parent == UNIT and key == "state" and token.value not in STATES:
+                self._report(token.line, f"unknown state {token.value!r}")
+        elif token.kind == "literal":
+            if parent == UNIT:
+                self._report(token.line, f"{key!r} must be a string")
+        else:
+            raise CheckError(token.line, f"expected a value, found {token.describe()}")
+
+    def check(self, f, chunk_size: int = CHUNK_SIZE) -> list[Violation]:
+        """Check a text file object; malformed JSON is reported as the last violation."""
+        tokens = Tokenizer(f, chunk_size)
+        try:
+            token = self._next(tokens, "{")
+            self._expect_space(token, "")
+            self._object(tokens, ROOT, 0)
+            token = self._next(tokens)
+            if token.kind != "eof":
+                raise CheckError(token.line, f"unexpected {token.describe()} after the catalog")
+            # translate.py writes no final newline, Xcode writes one.
+            if token.space != "\n":
+                self._expect_space(token, "")
+        except CheckError as exc:
+            self.violations.append(Violation(exc.line, self._key, exc.message))
+        except _Stop:
+            pass
+        return self.violations
+
+
+def check_file(path, max_violations: int = DEFAULT_MAX_VIOLATIONS) -> Checker:
+    checker = Checker(max_violations)
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        checker.check(f)
+    return checker
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Export and import of catalog cells for CAT tools, behind `translate.py
+export` and `translate.py import`.
+
+One record per (key, language) cell, as NDJSON or XLIFF 1.2/2.0. Every
+record carries a hash of the cell's source text and content at export time;
+import skips cells whose hash no longer matches (the catalog changed in the
+meantime) unless forced.
+
+Both directions stream: export reads the catalog one entry at a time with
+xcstrings.iter_entries, import reads records incrementally (iterparse for
+XLIFF) and rewrites the catalog in a single pass with xcstrings.iter_segments,
+re-serializing only the entries it changes. Memory is bounded by the largest
+entry plus the imported records, never by the catalog.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+from xml.sax.saxutils import escape, quoteattr
+
+import catalog_lint
+import translation_memory
+import xcstrings
+
+SOURCE_LANGUAGE = "en"
+FORMATS = ("ndjson", "xliff12", "xliff20")
+# Cell states that can be selected on export; "missing" means no localization at all.
+STATES = ("translated", "needs_review", "new", "stale", "missing")
+XLIFF12_NS = "urn:oasis:names:tc:xliff:document:1.2"
+XLIFF20_NS = "urn:oasis:names:tc:xliff:document:2.0"
+# Namespace of the hash attribute on XLIFF units.
+HASH_NS = "urn:kmreader:xcstrings"
+
+# Catalog state -> XLIFF state, and back.
+_XLIFF12_STATES = {
+    "translated": "translated",
+    "needs_review": "needs-review-translation",
+    "stale": "needs-review-translation",
+    "new": "new",
+}
+_XLIFF20_STATES = {
+    "translated": "final",
+    "needs_review": "translated",
+    "stale": "translated",
+    "new": "initial",
+}
+_IMPORT_STATES = {
+    # XLIFF 1.2
+    "final": xcstrings.TRANSLATED,
+    "signed-off": xcstrings.TRANSLATED,
+    "needs-adaptation": xcstrings.NEEDS_REVIEW,
+    "needs-l10n": xcstrings.NEEDS_REVIEW,
+    "needs-review-adaptation": xcstrings.NEEDS_REVIEW,
+    "needs-review-l10n": xcstrings.NEEDS_REVIEW,
+    "needs-review-translation": xcstrings.NEEDS_REVIEW,
+    "needs-translation": xcstrings.NEW,
+    "new": xcstrings.NEW,
+    "translated": xcstrings.TRANSLATED,
+}
+
+
+def cell_hash(source: str, localization: xcstrings.Localization | None) -> str:
+    """Hash of what a translator saw: the source text and the cell's content."""
+    content = xcstrings.dumps(localization) if localization is not None else ""
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(source.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(content.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class Cell:
+    __slots__ = ("key", "language", "source", "target", "state", "comment", "hash")
+
+    def __init__(
+        self,
+        key: str,
+        language: str,
+        source: str | None,
+        target: str | None,
+        state: str | None,
+        comment: str | None = None,
+        hash: str | None = None,
+    ):
+        self.key = key
+        self.language = language
+        self.source = source
+        self.target = target
+        self.state = state
+        self.comment = comment
+        self.hash = hash
+
+    def to_json(self) -> dict:
+        return {
+            "key": self.key,
+            "language": self.language,
+            "source": self.source,
+            "target": self.target,
+            "state": self.state,
+            "comment": self.comment,
+            "hash": self.hash,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Cell":
+        if not isinstance(data, dict) or not isinstance(data.get("key"), str) or not isinstance(
+            data.get("language"), str
+        ):
+            raise ValueError("record needs string 'key' and 'language'")
+        return cls(
+            data["key"],
+            data["language"],
+            data.get("source"),
+            data.get("target"),
+            data.get("state"),
+            data.get("comment"),
+            data.get("hash"),
+        )
+
+
+# Export
+
+
+def iter_cells(
+    catalog_path: Path | str,
+    languages: Iterable[str],
+    states: Iterable[str] | None = None,
+    missing_only: bool = False,
+) -> Iterator[Cell]:
+    """
+    Exportable cells in catalog order. Keys with shouldTranslate false and
+    cells with variations (plural/device) are left out.
+    """
+    languages = list(languages)
+    states = set(states) if states else None
+    for key, entry in xcstrings.iter_entries(catalog_path):
+        if not isinstance(entry, xcstrings.Entry) or not entry.translatable:
+            continue
+        source = translation_memory.source_text(key, entry)
+        for language in languages:
+            localization = entry.localization(language)
+            if localization is not None and not localization.has_unit:
+                continue
+            state = localization.state if localization is not None else None
+            if missing_only and state == xcstrings.TRANSLATED:
+                continue
+            if states is not None and (state or "missing") not in states:
+                continue
+            yield Cell(
+                key,
+                language,
+                source,
+                localization.value if localization is not None else None,
+                state,
+                entry.comment,
+                cell_hash(source, localization),
+            )
+
+
+def write_ndjson(cells: Iterable[Cell], out: IO[str]) -> int:
+    count = 0
+    for cell in cells:
+        out.write(json.dumps(cell.to_json(), ensure_ascii=False))
+        out.write("\n")
+        count += 1
+    return count
+
+
+def _hash_attribute(cell: Cell) -> str:
+    return f" km:hash={quoteattr(cell.hash)}" if cell.hash else ""
+
+
+def write_xliff12(cells: Iterable[Cell], language: str, out: IO[str], original: str) -> int:
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    out.write(f'<xliff version="1.2" xmlns="{XLIFF12_NS}" xmlns:km="{HASH_NS}">\n')
+    out.write(
+        f"  <file original={quoteattr(original)} source-language={quoteattr(SOURCE_LANGUAGE)} "
+        f'target-language={quoteattr(language)} datatype="plaintext">\n'
+    )
+    out.write("    <body>\n")
+    count = 0
+    for cell in cells:
+        out.write(
+            f'      <trans-unit id={quoteattr(cell.key)} xml:space="preserve"{_hash_attribute(cell)}>\n'
+        )
+        out.write(f"        <source>{escape(cell.source or '')}</source>\n")
+        if cell.target is not None:
+            state = _XLIFF12_STATES.get(cell.state or "", "new")
+            out.write(f"        <target state={quoteattr(state)}>{escape(cell.target)}</target>\n")
+        if cell.comment:
+            out.write(f"        <note>{escape(cell.comment)}</note>\n")
+        out.write("      </trans-unit>\n")
+        count += 1
+    out.write("    </body>\n  </file>\n</xliff>\n")
+    return count
+
+
+def write_xliff20(cells: Iterable[Cell], language: str, out: IO[str], original: str) -> int:
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    out.write(
+        f'<xliff version="2.0" xmlns="{XLIFF20_NS}" xmlns:km="{HASH_NS}" '
+        f"srcLang={quoteattr(SOURCE_LANGUAGE)} trgLang={quoteattr(language)}>\n"
+    )
+    out.write(f'  <file id="f1" original={quoteattr(original)}>\n')
+    count = 0
+    for cell in cells:
+        # Unit ids are NMTOKENs, so the key goes in name.
+        count += 1
+        out.write(
+            f'    <unit id="u{count}" name={quoteattr(cell.key)} xml:space="preserve"'
+            f"{_hash_attribute(cell)}>\n"
+        )
+        if cell.comment:
+            out.write(f"      <notes>\n        <note>{escape(cell.comment)}</note>\n      </notes>\n")
+        state = _XLIFF20_STATES.get(cell.state or "", "initial")
+        out.write(f"      <segment state={quoteattr(state)}>\n")
+        out.write(f"        <source>{escape(cell.source or '')}</source>\n")
+        if cell.target is not None:
+            out.write(f"        <target>{escape(cell.target)}</target>\n")
+        out.write("      </segment>\n    </unit>\n")
+    out.write("  </file>\n</xliff>\n")
+    return count
+
+
+WRITERS = {"xliff12": write_xliff12, "xliff20": write_xliff20}
+
+
+# Import
+
+
+def _xliff_state(state: str | None, version: str, has_target: bool) -> str | None:
+    if not has_target:
+        return None
+    if state is None:
+        return xcstrings.TRANSLATED
+    if version == "2.0":
+        if state in ("final", "reviewed"):
+            return xcstrings.TRANSLATED
+        return xcstrings.NEEDS_REVIEW if state == "translated" else xcstrings.NEW
+    return _IMPORT_STATES.get(state, xcstrings.NEEDS_REVIEW)
+
+
+def read_xliff(source: IO[bytes] | str) -> Iterator[Cell]:
+    """Cells of an XLIFF 1.2 or 2.0 document, parsed incrementally."""
+    import xml.etree.ElementTree as ElementTree
+
+    hash_attribute = f"{{{HASH_NS}}}hash"
+    version = None
+    language = None
+    namespace = ""
+    for event, element in ElementTree.iterparse(source, events=("start", "end")):
+        if event == "start":
+            if version is None:
+                if element.tag not in (f"{{{XLIFF12_NS}}}xliff", f"{{{XLIFF20_NS}}}xliff"):
+                    raise ValueError("not an XLIFF 1.2 or 2.0 document")
+                version = element.get("version")
+                namespace = element.tag[: element.tag.index("}") + 1]
+                language = element.get("trgLang")
+            elif element.tag == f"{namespace}file" and version != "2.0":
+                language = element.get("target-language")
+            continue
+        if element.tag == f"{namespace}trans-unit":
+            target = element.find(f"{namespace}target")
+            text = "".join(target.itertext()) if target is not None else None
+            state = target.get("state") if target is not None else None
+            key = element.get("id")
+        elif element.tag == f"{namespace}unit":
+            key = element.get("name") or element.get("id")
+            segment = element.find(f"{namespace}segment")
+            target = segment.find(f"{namespace}target") if segment is not None else None
+            text = "".join(target.itertext()) if target is not None else None
+            state = segment.get("state") if segment is not None else None
+        else:
+            continue
+        if language is None:
+            raise ValueError("XLIFF document has no target language")
+        yield Cell(
+            key,
+            language,
+            None,
+            text,
+            _xliff_state(state, version, text is not None),
+            None,
+            element.get(hash_attribute),
+        )
+        # Units are independent; drop them so memory stays bounded.
+        element.clear()
+
+
+def read_ndjson(lines: Iterable[str]) -> Iterator[Cell]:
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield Cell.from_json(json.loads(line))
+        except ValueError as exc:
+            raise ValueError(f"line {number}: {exc}") from None
+
+
+_CELL_STATES = (xcstrings.TRANSLATED, xcstrings.NEEDS_REVIEW, xcstrings.NEW)
+
+
+class ImportResult:
+    def __init__(self):
+        self.applied: list[Cell] = []
+        self.unchanged = 0
+        self.empty = 0
+        # (cell, reason) pairs that were not applied.
+        self.conflicts: list[tuple[Cell, str]] = []
+        self.rejected: list[tuple[Cell, str]] = []
+
+
+def _import_cell(
+    key: str, entry: xcstrings.Entry, cell: Cell, force: bool, result: ImportResult
+) -> bool:
+    """Apply one cell to entry; True when the entry changed."""
+    if not entry.translatable:
+        result.rejected.append((cell, "key has shouldTranslate false"))
+        return False
+    if cell.target is None or cell.target == "":
+        result.empty += 1
+        return False
+    localization = entry.localization(cell.language)
+    if localization is not None and not localization.has_unit:
+        result.rejected.append((cell, "cell has variations"))
+        return False
+    source = translation_memory.source_text(key, entry)
+    if cell.hash and not force and cell.hash != cell_hash(source, localization):
+        result.conflicts.append((cell, "changed in the catalog since export"))
+        return False
+    if cell.language != SOURCE_LANGUAGE:
+        problems = catalog_lint.compare(catalog_lint.source_arguments(key, entry), cell.target)
+        errors = [message for severity, message in problems if severity == catalog_lint.ERROR]
+        if errors:
+            result.rejected.append((cell, "; ".join(errors)))
+            return False
+    state = cell.state if cell.state in _CELL_STATES else xcstrings.TRANSLATED
+    if localization is not None and localization.value == cell.target and localization.state == state:
+        result.unchanged += 1
+        return False
+    localizations = entry.ensure_localizations()
+    localizations[cell.language] = xcstrings.Localization(state, cell.target)
+    entry.localizations = xcstrings.sort_localizations(localizations)
+    result.applied.append(cell)
+    return True
+
+
+def apply_cells(
+    catalog_path: Path | str, cells: Iterable[Cell], force: bool = False, dry_run: bool = False
+) -> ImportResult:
+    """
+    Apply imported cells in one streaming rewrite of the catalog. Cells for
+    keys the catalog does not have are rejected.
+    """
+    pending: dict[str, list[Cell]] = {}
+    for cell in cells:
+        pending.setdefault(cell.key, []).append(cell)
+
+    result = ImportResult()
+    catalog_path = Path(catalog_path)
+    tmp_path = catalog_path.with_name(f".{catalog_path.name}.{os.getpid()}.tmp")
+    changed = False
+    try:
+        with open(catalog_path, "r", encoding="utf-8", newline="") as f, open(
+            tmp_path, "w", encoding="utf-8", newline=""
+        ) as out:
+            for key, segment in xcstrings.iter_segments(f):
+                cells_for_key = pending.pop(key, None) if key is not None else None
+                if cells_for_key:
+                    entry = xcstrings.parse_entry(segment)
+                    if isinstance(entry, xcstrings.Entry):
+                        entry_changed = False
+                        for cell in cells_for_key:
+                            entry_changed |= _import_cell(key, entry, cell, force, result)
+                        if entry_changed:
+                            segment = xcstrings.entry_block(entry)
+                            changed = True
+                out.write(segment)
+        for cells_for_key in pending.values():
+            result.rejected.extend((cell, "key not in the catalog") for cell in cells_for_key)
+        if changed and not dry_run:
+            os.replace(tmp_path, catalog_path)
+    finally:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+    return result
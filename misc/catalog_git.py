@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Compare the string catalog with its content at a git revision, key by key,
+so checks can be limited to the keys a change actually touched.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import proc
+import xcstrings
+
+# Compare in shrinking slices so the scan stays in C for long equal runs.
+_STEPS = (65536, 4096, 256, 16, 1)
+
+
+class CatalogDiff:
+    """
+    Keys added, modified and removed between two catalogs.
+
+    base and current map keys to entry blocks (xcstrings.entry_blocks); keys
+    whose text is identical in both catalogs may be left out of both.
+    """
+
+    def __init__(self, base: dict[str, str], current: dict[str, str]):
+        self.base_blocks = base
+        self.blocks = current
+        self.added = [key for key in current if key not in base]
+        self.modified = [
+            key
+            for key, block in current.items()
+            if key in base and base[key] != block
+        ]
+        self.removed = [key for key in base if key not in current]
+
+    @property
+    def changed(self) -> list[str]:
+        """Added and modified keys in current catalog order."""
+        changed = set(self.added)
+        changed.update(self.modified)
+        return [key for key in self.blocks if key in changed]
+
+    def digests(self) -> dict[str, str]:
+        """Content hash of every changed entry."""
+        return {key: xcstrings.block_digest(self.blocks[key]) for key in self.changed}
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.added)} added, {len(self.modified)} modified, "
+            f"{len(self.removed)} removed"
+        )
+
+    def changed_catalog(self) -> xcstrings.Catalog:
+        """A catalog holding only the changed entries, parsed from their blocks."""
+        return xcstrings.Catalog(
+            strings={key: xcstrings.parse_entry(self.blocks[key]) for key in self.changed}
+        )
+
+
+def _common_prefix(a: str, b: str, limit: int) -> int:
+    position = 0
+    for size in _STEPS:
+        while position + size <= limit and a[position:position + size] == b[position:position + size]:
+            position += size
+    return position
+
+
+def _common_suffix(a: str, b: str, limit: int) -> int:
+    length = 0
+    for size in _STEPS:
+        while length + size <= limit and (
+            a[len(a) - length - size:len(a) - length] == b[len(b) - length - size:len(b) - length]
+        ):
+            length += size
+    return length
+
+
+def diff_texts(base_text: str, current_text: str) -> CatalogDiff:
+    """
+    Diff two catalog texts. Entries in the common prefix and suffix of
+    Xcode-formatted texts are identical by construction and never split or
+    hashed, so a small change costs little more than comparing the texts.
+    """
+    if base_text == current_text:
+        return CatalogDiff({}, {})
+    base_span = xcstrings.strings_span(base_text)
+    current_span = xcstrings.strings_span(current_text)
+    if base_span is not None and current_span is not None:
+        limit = min(len(base_text), len(current_text))
+        prefix = _common_prefix(base_text, current_text, limit)
+        suffix = _common_suffix(base_text, current_text, limit - prefix)
+        # Start both ranges at the last entry that begins inside the shared prefix
+        # and end them at the first entry that begins inside the shared suffix.
+        start = base_text.rfind(xcstrings.ENTRY_MARKER, 0, prefix)
+        current_end = current_text.find(xcstrings.ENTRY_MARKER, len(current_text) - suffix)
+        base_range = (
+            max(start, base_span[0]),
+            base_span[1] if current_end < 0 else current_end - len(current_text) + len(base_text),
+        )
+        current_range = (
+            max(start, current_span[0]),
+            current_span[1] if current_end < 0 else current_end,
+        )
+        base = xcstrings.split_entries(base_text, base_range[0], min(base_range[1], base_span[1]))
+        current = xcstrings.split_entries(
+            current_text, current_range[0], min(current_range[1], current_span[1])
+        )
+        if base is not None and current is not None:
+            return CatalogDiff(base, current)
+    return CatalogDiff(xcstrings.entry_blocks(base_text), xcstrings.entry_blocks(current_text))
+
+
+def show_file(repo_root: Path, rev: str, path: Path) -> str | None:
+    """
+    Content of path at rev, or None when the file does not exist there.
+    Raises ValueError for an unknown revision.
+    """
+    verify = proc.run(
+        ["git", "rev-parse", "--verify", "--quiet", f"{rev}^{{commit}}"],
+        label="git rev-parse",
+        cwd=repo_root,
+        capture_output=True,
+    )
+    if verify.returncode != 0:
+        raise ValueError(f"unknown revision: {rev}")
+    relative = path.resolve().relative_to(repo_root.resolve()).as_posix()
+    result = proc.run(
+        ["git", "show", f"{rev}:./{relative}"],
+        label="git show",
+        cwd=repo_root,
+        capture_output=True,
+    )
+    if result.returncode != 0:
+        return None
+    return result.stdout.decode("utf-8")
+
+
+def diff_since(repo_root: Path | str, rev: str, path: Path | str) -> CatalogDiff:
+    """Diff the working-tree catalog at path against its content at rev."""
+    repo_root, path = Path(repo_root), Path(path)
+    base_text = show_file(repo_root, rev, path)
+    with path.open("r", encoding="utf-8") as f:
+        current_text = f.read()
+    if base_text is None:
+        return CatalogDiff({}, xcstrings.entry_blocks(current_text))
+    return diff_texts(base_text, current_text)
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Translation coverage of the string catalog over its git history, behind
+`translate.py history`.
+
+One `git log` lists the commits that changed the catalog together with the
+blob each one left behind, and a single `git cat-file --batch` process
+streams the blob contents. Coverage only depends on the blob, so results are
+cached by blob SHA in .build/misc/catalog-history.json and a rerun only
+reads blobs it has not seen. A new blob is measured as a delta against the
+blob before it (catalog_git.diff_texts), parsing just the entries that
+changed instead of the whole catalog.
+"""
+
+from __future__ import annotations
+
+import subprocess
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+import catalog_git
+import json_cache
+import proc
+import xcstrings
+
+CACHE_VERSION = 2
+
+
+class Commit:
+    __slots__ = ("sha", "timestamp", "subject", "blob")
+
+    def __init__(self, sha: str, timestamp: int, subject: str, blob: str | None):
+        self.sha = sha
+        self.timestamp = timestamp
+        self.subject = subject
+        # None when the commit deleted the catalog.
+        self.blob = blob
+
+    @property
+    def date(self) -> str:
+        return datetime.fromtimestamp(self.timestamp, timezone.utc).isoformat(timespec="seconds")
+
+
+class Coverage:
+    """Key counts of one catalog blob; missing counts derive from translatable."""
+
+    __slots__ = ("keys", "translatable", "translated", "error")
+
+    def __init__(
+        self,
+        keys: int = 0,
+        translatable: int = 0,
+        translated: dict[str, int] | None = None,
+        error: str | None = None,
+    ):
+        self.keys = keys
+        self.translatable = translatable
+        self.translated = translated if translated is not None else {}
+        self.error = error
+
+    def missing(self, language: str) -> int:
+        return self.translatable - self.translated.get(language, 0)
+
+    def add(self, entry: xcstrings.Entry | object, sign: int = 1) -> None:
+        self.keys += sign
+        if not isinstance(entry, xcstrings.Entry) or not entry.translatable:
+            return
+        self.translatable += sign
+        for language, localization in (entry.localizations or {}).items():
+            if isinstance(localization, xcstrings.Localization) and localization.is_translated:
+                count = self.translated.get(language, 0) + sign
+                if count:
+                    self.translated[language] = count
+                else:
+                    del self.translated[language]
+
+    def copy(self) -> Coverage:
+        return Coverage(self.keys, self.translatable, dict(self.translated), self.error)
+
+    def to_json(self) -> dict:
+        if self.error is not None:
+            return {"error": self.error}
+        return {"keys": self.keys, "translatable": self.translatable, "translated": self.translated}
+
+    @classmethod
+    def from_json(cls, data: dict) -> Coverage:
+        if "error" in data:
+            return cls(error=data["error"])
+        return cls(data["keys"], data["translatable"], dict(data["translated"]))
+
+
+def cache_path() -> Path:
+    return json_cache.cache_path("catalog-history.json")
+
+
+def _load_cache(path: Path) -> dict[str, Coverage]:
+    blobs = json_cache.load(path, {"version": CACHE_VERSION}, ("blobs",)).get("blobs", {})
+    try:
+        return {blob: Coverage.from_json(item) for blob, item in blobs.items()}
+    except (KeyError, TypeError):
+        return {}
+
+
+def _save_cache(path: Path, blobs: dict[str, Coverage]) -> None:
+    json_cache.save(
+        path, {"version": CACHE_VERSION, "blobs": {blob: item.to_json() for blob, item in blobs.items()}}
+    )
+
+
+def measure(text: str) -> Coverage:
+    coverage = Coverage()
+    try:
+        catalog = xcstrings.loads(text)
+    except ValueError as exc:
+        return Coverage(error=str(exc) or type(exc).__name__)
+    for entry in catalog.strings.values():
+        coverage.add(entry)
+    return coverage
+
+
+def _frame(text: str) -> tuple[str, str] | None:
+    """The text around the entries of the strings map, or None if it cannot be found."""
+    span = xcstrings.strings_span(text)
+    if span is None:
+        return None
+    return text[: span[0]], text[span[1]:]
+
+
+def measure_delta(previous: Coverage, previous_text: str, text: str) -> Coverage:
+    """
+    Coverage of text from that of previous_text, parsing only the entries
+    that differ. Only entries are compared, so anything else that changed
+    (junk before the top-level object, a new sourceLanguage) means a full
+    measure.
+    """
+    frame = _frame(text)
+    if frame is None or frame != _frame(previous_text):
+        return measure(text)
+    try:
+        diff = catalog_git.diff_texts(previous_text, text)
+        coverage = previous.copy()
+        for key in diff.removed:
+            coverage.add(xcstrings.parse_entry(diff.base_blocks[key]), -1)
+        for key in diff.modified:
+            coverage.add(xcstrings.parse_entry(diff.base_blocks[key]), -1)
+            coverage.add(xcstrings.parse_entry(diff.blocks[key]))
+        for key in diff.added:
+            coverage.add(xcstrings.parse_entry(diff.blocks[key]))
+    except ValueError:
+        # Not a catalog (e.g. committed conflict markers); measure reports the error.
+        return measure(text)
+    return coverage
+
+
+def iter_commits(repo_root: Path, path: str, rev: str = "HEAD", max_count: int | None = None) -> list[Commit]:
+    """
+    Commits on the first-parent history of rev that changed path, oldest
+    first, with the blob each one left. Raises ValueError for an unknown
+    revision.
+    """
+    argv = [
+        "git",
+        "log",
+        "--first-parent",
+        "-m",
+        "--raw",
+        "--no-abbrev",
+        "--no-renames",
+        "--format=%x01%H%x00%ct%x00%s",
+    ]
+    if max_count is not None:
+        argv.append(f"--max-count={max_count}")
+    argv += [rev, "--", path]
+    result = proc.run(argv, label="git log", cwd=repo_root, capture_output=True)
+    if result.returncode != 0:
+        message = result.stderr.decode("utf-8", "replace").strip().splitlines()
+        raise ValueError(message[-1] if message else f"git log failed for {rev}")
+
+    commits = []
+    for record in result.stdout.decode("utf-8", "replace").split("\x01")[1:]:
+        header, _, raw = record.partition("\n")
+        sha, timestamp, subject = header.split("\x00", 2)
+        for line in raw.splitlines():
+            # :<old mode> <new mode> <old blob> <new blob> <status>\t<path>
+            if not line.startswith(":"):
+                continue
+            fields, _, changed_path = line.partition("\t")
+            if changed_path != path:
+                continue
+            blob = fields.split()[3]
+            # An all-zero blob id means the file was deleted.
+            commits.append(Commit(sha, int(timestamp), subject, blob if blob.strip("0") else None))
+            break
+    commits.reverse()
+    return commits
+
+
+class BlobReader:
+    """
+    Blob contents over one `git cat-file --batch` pipe. Names are written by
+    a thread while blobs are read, so git never waits for the caller.
+    """
+
+    def __init__(self, repo_root: Path):
+        self._process = proc.popen(
+            ["git", "cat-file", "--batch"],
+            label="git cat-file",
+            cwd=repo_root,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    @staticmethod
+    def _feed(stdin: IO[bytes], blobs: list[str]) -> None:
+        try:
+            for blob in blobs:
+                stdin.write(blob.encode("ascii") + b"\n")
+            stdin.close()
+        except (BrokenPipeError, ValueError):
+            pass
+
+    def read(self, blobs: Iterable[str]) -> Iterator[tuple[str, bytes | None]]:
+        """(blob, content) in order; content is None for objects git does not have."""
+        blobs = list(blobs)
+        process = self._process.process
+        feeder = threading.Thread(target=self._feed, args=(process.stdin, blobs), daemon=True)
+        feeder.start()
+        try:
+            for blob in blobs:
+                header = process.stdout.readline().split()
+                if len(header) != 3:
+                    # "<name> missing"
+                    yield blob, None
+                    continue
+                size = int(header[2])
+                content = process.stdout.read(size)
+                process.stdout.read(1)
+                yield blob, content
+        finally:
+            feeder.join()
+
+    def close(self) -> None:
+        process = self._process.process
+        if process.stdin and not process.stdin.closed:
+            process.stdin.close()
+        process.stdout.close()
+        self._process.wait()
+
+    def __enter__(self) -> BlobReader:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class History:
+    def __init__(self, commits: list[Commit], coverage: dict[str, Coverage], measured: int):
+        self.commits = commits
+        self.coverage = coverage
+        # Blobs read and measured in this run; the rest came from the cache.
+        self.measured = measured
+
+    def rows(self) -> Iterator[tuple[Commit, Coverage]]:
+        for commit in self.commits:
+            if commit.blob is not None:
+                yield commit, self.coverage[commit.blob]
+
+
+def history(
+    repo_root: Path | str,
+    path: str,
+    rev: str = "HEAD",
+    max_count: int | None = None,
+    cache: Path | None = None,
+    use_cache: bool = True,
+) -> History:
+    repo_root = Path(repo_root)
+    cache = cache or cache_path()
+    commits = iter_commits(repo_root, path, rev, max_count)
+    known = _load_cache(cache) if use_cache else {}
+    coverage = {commit.blob: known[commit.blob] for commit in commits if commit.blob in known}
+
+    # Read each new blob right after the blob before it, so the delta between
+    # consecutive blobs (usually a few entries) is all that gets parsed.
+    wanted: list[str] = []
+    pending = set()
+    previous = None
+    for commit in commits:
+        blob = commit.blob
+        if blob is not None and blob not in coverage and blob not in pending:
+            if previous is not None and (not wanted or wanted[-1] != previous):
+                wanted.append(previous)
+            wanted.append(blob)
+            pending.add(blob)
+        previous = blob
+
+    measured = 0
+    if wanted:
+        last_blob, last_text = None, None
+        with BlobReader(repo_root) as reader:
+            for blob, content in reader.read(wanted):
+                text = content.decode("utf-8", "replace") if content is not None else None
+                if blob in pending and blob not in coverage:
+                    if text is None:
+                        coverage[blob] = Coverage(error="blob missing from the repository")
+                    elif last_text is not None and coverage[last_blob].error is None:
+                        coverage[blob] = measure_delta(coverage[last_blob], last_text, text)
+                    else:
+                        coverage[blob] = measure(text)
+                    measured += 1
+                last_blob, last_text = blob, text
+        if use_cache:
+            known.update(coverage)
+            _save_cache(cache, known)
+    return History(commits, coverage, measured)
+
+
+def csv_rows(result: History, languages: list[str]) -> Iterator[list[object]]:
+    yield ["commit", "date", "keys", "translatable", "language", "translated", "missing"]
+    for commit, coverage in result.rows():
+        if coverage.error is not None:
+            continue
+        for language in languages:
+            yield [
+                commit.sha,
+                commit.date,
+                coverage.keys,
+                coverage.translatable,
+                language,
+                coverage.translated.get(language, 0),
+                coverage.missing(language),
+            ]
+
+
+def json_rows(result: History, languages: list[str]) -> list[dict]:
+    rows = []
+    for commit, coverage in result.rows():
+        row: dict[str, object] = {"commit": commit.sha, "date": commit.date, "subject": commit.subject}
+        if coverage.error is not None:
+            row["error"] = coverage.error
+        else:
+            row["keys"] = coverage.keys
+            row["translatable"] = coverage.translatable
+            row["languages"] = {
+                language: {
+                    "translated": coverage.translated.get(language, 0),
+                    "missing": coverage.missing(language),
+                }
+                for language in languages
+            }
+        rows.append(row)
+    return rows
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Format-specifier lint for Localizable.xcstrings, behind `translate.py lint`.
+
+Every translation (including each case of its variations) is tokenized with
+xcstrings.FORMAT_SPECIFIER and its arguments are compared with the English
+source. Errors are what can crash or garble the UI at runtime: an argument
+with a different type, an argument the source does not pass, or mixing
+positional (%1$@) and sequential (%@) specifiers. A translation that leaves
+out an argument is a warning; plural cases may do so freely ("One book").
+Substitutions are not checked.
+
+Issues are cached per key by the digest of the entry's text in
+.build/misc/lint-cache.json, so a rerun only lints entries that changed.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import json_cache
+import xcstrings
+
+# Bump when the rules change so cached results are discarded.
+RULES_VERSION = 3
+SOURCE_LANGUAGE = "en"
+ERROR = "error"
+WARNING = "warning"
+
+
+def cache_path() -> Path:
+    return json_cache.cache_path("lint-cache.json")
+
+
+class Issue:
+    __slots__ = ("key", "language", "case", "severity", "message")
+
+    def __init__(self, key: str, language: str, case: str | None, severity: str, message: str):
+        self.key = key
+        self.language = language
+        self.case = case
+        self.severity = severity
+        self.message = message
+
+    def location(self) -> str:
+        return f"{self.language}/{self.case}" if self.case else self.language
+
+    def __str__(self) -> str:
+        return f"{self.severity}: {self.key!r} [{self.location()}]: {self.message}"
+
+    def to_json(self) -> list:
+        return [self.language, self.case, self.severity, self.message]
+
+
+def arguments(text: str) -> tuple[dict[int, str], str | None]:
+    """
+    Map argument numbers to specifier types ("@", "lld", ...) in one scan.
+    Flags, width and precision are ignored ("%.1f" takes an "f"); a "*"
+    width or precision takes an int argument of its own. Returns
+    (arguments, error); error describes a malformed combination.
+    """
+    args: dict[int, str] = {}
+    positional = sequential = False
+    index = 0
+    for match in xcstrings.FORMAT_SPECIFIER.finditer(text):
+        kind = match["type"]
+        if kind == "%":
+            continue
+        uses = [(None, "d") for part in (match["width"], match["precision"]) if part == "*"]
+        uses.append((match["position"], kind))
+        for position, use_kind in uses:
+            if position is not None:
+                positional = True
+                number = int(position)
+            else:
+                sequential = True
+                index += 1
+                number = index
+            previous = args.get(number)
+            if previous is not None and previous != use_kind:
+                return args, f"argument {number} used as both %{previous} and %{use_kind}"
+            args[number] = use_kind
+    if positional and sequential:
+        return args, "mixes positional (%1$@) and sequential (%@) specifiers"
+    return args, None
+
+
+def _describe(number: int, kind: str) -> str:
+    return f"%{number}${kind}"
+
+
+def compare(
+    source: dict[int, str], text: str, allow_missing: bool = False
+) -> list[tuple[str, str]]:
+    """(severity, message) problems of text's specifiers relative to the source arguments."""
+    args, error = arguments(text)
+    problems = [(ERROR, error)] if error else []
+    for number, kind in sorted(args.items()):
+        expected = source.get(number)
+        if expected is None:
+            problems.append((ERROR, f"extra argument {_describe(number, kind)} not in source"))
+        elif expected != kind:
+            problems.append((ERROR, f"argument {number} is %{kind}, source has %{expected}"))
+    if not allow_missing:
+        for number, kind in sorted(source.items()):
+            if number not in args:
+                problems.append((WARNING, f"missing argument {_describe(number, kind)}"))
+    return problems
+
+
+def _variation_values(variations: dict, prefix: str = ""):
+    """Yield (case path, selector, Localization) for every case of variations, recursively."""
+    for selector, cases in variations.items():
+        if not isinstance(cases, dict):
+            continue
+        for case, localization in cases.items():
+            if not isinstance(localization, xcstrings.Localization):
+                continue
+            path = f"{prefix}{selector}.{case}"
+            yield path, selector, localization
+            nested = localization.variations
+            if isinstance(nested, dict):
+                yield from _variation_values(nested, path + ".")
+
+
+def _texts(localization: xcstrings.Localization):
+    """(case path or None, value, is plural case) for a localization and its variations."""
+    if localization.has_unit:
+        yield None, localization.value, False
+    variations = localization.variations
+    if isinstance(variations, dict):
+        for path, selector, case in _variation_values(variations):
+            if case.has_unit:
+                yield path, case.value, selector == "plural"
+
+
+def source_arguments(key: str, entry: xcstrings.Entry) -> dict[int, str]:
+    """Arguments of the English text; for variations, the union over all cases."""
+    localization = entry.localization(SOURCE_LANGUAGE)
+    if localization is None:
+        return arguments(key)[0]
+    merged: dict[int, str] = {}
+    for _, value, _ in _texts(localization):
+        merged.update(arguments(value)[0])
+    if not merged and not localization.has_unit and localization.variations is None:
+        return arguments(key)[0]
+    return merged
+
+
+def lint_entry(key: str, entry: xcstrings.Entry) -> list[Issue]:
+    if not entry.translatable or not entry.localizations:
+        return []
+    source = source_arguments(key, entry)
+    issues = []
+    for language, localization in entry.localizations.items():
+        if not isinstance(localization, xcstrings.Localization):
+            continue
+        for case, value, plural in _texts(localization):
+            if language == SOURCE_LANGUAGE:
+                # The source only has to be well formed.
+                error = arguments(value)[1]
+                problems = [(ERROR, error)] if error else []
+            else:
+                problems = compare(source, value, allow_missing=plural)
+            issues.extend(
+                Issue(key, language, case, severity, message) for severity, message in problems
+            )
+    return issues
+
+
+def lint_catalog(catalog: xcstrings.Catalog) -> list[Issue]:
+    issues = []
+    for key, entry in catalog.strings.items():
+        if isinstance(entry, xcstrings.Entry):
+            issues.extend(lint_entry(key, entry))
+    return issues
+
+
+class LintResult:
+    def __init__(self):
+        self.issues: list[Issue] = []
+        self.linted = 0
+        self.cached = 0
+
+
+def _issues_from_cache(key: str, items: list) -> list[Issue]:
+    return [
+        Issue(key, language, case, severity, message)
+        for language, case, severity, message in items
+    ]
+
+
+def lint_file(catalog_path: Path | str, cache: Path | None = None) -> LintResult:
+    """Lint the whole catalog, re-linting only entries whose text changed since the last run."""
+    cache = cache or cache_path()
+    with open(catalog_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    catalog_digest = xcstrings.block_digest(text)
+    cached = json_cache.load(cache, {"rules": RULES_VERSION}, ("entries",))
+    cached_entries = cached.get("entries", {})
+    result = LintResult()
+
+    if cached.get("catalog_digest") == catalog_digest:
+        for key, item in cached_entries.items():
+            result.issues.extend(_issues_from_cache(key, item["issues"]))
+        result.cached = len(cached_entries)
+        return result
+
+    entries = {}
+    for key, block in xcstrings.entry_blocks(text).items():
+        digest = xcstrings.block_digest(block)
+        item = cached_entries.get(key)
+        if item is not None and item.get("digest") == digest:
+            issues = _issues_from_cache(key, item["issues"])
+            result.cached += 1
+        else:
+            entry = xcstrings.parse_entry(block)
+            issues = lint_entry(key, entry) if isinstance(entry, xcstrings.Entry) else []
+            result.linted += 1
+        result.issues.extend(issues)
+        entries[key] = {"digest": digest, "issues": [issue.to_json() for issue in issues]}
+
+    json_cache.save(
+        cache,
+        {"rules": RULES_VERSION, "catalog_digest": catalog_digest, "entries": entries},
+    )
+    return result
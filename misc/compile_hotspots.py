@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Find slow Swift type-checking from -debug-time-function-bodies and
+-debug-time-expression-type-checking output, and compare against a baseline.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Iterable
+
+FUNCTION_KIND = "function"
+EXPRESSION_KIND = "expression"
+DEFAULT_THRESHOLD_MS = 100.0
+# Frontend timing lines: "<ms>ms\t<file>:<line>:<col>[\t<description>]"
+TIMING_LINE = re.compile(
+    r"^\s*(?P<ms>\d+(?:\.\d+)?)ms\t(?P<file>[^\t]+?\.swift):(?P<line>\d+):(?P<col>\d+)(?:\t(?P<desc>.*?))?\s*$"
+)
+FRONTEND_FLAGS = (
+    "-Xfrontend",
+    "-debug-time-function-bodies",
+    "-Xfrontend",
+    "-debug-time-expression-type-checking",
+)
+
+
+def get_project_root() -> Path:
+    return Path(__file__).resolve().parent.parent
+
+
+def default_baseline_path() -> Path:
+    return get_project_root() / ".build" / "misc" / "compile-hotspots-baseline.json"
+
+
+class Hotspot:
+    __slots__ = ("file", "line", "column", "kind", "description", "ms", "function")
+
+    def __init__(
+        self,
+        file: str,
+        line: int,
+        column: int,
+        kind: str,
+        description: str,
+        ms: float,
+    ):
+        self.file = file
+        self.line = line
+        self.column = column
+        self.kind = kind
+        self.description = description
+        self.ms = ms
+        # Enclosing function for expressions, filled in by parse_timings.
+        self.function = description if kind == FUNCTION_KIND else ""
+
+    @property
+    def key(self) -> str:
+        """
+        Stable identity used for baselines.
+
+        Line numbers move with every edit, so functions are identified by
+        file and signature, and expressions by their enclosing function.
+        """
+        if self.kind == FUNCTION_KIND:
+            return f"{self.file}|{self.kind}|{self.description}"
+        scope = self.function or f"line {self.line}"
+        return f"{self.file}|{self.kind}|{scope}"
+
+    def location(self) -> str:
+        return f"{self.file}:{self.line}:{self.column}"
+
+
+def _relative(path: str, root: Path | None) -> str | None:
+    if root is None:
+        return path
+    try:
+        return Path(path).resolve().relative_to(root).as_posix()
+    except (ValueError, OSError):
+        return None
+
+
+def parse_timings(
+    lines: Iterable[str],
+    project_root: Path | None = None,
+    exclude: tuple[str, ...] = ("SourcePackages/", "DerivedData/"),
+) -> list[Hotspot]:
+    """
+    Parse frontend timing lines into hotspots.
+
+    When project_root is given, files outside it (for example SwiftPM
+    checkouts) are skipped and paths are reported relative to it. The same
+    location may be reported several times (one per architecture or
+    compile); the slowest measurement wins.
+    """
+    best: dict[tuple, Hotspot] = {}
+    root = project_root.resolve() if project_root else None
+
+    for raw_line in lines:
+        match = TIMING_LINE.match(raw_line)
+        if not match:
+            continue
+        file = _relative(match["file"], root)
+        if file is None or any(part in file for part in exclude):
+            continue
+
+        description = (match["desc"] or "").strip()
+        kind = FUNCTION_KIND if description else EXPRESSION_KIND
+        hotspot = Hotspot(
+            file,
+            int(match["line"]),
+            int(match["col"]),
+            kind,
+            description,
+            float(match["ms"]),
+        )
+        location = (file, hotspot.line, hotspot.column, kind, description)
+        existing = best.get(location)
+        if existing is None or hotspot.ms > existing.ms:
+            best[location] = hotspot
+
+    hotspots = list(best.values())
+    _attach_enclosing_functions(hotspots)
+    return hotspots
+
+
+def _attach_enclosing_functions(hotspots: list[Hotspot]) -> None:
+    functions_by_file: dict[str, list[Hotspot]] = {}
+    for hotspot in hotspots:
+        if hotspot.kind == FUNCTION_KIND:
+            functions_by_file.setdefault(hotspot.file, []).append(hotspot)
+    for functions in functions_by_file.values():
+        functions.sort(key=lambda h: (h.line, h.column))
+
+    for hotspot in hotspots:
+        if hotspot.kind != EXPRESSION_KIND:
+            continue
+        enclosing = None
+        for function in functions_by_file.get(hotspot.file, []):
+            if (function.line, function.column) > (hotspot.line, hotspot.column):
+                break
+            enclosing = function
+        if enclosing is not None:
+            hotspot.function = enclosing.description
+
+
+def rank(hotspots: list[Hotspot], threshold_ms: float = 0.0) -> list[Hotspot]:
+    return sorted(
+        (hotspot for hotspot in hotspots if hotspot.ms >= threshold_ms),
+        key=lambda h: (-h.ms, h.file, h.line),
+    )
+
+
+def file_totals(hotspots: list[Hotspot]) -> list[tuple[str, float]]:
+    """Total function-body type-checking time per file (expressions are nested in functions)."""
+    totals: dict[str, float] = {}
+    for hotspot in hotspots:
+        if hotspot.kind == FUNCTION_KIND:
+            totals[hotspot.file] = totals.get(hotspot.file, 0.0) + hotspot.ms
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+def format_table(hotspots: list[Hotspot], top: int = 30) -> list[str]:
+    rows = hotspots[:top]
+    if not rows:
+        return ["No type-checking hotspots found."]
+    location_width = max(len("Location"), *(len(h.location()) for h in rows))
+    lines = [f"{'ms':>9}  {'Kind':<10}  {'Location':<{location_width}}  Function"]
+    for hotspot in rows:
+        lines.append(
+            f"{hotspot.ms:>9.1f}  {hotspot.kind:<10}  {hotspot.location():<{location_width}}  {hotspot.function or '-'}"
+        )
+    return lines
+
+
+def load_baseline(path: Path) -> dict | None:
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if not isinstance(baseline, dict) or not isinstance(baseline.get("hotspots"), dict):
+        return None
+    return baseline
+
+
+def save_baseline(path: Path, hotspots: list[Hotspot], threshold_ms: float) -> None:
+    entries: dict[str, float] = {}
+    for hotspot in rank(hotspots, threshold_ms):
+        entries[hotspot.key] = max(entries.get(hotspot.key, 0.0), round(hotspot.ms, 1))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as f:
+        json.dump(
+            {"threshold_ms": threshold_ms, "hotspots": dict(sorted(entries.items()))},
+            f,
+            indent=2,
+        )
+        f.write("\n")
+
+
+def new_hotspots(hotspots: list[Hotspot], baseline: dict, threshold_ms: float) -> list[Hotspot]:
+    """Hotspots over the threshold whose key is not recorded in the baseline."""
+    known = baseline.get("hotspots", {})
+    return [hotspot for hotspot in rank(hotspots, threshold_ms) if hotspot.key not in known]
+
+
+def analyze(
+    lines: Iterable[str],
+    project_root: Path | None,
+    baseline_path: Path,
+    threshold_ms: float = DEFAULT_THRESHOLD_MS,
+    top: int = 30,
+    update_baseline: bool = False,
+) -> int:
+    """Print the ranked report and return a process exit code."""
+    hotspots = parse_timings(lines, project_root)
+    ranked = rank(hotspots)
+
+    print(f"Slowest type-checked functions and expressions (top {top}):")
+    for line in format_table(ranked, top):
+        print(f"  {line}")
+    print("")
+
+    totals = file_totals(hotspots)[:10]
+    if totals:
+        print("Function-body type-checking time by file:")
+        width = max(len(name) for name, _ in totals)
+        for name, total in totals:
+            print(f"  {name:<{width}}  {total:>9.1f}ms")
+        print("")
+
+    if update_baseline:
+        save_baseline(baseline_path, hotspots, threshold_ms)
+        print(f"Baseline updated: {baseline_path}")
+        return 0
+
+    baseline = load_baseline(baseline_path)
+    if baseline is None:
+        print(
+            f"No baseline at {baseline_path}; run with --update-baseline to record one."
+        )
+        return 0
+
+    regressions = new_hotspots(hotspots, baseline, threshold_ms)
+    if regressions:
+        print(f"New type-checking hotspots over {threshold_ms:.0f}ms:")
+        for line in format_table(regressions, len(regressions)):
+            print(f"  {line}")
+        return 1
+
+    print(f"No new type-checking hotspots over {threshold_ms:.0f}ms.")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Rank Swift type-checking hotspots from a captured build log"
+    )
+    parser.add_argument("log", help="Build log with -debug-time-* frontend output")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_MS)
+    parser.add_argument("--top", type=int, default=30)
+    parser.add_argument("--baseline", default=str(default_baseline_path()))
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument(
+        "--project-root",
+        default=str(get_project_root()),
+        help="Only report files under this directory ('' to report all files)",
+    )
+    args = parser.parse_args()
+
+    project_root = Path(args.project_root) if args.project_root else None
+    with open(args.log, "r", encoding="utf-8", errors="replace") as f:
+        return analyze(
+            f,
+            project_root,
+            Path(args.baseline),
+            threshold_ms=args.threshold,
+            top=args.top,
+            update_baseline=args.update_baseline,
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
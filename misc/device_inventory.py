@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Shared simulator and physical device inventory for the misc/ tools.
+Queries simctl and devicectl concurrently and caches the parsed result for a short time.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import proc
+
+CACHE_TTL_SECONDS = 60
+SIMULATOR_RUNTIME_PREFIXES = {
+    "ios": "com.apple.CoreSimulator.SimRuntime.iOS",
+    "tvos": "com.apple.CoreSimulator.SimRuntime.tvOS",
+}
+XCTRACE_PLATFORM_NAMES = {
+    "ios": "iPhone",
+    "tvos": "Apple TV",
+}
+
+
+class QueryError(Exception):
+    pass
+
+
+def eprint(message: str) -> None:
+    print(message, file=sys.stderr)
+
+
+def get_project_root() -> Path:
+    return Path(__file__).resolve().parent.parent
+
+
+def cache_path() -> Path:
+    return get_project_root() / ".build" / "misc" / "device-inventory.json"
+
+
+def query_simulators() -> list[dict]:
+    """Return every available simulator as {name, udid, state, runtime}."""
+    try:
+        result = proc.run(
+            ["xcrun", "simctl", "list", "devices", "--json"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        data = json.loads(result.stdout)
+    except (OSError, subprocess.CalledProcessError, json.JSONDecodeError) as exc:
+        raise QueryError(f"could not list simulators: {exc}") from exc
+
+    simulators = []
+    for runtime, devices in (data.get("devices") or {}).items():
+        for device in devices:
+            if not device.get("isAvailable", False):
+                continue
+            if not device.get("udid") or not device.get("name"):
+                continue
+            simulators.append(
+                {
+                    "name": device["name"],
+                    "udid": device["udid"],
+                    "state": device.get("state", ""),
+                    "runtime": runtime,
+                }
+            )
+    return simulators
+
+
+def _query_devicectl() -> list[dict]:
+    # Prefer CoreDevice JSON output, which is stable for scripting and works
+    # regardless of the user-assigned device name.
+    json_output_path: str | None = None
+    try:
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
+            json_output_path = tmp.name
+
+        proc.run(
+            ["xcrun", "devicectl", "list", "devices", "--json-output", json_output_path],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        with open(json_output_path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    finally:
+        if json_output_path and os.path.exists(json_output_path):
+            try:
+                os.remove(json_output_path)
+            except OSError:
+                pass
+
+    devices = []
+    for item in payload.get("result", {}).get("devices", []):
+        hardware = item.get("hardwareProperties", {})
+        if hardware.get("reality") != "physical":
+            continue
+
+        udid = hardware.get("udid")
+        if not udid:
+            continue
+
+        device_props = item.get("deviceProperties", {})
+        connection_props = item.get("connectionProperties", {})
+        devices.append(
+            {
+                "name": device_props.get("name")
+                or hardware.get("marketingName")
+                or "Unknown Device",
+                "udid": udid,
+                "state": connection_props.get("tunnelState")
+                or connection_props.get("pairingState")
+                or "",
+                "platform": str(hardware.get("platform", "")).lower(),
+            }
+        )
+    return devices
+
+
+def _query_xctrace() -> list[dict]:
+    result = proc.run(
+        ["xcrun", "xctrace", "list", "devices"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    devices = []
+    for line in result.stdout.split("\n"):
+        line = line.strip()
+        if "Simulator" in line or "(" not in line or ")" not in line:
+            continue
+
+        platform = next(
+            (key for key, name in XCTRACE_PLATFORM_NAMES.items() if name in line), None
+        )
+        if platform is None:
+            continue
+
+        name_part, _, udid_part = line.rpartition("(")
+        name_part = name_part.strip()
+        udid = udid_part.rstrip(")").strip()
+        name = name_part.rsplit("(", 1)[0].strip() if "(" in name_part else name_part
+        devices.append({"name": name, "udid": udid, "state": "", "platform": platform})
+    return devices
+
+
+def query_physical_devices() -> list[dict]:
+    """Return connected physical devices as {name, udid, state, platform}."""
+    try:
+        return _query_devicectl()
+    except (OSError, subprocess.CalledProcessError, json.JSONDecodeError) as exc:
+        eprint(f"Warning: could not list physical devices via devicectl: {exc}")
+
+    # Fallback for older toolchains where devicectl is unavailable.
+    try:
+        return _query_xctrace()
+    except (OSError, subprocess.CalledProcessError) as exc:
+        raise QueryError(f"could not list physical devices: {exc}") from exc
+
+
+def _read_cache(max_age: float) -> dict | None:
+    path = cache_path()
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            inventory = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if not isinstance(inventory, dict):
+        return None
+    created_at = inventory.get("created_at")
+    if not isinstance(created_at, (int, float)) or time.time() - created_at > max_age:
+        return None
+    return inventory
+
+
+def _write_cache(inventory: dict) -> None:
+    path = cache_path()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(inventory, f, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        eprint(f"Warning: could not write device inventory cache: {exc}")
+
+
+def invalidate() -> None:
+    try:
+        cache_path().unlink()
+    except OSError:
+        pass
+
+
+def load_inventory(refresh: bool = False, max_age: float = CACHE_TTL_SECONDS) -> dict:
+    """
+    Return {"created_at", "simulators", "physical_devices"}.
+
+    A cached inventory younger than max_age is reused unless refresh is set.
+    Failed queries yield empty lists and are never cached.
+    """
+    if not refresh:
+        cached = _read_cache(max_age)
+        if cached is not None:
+            return cached
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        simulators_future = pool.submit(query_simulators)
+        devices_future = pool.submit(query_physical_devices)
+
+    complete = True
+    inventory: dict = {"created_at": time.time()}
+    for field, future in (
+        ("simulators", simulators_future),
+        ("physical_devices", devices_future),
+    ):
+        try:
+            inventory[field] = future.result()
+        except QueryError as exc:
+            eprint(f"Warning: {exc}")
+            inventory[field] = []
+            complete = False
+
+    if complete:
+        _write_cache(inventory)
+    return inventory
+
+
+def simulators(platform: str, refresh: bool = False) -> list[dict]:
+    runtime_prefix = SIMULATOR_RUNTIME_PREFIXES.get(platform.lower())
+    if runtime_prefix is None:
+        return []
+    return [
+        device
+        for device in load_inventory(refresh=refresh)["simulators"]
+        if device["runtime"].startswith(runtime_prefix)
+    ]
+
+
+def physical_devices(platform: str, refresh: bool = False) -> list[dict]:
+    return [
+        device
+        for device in load_inventory(refresh=refresh)["physical_devices"]
+        if device["platform"] == platform.lower()
+    ]
+
+
+def find_simulator(platform: str, udid: str) -> dict | None:
+    """Look up a simulator, refreshing the cache once when the UDID is unknown."""
+    for refresh in (False, True):
+        for device in simulators(platform, refresh=refresh):
+            if device["udid"] == udid:
+                return device
+    return None
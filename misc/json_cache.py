@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Versioned JSON caches in .build/misc shared by the misc/ tools.
+
+A cache is a JSON object whose header fields (a format version, rule or
+parameter versions) must match exactly for it to be reused; anything
+unreadable or mismatched loads as {} and is rebuilt. Writes are atomic and
+best effort: a cache that cannot be written is simply not kept.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+
+
+def get_project_root() -> Path:
+    return Path(__file__).resolve().parent.parent
+
+
+def cache_path(name: str) -> Path:
+    return get_project_root() / ".build" / "misc" / name
+
+
+def load(path: Path, header: dict[str, object], mappings: tuple[str, ...] = ()) -> dict:
+    """
+    The cached object, or {} unless every header field matches and every
+    field named in mappings holds an object.
+    """
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, UnicodeDecodeError, json.JSONDecodeError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    if any(data.get(field) != value for field, value in header.items()):
+        return {}
+    if any(not isinstance(data.get(field), dict) for field in mappings):
+        return {}
+    return data
+
+
+def save(path: Path, data: dict) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+JSON codec used by the catalog tools: orjson when it is importable, the
+standard library otherwise. KMREADER_JSON_CODEC=stdlib|orjson forces one.
+
+Xcode writes catalogs like json.dumps(indent=2, ensure_ascii=False,
+separators=(",", " : ")), but with indent the standard library falls back to
+its pure-Python encoder. dumps_xcode() instead starts from a C encoder:
+orjson's own 2-space indent only needs its ": " separators widened, and for
+the standard library pretty() rebuilds the layout from compact JSON.
+
+With KMREADER_JSON_VERIFY=1 (or verify=True) every dumps_xcode() result is
+compared with the standard library's output and a mismatch raises
+CodecMismatch.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import sys
+from pathlib import Path
+
+CODEC_ENV = "KMREADER_JSON_CODEC"
+VERIFY_ENV = "KMREADER_JSON_VERIFY"
+INDENT = "  "
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Strings of compact JSON (unrolled so the regex engine never backtracks).
+_STRING = re.compile(r'("[^"\\]*(?:\\.[^"\\]*)*")')
+# Keys at the start of a line of orjson's indented output.
+_INDENTED_KEY = re.compile(r'^( *"[^"\\\n]*(?:\\.[^"\\\n]*)*"): ', re.M)
+# '": ' that may not end a key: after an escaped quote, or an opening quote
+# (preceded by indentation, a separator's space or nothing at all).
+_AMBIGUOUS_SEPARATOR = re.compile(r'": (?<![^ \n\\]": )')
+
+
+class CodecMismatch(AssertionError):
+    """A fast path produced different bytes than the standard library."""
+
+
+def _select_backend() -> str:
+    requested = os.environ.get(CODEC_ENV, "").strip().lower()
+    if requested == "stdlib" or (requested == "orjson" and orjson is None):
+        return "stdlib"
+    return "orjson" if orjson is not None else "stdlib"
+
+
+BACKEND = _select_backend()
+VERIFY = os.environ.get(VERIFY_ENV, "") not in ("", "0")
+
+
+def loads(text: str | bytes) -> object:
+    if BACKEND == "orjson":
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def load(path: Path | str) -> object:
+    with open(path, "rb") as f:
+        data = f.read()
+    if BACKEND == "orjson":
+        return orjson.loads(data)
+    return json.loads(data.decode("utf-8"))
+
+
+def reference_dumps(value: object) -> str:
+    """The standard library's Xcode-formatted output, the definition of correct."""
+    return json.dumps(value, indent=2, ensure_ascii=False, separators=(",", " : "))
+
+
+def _layout(segment: str, depth: int) -> tuple[str, int]:
+    """Re-indent a run of structural characters between two strings."""
+    out = []
+    index = 0
+    length = len(segment)
+    while index < length:
+        char = segment[index]
+        if char == "{" or char == "[":
+            following = segment[index + 1:index + 2]
+            if following == ("}" if char == "{" else "]"):
+                out.append(char + following)
+                index += 2
+                continue
+            depth += 1
+            out.append(char + "\n" + INDENT * depth)
+        elif char == "}" or char == "]":
+            depth -= 1
+            out.append("\n" + INDENT * depth + char)
+        elif char == ",":
+            out.append(",\n" + INDENT * depth)
+        elif char == ":":
+            out.append(" : ")
+        else:
+            out.append(char)
+        index += 1
+    return "".join(out), depth
+
+
+def pretty(compact: str) -> str:
+    """Xcode's layout for compact JSON (no whitespace outside strings)."""
+    parts = _STRING.split(compact)
+    # The same few structural runs ("{", ":", ",", "}},") repeat at a handful of depths.
+    layouts: dict[tuple[str, int], tuple[str, int]] = {}
+    depth = 0
+    for index in range(0, len(parts), 2):
+        segment = parts[index]
+        if not segment:
+            continue
+        key = (segment, depth)
+        layout = layouts.get(key)
+        if layout is None:
+            layout = layouts[key] = _layout(segment, depth)
+        parts[index], depth = layout
+    return "".join(parts)
+
+
+def dumps_compact(value: object) -> str:
+    if BACKEND == "orjson":
+        return orjson.dumps(value).decode("utf-8")
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _widen_separators(text: str) -> str:
+    """Turn orjson's '": ' key separators into Xcode's '" : '."""
+    # JSON strings never contain a raw newline, so only the lines holding an
+    # ambiguous '": ' need the exact regex; everything else is a plain replace.
+    out = []
+    start = 0
+    for match in _AMBIGUOUS_SEPARATOR.finditer(text):
+        if match.start() < start:
+            continue
+        line_start = text.rfind("\n", 0, match.start()) + 1
+        line_end = text.find("\n", match.end())
+        if line_end < 0:
+            line_end = len(text)
+        out.append(text[start:line_start].replace('": ', '" : '))
+        out.append(_INDENTED_KEY.sub(r"\1 : ", text[line_start:line_end]))
+        start = line_end
+    out.append(text[start:].replace('": ', '" : '))
+    return "".join(out)
+
+
+def contains_float(value: object) -> bool:
+    kind = type(value)
+    if kind is dict:
+        return any(contains_float(item) for item in value.values())
+    if kind is list or kind is tuple:
+        return any(contains_float(item) for item in value)
+    return isinstance(value, float)
+
+
+def dumps_xcode(value: object, verify: bool | None = None, floats: bool = True) -> str:
+    """
+    json.dumps(indent=2, ensure_ascii=False, separators=(",", " : ")), faster.
+
+    orjson writes floats differently (1e16, NaN as null), so values holding
+    floats are encoded by the standard library; floats=False skips looking
+    for them when the caller already knows there are none.
+    """
+    text = None
+    if BACKEND == "orjson" and not (floats and contains_float(value)):
+        try:
+            text = _widen_separators(orjson.dumps(value, option=orjson.OPT_INDENT_2).decode("utf-8"))
+        except orjson.JSONEncodeError:
+            # Integers beyond 64 bits, non-string keys, ...
+            text = None
+    if text is None:
+        text = pretty(json.dumps(value, ensure_ascii=False, separators=(",", ":")))
+    if verify if verify is not None else VERIFY:
+        check_identical(text, reference_dumps(value))
+    return text
+
+
+def check_identical(text: str, expected: str, source: str | None = None) -> None:
+    if text == expected:
+        return
+    offset = next(
+        (index for index, (a, b) in enumerate(zip(text, expected)) if a != b),
+        min(len(text), len(expected)),
+    )
+    line = expected.count("\n", 0, offset) + 1
+    raise CodecMismatch(
+        f"{source or BACKEND} output differs from the standard library at line {line}: "
+        f"{text[offset:offset + 40]!r} != {expected[offset:offset + 40]!r}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Check that the fast codec reproduces catalogs byte for byte"
+    )
+    parser.add_argument("paths", nargs="+", type=Path, help="JSON files written in Xcode formatting")
+    args = parser.parse_args()
+    failed = False
+    for path in args.paths:
+        text = path.read_text(encoding="utf-8")
+        value = json.loads(text)
+        try:
+            output = dumps_xcode(value, verify=True)
+            # Files written by Xcode may end with a newline.
+            check_identical(output, text[:-1] if text.endswith("\n") and not output.endswith("\n") else text)
+        except CodecMismatch as exc:
+            print(f"{path}: {exc}", file=sys.stderr)
+            failed = True
+        else:
+            print(f"{path}: identical ({BACKEND})")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,11 +4,16 @@ from __future__ import annotations
 
 import json
 import os
-import subprocess
 import sys
 from pathlib import Path
 
-from localize_sort import sort_entries, sort_keys
+import build_cache
+import device_inventory
+import json_codec
+import proc
+import xcstrings
+from localize_sort import sort_entries
+from xcstrings import sort_localizations
 
 REQUIRED_PLATFORMS = ("ios", "macos", "tvos")
 DEFAULT_BUILD_DESTINATIONS = {
@@ -20,18 +25,6 @@ SIMULATOR_DEVICE_KEYS = {
     "ios": "ios_simulator",
     "tvos": "tvos_simulator",
 }
-LOCALIZATION_KEY_ORDER = (
-    "de",
-    "en",
-    "es",
-    "fr",
-    "it",
-    "ja",
-    "ko",
-    "ru",
-    "zh-Hans",
-    "zh-Hant",
-)
 
 
 def eprint(message: str) -> None:
@@ -42,14 +35,34 @@ def get_project_root() -> Path:
     return Path(__file__).resolve().parent.parent
 
 
-def parse_build_settings(output: str) -> dict[str, str]:
-    settings: dict[str, str] = {}
-    for line in output.splitlines():
-        if "=" not in line:
-            continue
-        key, value = line.split("=", 1)
-        settings[key.strip()] = value.strip()
-    return settings
+class BuildSettingsReader:
+    """
+    Incremental -showBuildSettings parser.
+
+    feed() returns True once the block for target has been read completely,
+    so the caller can stop xcodebuild instead of waiting for every other
+    target's settings.
+    """
+
+    def __init__(self, target: str = "KMReader"):
+        self.target = target
+        self.settings: dict[str, str] = {}
+        self._in_target = False
+        self.done = False
+
+    def feed(self, line: str) -> bool:
+        if self.done:
+            return True
+        if line.startswith("Build settings for action"):
+            if self._in_target:
+                self.done = True
+                return True
+            self._in_target = line.rstrip().endswith(f"target {self.target}:")
+            return False
+        if self._in_target and "=" in line:
+            key, value = line.split("=", 1)
+            self.settings[key.strip()] = value.strip()
+        return False
 
 
 def saved_simulator_udid(project_root: Path, platform: str) -> str | None:
@@ -73,34 +86,7 @@ def saved_simulator_udid(project_root: Path, platform: str) -> str | None:
 
 
 def simulator_udid_available(platform: str, udid: str) -> bool:
-    runtime_prefixes = {
-        "ios": "com.apple.CoreSimulator.SimRuntime.iOS",
-        "tvos": "com.apple.CoreSimulator.SimRuntime.tvOS",
-    }
-    runtime_prefix = runtime_prefixes.get(platform)
-    if runtime_prefix is None:
-        return False
-
-    try:
-        result = subprocess.run(
-            ["xcrun", "simctl", "list", "devices", "--json"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        data = json.loads(result.stdout)
-    except (subprocess.CalledProcessError, json.JSONDecodeError) as exc:
-        eprint(f"Warning: could not list simulators for {platform}: {exc}")
-        return False
-
-    for runtime, devices in (data.get("devices") or {}).items():
-        if not runtime.startswith(runtime_prefix):
-            continue
-        for device in devices:
-            if device.get("udid") == udid and device.get("isAvailable", False):
-                return True
-
-    return False
+    return device_inventory.find_simulator(platform, udid) is not None
 
 
 def build_destination_for_platform(project_root: Path, platform: str) -> str:
@@ -115,32 +101,31 @@ def build_destination_for_platform(project_root: Path, platform: str) -> str:
 
 def build_settings_for_platform(project_root: Path, platform: str) -> dict[str, str] | None:
     destination = build_destination_for_platform(project_root, platform)
+    project = str(project_root / "KMReader.xcodeproj")
     args = [
         "xcodebuild",
         "-project",
-        str(project_root / "KMReader.xcodeproj"),
+        project,
         "-scheme",
         "KMReader",
         "-destination",
         destination,
         "-showBuildSettings",
     ]
-
-    try:
-        result = subprocess.run(
-            args,
-            cwd=project_root,
-            check=True,
-            capture_output=True,
-            text=True,
-        )
-    except subprocess.CalledProcessError as exc:
-        eprint(f"Error: failed to resolve build settings for {platform}: {exc}")
-        if exc.stderr:
-            eprint(exc.stderr.strip())
+    args.extend(build_cache.source_package_args(project, "KMReader", log=eprint))
+
+    reader = BuildSettingsReader()
+    result = proc.stream(args, platform=platform, cwd=project_root, on_line=reader.feed)
+    if not result.ok:
+        eprint(f"Error: failed to resolve build settings for {platform}: {proc.ProcessFailed(result)}")
+        for line in result.failure_lines(20):
+            eprint(line)
         return None
 
-    return parse_build_settings(result.stdout)
+    if not reader.settings:
+        eprint(f"Error: no build settings for target {reader.target} on {platform}")
+        return None
+    return reader.settings
 
 
 def stringsdata_dir_from_build_settings(settings: dict[str, str]) -> Path | None:
@@ -217,8 +202,7 @@ def load_stringsdata_entries(paths: list[Path]) -> dict:
 
     for path in paths:
         try:
-            with path.open("r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = json_codec.load(path)
         except Exception:
             continue
 
@@ -253,48 +237,32 @@ def load_stringsdata_entries(paths: list[Path]) -> dict:
     }
 
 
-def sort_localizations(localizations: dict) -> dict:
-    ordered = {}
-    seen = set()
-
-    for key in LOCALIZATION_KEY_ORDER:
-        if key in localizations:
-            ordered[key] = localizations[key]
-            seen.add(key)
-
-    for key in sort_keys(k for k in localizations.keys() if k not in seen):
-        ordered[key] = localizations[key]
-
-    return ordered
-
-
 def sort_xcstrings_keys(path: Path, existing_keys: set[str]) -> None:
-    with path.open("r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    strings = data.get("strings")
-    if not isinstance(strings, dict):
+    try:
+        catalog = xcstrings.load(path)
+    except xcstrings.CatalogError:
         return
 
-    new_keys = set(strings.keys()) - existing_keys
-    for key in new_keys:
-        entry = strings.get(key)
-        if not isinstance(entry, dict):
+    for key in catalog.strings.keys() - existing_keys:
+        entry = catalog.strings[key]
+        if not isinstance(entry, xcstrings.Entry) or entry.localizations is None:
             continue
 
-        localizations = entry.get("localizations")
-        if not isinstance(localizations, dict):
-            continue
+        entry.localizations = sort_localizations(entry.localizations)
 
-        entry["localizations"] = sort_localizations(localizations)
+    catalog.sort_strings()
+    xcstrings.save(path, catalog)
 
-    data["strings"] = {key: strings[key] for key in sort_keys(strings.keys())}
 
-    with path.open("w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False, separators=(",", " : "))
+def main() -> int:
+    proc.TRACER.configure_from_env("localize")
+    try:
+        return sync_localizations()
+    finally:
+        proc.TRACER.finish(sys.stderr)
 
 
-def main() -> int:
+def sync_localizations() -> int:
     project_root = get_project_root()
     xcstrings_path = project_root / "KMReader" / "Localizable.xcstrings"
 
@@ -302,10 +270,10 @@ def main() -> int:
         eprint(f"Error: xcstrings not found at {xcstrings_path}")
         return 1
 
-    with xcstrings_path.open("r", encoding="utf-8") as f:
-        existing_data = json.load(f)
-    existing_strings = existing_data.get("strings")
-    existing_keys = set(existing_strings.keys()) if isinstance(existing_strings, dict) else set()
+    try:
+        existing_keys = set(xcstrings.load(xcstrings_path).strings)
+    except xcstrings.CatalogError:
+        existing_keys = set()
 
     explicit_strings_dir = os.environ.get("LOCALIZE_STRINGS_DIR")
 
@@ -420,7 +388,7 @@ def main() -> int:
     )
     try:
         with tmp_path.open("w", encoding="utf-8") as f:
-            json.dump(merged, f)
+            f.write(json_codec.dumps_compact(merged))
 
         args = [
             "xcrun",
@@ -430,7 +398,7 @@ def main() -> int:
             "--stringsdata",
             str(tmp_path),
         ]
-        code = os.spawnvp(os.P_WAIT, args[0], args)
+        code = proc.run(args).returncode
         if code == 0:
             sort_xcstrings_keys(xcstrings_path, existing_keys)
         return code
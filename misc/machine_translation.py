@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Machine-translation autofill for `translate.py autofill`.
+
+Missing (key, language) cells are grouped per language into batches bounded
+by item count and characters, and sent concurrently to a pluggable backend
+under a shared rate limit. Transient failures are retried with backoff, and
+every translation is cached by (backend, language, source text) in
+.build/misc/mt-cache.json so reruns only request what is still missing.
+
+`python3 misc/machine_translation.py serve-stub` runs a local endpoint that
+speaks the HTTP backend protocol, for trying the pipeline without a real
+service:
+
+    POST {"source_language": "en", "target_language": "de", "texts": [...]}
+    200  {"translations": [...]}
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import json_cache
+import xcstrings
+from upload_stage import backoff_delay
+
+ENDPOINT_ENV = "KMREADER_MT_ENDPOINT"
+API_KEY_ENV = "KMREADER_MT_API_KEY"
+SOURCE_LANGUAGE = "en"
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_BATCH_CHARS = 5000
+DEFAULT_JOBS = 4
+DEFAULT_RATE = 5.0
+DEFAULT_RETRIES = 3
+DEFAULT_RETRY_DELAY = 1.0
+DEFAULT_TIMEOUT = 60.0
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+CACHE_VERSION = 1
+
+
+def cache_path() -> Path:
+    return json_cache.cache_path("mt-cache.json")
+
+
+class TranslationError(RuntimeError):
+    def __init__(self, message: str, transient: bool = False):
+        super().__init__(message)
+        self.transient = transient
+
+
+class Cell:
+    """One missing translation: a key in one language."""
+
+    __slots__ = ("key", "language", "source")
+
+    def __init__(self, key: str, language: str, source: str):
+        self.key = key
+        self.language = language
+        self.source = source
+
+
+class Batch:
+    __slots__ = ("language", "cells")
+
+    def __init__(self, language: str, cells: list[Cell]):
+        self.language = language
+        self.cells = cells
+
+    @property
+    def texts(self) -> list[str]:
+        return [cell.source for cell in self.cells]
+
+
+class HTTPBackend:
+    """JSON-over-HTTP translation service (see the module docstring for the protocol)."""
+
+    name = "http"
+
+    def __init__(self, endpoint: str | None = None, timeout: float = DEFAULT_TIMEOUT):
+        self.endpoint = endpoint or os.environ.get(ENDPOINT_ENV, "").strip()
+        if not self.endpoint:
+            raise ValueError(f"no translation endpoint; pass --endpoint or set {ENDPOINT_ENV}")
+        self.api_key = os.environ.get(API_KEY_ENV, "").strip() or None
+        self.timeout = timeout
+
+    @property
+    def cache_id(self) -> str:
+        return f"{self.name}:{self.endpoint}"
+
+    def translate(self, source_language: str, target_language: str, texts: list[str]) -> list[str]:
+        body = json.dumps(
+            {
+                "source_language": source_language,
+                "target_language": target_language,
+                "texts": texts,
+            },
+            ensure_ascii=False,
+        ).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(self.endpoint, data=body, headers=headers, method="POST")
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.load(response)
+        except urllib.error.HTTPError as exc:
+            raise TranslationError(
+                f"HTTP {exc.code} from {self.endpoint}", transient=exc.code in TRANSIENT_STATUS
+            ) from exc
+        except (urllib.error.URLError, TimeoutError, ConnectionError) as exc:
+            raise TranslationError(f"cannot reach {self.endpoint}: {exc}", transient=True) from exc
+        except json.JSONDecodeError as exc:
+            raise TranslationError(f"invalid JSON from {self.endpoint}", transient=True) from exc
+
+        translations = payload.get("translations") if isinstance(payload, dict) else None
+        if (
+            not isinstance(translations, list)
+            or len(translations) != len(texts)
+            or not all(isinstance(text, str) for text in translations)
+        ):
+            raise TranslationError(f"unexpected response from {self.endpoint}")
+        return translations
+
+
+class PseudoBackend:
+    """Offline pseudo-translation ("[de] Text"), for trying the pipeline end to end."""
+
+    name = "pseudo"
+    cache_id = "pseudo"
+
+    def __init__(self, endpoint: str | None = None, timeout: float = DEFAULT_TIMEOUT):
+        pass
+
+    def translate(self, source_language: str, target_language: str, texts: list[str]) -> list[str]:
+        return [pseudo_translate(text, target_language) for text in texts]
+
+
+BACKENDS = {
+    HTTPBackend.name: HTTPBackend,
+    PseudoBackend.name: PseudoBackend,
+}
+
+
+def pseudo_translate(text: str, language: str) -> str:
+    return f"[{language}] {text}"
+
+
+def make_backend(name: str, endpoint: str | None = None, timeout: float = DEFAULT_TIMEOUT):
+    try:
+        backend = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"unknown backend: {name} (choose from {', '.join(BACKENDS)})") from None
+    return backend(endpoint=endpoint, timeout=timeout)
+
+
+class RateLimiter:
+    """Token bucket shared by all worker threads; rate is requests per second."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class ResponseCache:
+    """Translations keyed by backend, target language and source text; safe to share between threads."""
+
+    def __init__(self, backend_id: str, path: Path | None = None):
+        self.path = path or cache_path()
+        self.backend_id = backend_id
+        self._lock = threading.Lock()
+        data = json_cache.load(self.path, {"version": CACHE_VERSION}, ("backends",))
+        self._backends = data.get("backends", {})
+        self._entries = self._backends.setdefault(backend_id, {})
+        self._dirty = False
+
+    def get(self, language: str, source: str) -> str | None:
+        with self._lock:
+            return self._entries.get(language, {}).get(source)
+
+    def put(self, language: str, source: str, translation: str) -> None:
+        with self._lock:
+            self._entries.setdefault(language, {})[source] = translation
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            json_cache.save(self.path, {"version": CACHE_VERSION, "backends": self._backends})
+            self._dirty = False
+
+
+def make_batches(cells: list[Cell], batch_size: int, batch_chars: int) -> list[Batch]:
+    """Group cells per language into batches of at most batch_size items and batch_chars characters."""
+    by_language: dict[str, list[Cell]] = {}
+    for cell in cells:
+        by_language.setdefault(cell.language, []).append(cell)
+
+    batches = []
+    for language, language_cells in by_language.items():
+        current: list[Cell] = []
+        chars = 0
+        for cell in language_cells:
+            if current and (len(current) >= batch_size or chars + len(cell.source) > batch_chars):
+                batches.append(Batch(language, current))
+                current, chars = [], 0
+            current.append(cell)
+            chars += len(cell.source)
+        if current:
+            batches.append(Batch(language, current))
+    return batches
+
+
+def placeholders_match(source: str, translation: str) -> bool:
+    return xcstrings.format_specifiers(source) == xcstrings.format_specifiers(translation)
+
+
+class AutofillResult:
+    def __init__(self):
+        self.translations: dict[tuple[str, str], str] = {}
+        self.rejected: list[tuple[Cell, str]] = []
+        self.failed: list[tuple[Batch, str]] = []
+        self.cached = 0
+        self.requests = 0
+
+
+def translate_batch(
+    backend,
+    batch: Batch,
+    limiter: RateLimiter,
+    retries: int,
+    retry_delay: float,
+    log=print,
+) -> tuple[list[str], int]:
+    """Translate one batch, retrying transient errors. Returns (translations, requests made)."""
+    attempt = 0
+    while True:
+        attempt += 1
+        limiter.acquire()
+        try:
+            return backend.translate(SOURCE_LANGUAGE, batch.language, batch.texts), attempt
+        except TranslationError as exc:
+            if not exc.transient or attempt > retries:
+                raise
+            delay = backoff_delay(attempt, base=retry_delay, cap=30.0)
+            log(f"[{batch.language}] {exc}; retry {attempt}/{retries} in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def autofill(
+    cells: list[Cell],
+    backend,
+    cache: ResponseCache | None = None,
+    jobs: int = DEFAULT_JOBS,
+    rate: float = DEFAULT_RATE,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    batch_chars: int = DEFAULT_BATCH_CHARS,
+    retries: int = DEFAULT_RETRIES,
+    retry_delay: float = DEFAULT_RETRY_DELAY,
+    log=print,
+) -> AutofillResult:
+    """Translate cells, serving repeats from the cache and batching the rest."""
+    result = AutofillResult()
+    pending: list[Cell] = []
+    for cell in cells:
+        cached = cache.get(cell.language, cell.source) if cache else None
+        if cached is not None:
+            result.translations[(cell.key, cell.language)] = cached
+            result.cached += 1
+        else:
+            pending.append(cell)
+
+    batches = make_batches(pending, batch_size, batch_chars)
+    if batches:
+        log(
+            f"Translating {len(pending)} cells in {len(batches)} batches "
+            f"({result.cached} from cache, {max(1, jobs)} concurrent, {rate:g}/s)"
+        )
+    limiter = RateLimiter(rate)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = {
+            executor.submit(translate_batch, backend, batch, limiter, retries, retry_delay, log): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                translations, requests = future.result()
+            except TranslationError as exc:
+                result.failed.append((batch, str(exc)))
+                log(f"[{batch.language}] batch of {len(batch.cells)} failed: {exc}")
+                continue
+            result.requests += requests
+            for cell, translation in zip(batch.cells, translations):
+                if not translation.strip() or not placeholders_match(cell.source, translation):
+                    result.rejected.append((cell, translation))
+                    continue
+                result.translations[(cell.key, cell.language)] = translation
+                if cache:
+                    cache.put(cell.language, cell.source, translation)
+    if cache:
+        cache.save()
+    return result
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    server: "_StubServer"
+
+    def do_POST(self) -> None:
+        with self.server.lock:
+            self.server.requests += 1
+            count = self.server.requests
+        if self.server.fail_every and count % self.server.fail_every == 0:
+            self.send_error(503, "stub failure")
+            return
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length))
+            language = payload["target_language"]
+            texts = payload["texts"]
+        except (ValueError, KeyError, TypeError):
+            self.send_error(400, "bad request")
+            return
+        body = json.dumps(
+            {"translations": [pseudo_translate(text, language) for text in texts]},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, fail_every: int = 0, delay: float = 0.0, verbose: bool = False):
+        super().__init__(address, _StubHandler)
+        self.fail_every = fail_every
+        self.delay = delay
+        self.verbose = verbose
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+def serve_stub(host: str, port: int, fail_every: int = 0, delay: float = 0.0, verbose: bool = False) -> None:
+    server = _StubServer((host, port), fail_every=fail_every, delay=delay, verbose=verbose)
+    print(f"Stub translation endpoint: http://{host}:{server.server_address[1]}/ (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Machine-translation helpers for translate.py autofill")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    stub_parser = subparsers.add_parser("serve-stub", help="Run a local pseudo-translation endpoint")
+    stub_parser.add_argument("--host", default="127.0.0.1")
+    stub_parser.add_argument("--port", type=int, default=8765)
+    stub_parser.add_argument(
+        "--fail-every", type=int, default=0, help="Answer every Nth request with 503 (exercises retries)"
+    )
+    stub_parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait per request")
+    stub_parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    if args.command == "serve-stub":
+        serve_stub(args.host, args.port, args.fail_every, args.delay, args.verbose)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+Instrumented subprocess helpers for the misc/ tools.
+Every command becomes a span (argv, platform, start, duration, exit code, peak RSS)
+that can be exported as a Chrome trace and summarized at the end of a run.
+stream() additionally writes output line by line to a per-command log file and
+keeps only a bounded tail in memory.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Callable
+
+TRACE_ENV = "KMREADER_TRACE"
+LOG_KEEP = 20
+TAIL_LINES = 200
+KILL_GRACE_SECONDS = 10.0
+DIAGNOSTIC_LINE = re.compile(
+    r"(?:^|\s)(?:fatal error|error|warning):|^\*\* [A-Z ]+ (?:FAILED|SUCCEEDED) \*\*|^xcodebuild: error"
+)
+XCODEBUILD_ACTIONS = (
+    "build",
+    "archive",
+    "clean",
+    "test",
+    "-exportArchive",
+    "-showBuildSettings",
+    "-version",
+)
+
+
+def get_project_root() -> Path:
+    return Path(__file__).resolve().parent.parent
+
+
+def command_label(argv: list[str]) -> str:
+    """Short human label for a command, e.g. "xcodebuild archive" or "xcrun simctl boot"."""
+    if not argv:
+        return "<empty>"
+    program = os.path.basename(argv[0])
+    if program == "xcodebuild":
+        actions = [arg for arg in argv[1:] if arg in XCODEBUILD_ACTIONS]
+        return " ".join([program] + actions[-1:])
+    if program == "xcrun":
+        words = [arg for arg in argv[1:3] if not arg.startswith("-")]
+        return " ".join([program] + words)
+    words = [arg for arg in argv[1:2] if not arg.startswith("-")]
+    return " ".join([program] + words)
+
+
+def _rss_bytes(rusage: Any) -> int | None:
+    if rusage is None:
+        return None
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux.
+    if sys.platform == "darwin":
+        return rusage.ru_maxrss
+    return rusage.ru_maxrss * 1024
+
+
+class Span:
+    def __init__(
+        self,
+        name: str,
+        category: str,
+        start: float,
+        end: float,
+        thread: int,
+        args: dict[str, Any] | None = None,
+    ):
+        self.name = name
+        self.category = category
+        self.start = start
+        self.end = end
+        self.thread = thread
+        self.args = args or {}
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+class Tracer:
+    """Collects spans from any thread; disabled tracers record nothing."""
+
+    def __init__(self):
+        self.enabled = False
+        self.command = ""
+        self.trace_path: Path | None = None
+        self.spans: list[Span] = []
+        self._origin = time.monotonic()
+        self._started_at = datetime.now()
+        self._threads: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, command: str, trace_path: str | None = None) -> None:
+        """
+        Enable tracing for this process.
+
+        trace_path may be empty, in which case the trace is written to
+        .build/misc/traces/<command>_<timestamp>.json so runs can be compared
+        over time.
+        """
+        self.enabled = True
+        self.command = command
+        self._origin = time.monotonic()
+        self._started_at = datetime.now()
+        if trace_path:
+            self.trace_path = Path(trace_path).expanduser()
+        else:
+            timestamp = self._started_at.strftime("%Y%m%d_%H%M%S")
+            self.trace_path = (
+                get_project_root() / ".build" / "misc" / "traces" / f"{command}_{timestamp}.json"
+            )
+
+    def configure_from_env(self, command: str) -> None:
+        """Enable tracing when KMREADER_TRACE is set (1/true, or an output path)."""
+        value = os.environ.get(TRACE_ENV, "").strip()
+        if not value or value.lower() in ("0", "false", "no"):
+            return
+        path = None if value.lower() in ("1", "true", "yes") else value
+        self.configure(command, path)
+
+    def _thread_index(self) -> int:
+        ident = threading.get_ident()
+        return self._threads.setdefault(ident, len(self._threads) + 1)
+
+    def add(
+        self,
+        name: str,
+        category: str,
+        start: float,
+        end: float,
+        args: dict[str, Any] | None = None,
+    ) -> None:
+        """Record a span; start and end are time.monotonic() values."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.spans.append(Span(name, category, start, end, self._thread_index(), args))
+
+    def chrome_trace(self) -> dict:
+        pid = os.getpid()
+        events = []
+        for span in sorted(self.spans, key=lambda s: s.start):
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.category,
+                    "ph": "X",
+                    "ts": round((span.start - self._origin) * 1_000_000),
+                    "dur": round(span.duration * 1_000_000),
+                    "pid": pid,
+                    "tid": span.thread,
+                    "args": span.args,
+                }
+            )
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {
+                "command": self.command,
+                "started_at": self._started_at.isoformat(timespec="seconds"),
+            },
+        }
+
+    def write(self) -> Path | None:
+        if not self.enabled or self.trace_path is None:
+            return None
+        self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.trace_path.open("w", encoding="utf-8") as f:
+            json.dump(self.chrome_trace(), f, indent=1)
+        return self.trace_path
+
+    def summary_lines(self) -> list[str]:
+        spans = [span for span in self.spans if span.category == "subprocess"]
+        if not spans:
+            return []
+
+        name_width = max(len("Command"), *(len(span.name) for span in spans))
+        lines = [
+            f"{'Command':<{name_width}}  {'Platform':<8}  {'Start':>8}  {'Duration':>9}  {'Exit':>4}  {'Peak RSS':>9}"
+        ]
+        for span in sorted(spans, key=lambda s: s.start):
+            rss = span.args.get("max_rss_bytes")
+            rss_text = f"{rss / (1024 * 1024):7.0f}MB" if rss else "-"
+            exit_code = span.args.get("exit_code")
+            lines.append(
+                f"{span.name:<{name_width}}  {span.args.get('platform') or '-':<8}  "
+                f"{span.start - self._origin:7.1f}s  {span.duration:8.1f}s  "
+                f"{'-' if exit_code is None else exit_code:>4}  {rss_text:>9}"
+            )
+        total = sum(span.duration for span in spans)
+        lines.append(f"{len(spans)} commands, {total:.1f}s total subprocess time")
+        return lines
+
+    def finish(self, stream: IO[str] | None = None) -> None:
+        """Print the summary table and write the trace file."""
+        if not self.enabled:
+            return
+        stream = stream or sys.stdout
+        lines = self.summary_lines()
+        if lines:
+            print("", file=stream)
+            print("Subprocess timing:", file=stream)
+            for line in lines:
+                print(f"  {line}", file=stream)
+        path = self.write()
+        if path:
+            print(f"Trace written to {path}", file=stream)
+
+
+TRACER = Tracer()
+
+
+def _drain(stream: IO, chunks: list) -> None:
+    chunks.append(stream.read())
+    stream.close()
+
+
+def _wait(process: subprocess.Popen) -> Any:
+    """Reap the child with wait4 when available so its rusage can be reported."""
+    if not hasattr(os, "wait4"):
+        process.wait()
+        return None
+    while True:
+        try:
+            _, status, rusage = os.wait4(process.pid, 0)
+            break
+        except InterruptedError:
+            continue
+        except ChildProcessError:
+            # Already reaped elsewhere.
+            process.wait()
+            return None
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return rusage
+
+
+class TracedProcess:
+    """A started child process whose span is recorded when it is waited for."""
+
+    def __init__(
+        self,
+        argv: list[str],
+        label: str | None = None,
+        platform: str | None = None,
+        **kwargs: Any,
+    ):
+        self.argv = [str(arg) for arg in argv]
+        self.label = label or command_label(self.argv)
+        self.platform = platform
+        self.start = time.monotonic()
+        self.process = subprocess.Popen(self.argv, **kwargs)
+        self.rusage: Any = None
+        self._recorded = False
+
+    @property
+    def returncode(self) -> int | None:
+        return self.process.returncode
+
+    def communicate(self) -> tuple[Any, Any]:
+        outputs: dict[str, list] = {}
+        threads = []
+        for name in ("stdout", "stderr"):
+            stream = getattr(self.process, name)
+            if stream is None:
+                continue
+            outputs[name] = []
+            thread = threading.Thread(target=_drain, args=(stream, outputs[name]), daemon=True)
+            thread.start()
+            threads.append(thread)
+        try:
+            self.wait()
+        finally:
+            for thread in threads:
+                thread.join()
+        stdout = outputs["stdout"][0] if "stdout" in outputs else None
+        stderr = outputs["stderr"][0] if "stderr" in outputs else None
+        return stdout, stderr
+
+    def wait(self) -> int:
+        if self.process.returncode is None:
+            try:
+                self.rusage = _wait(self.process)
+            except BaseException:
+                self.process.kill()
+                self.process.wait()
+                self._record()
+                raise
+        self._record()
+        return self.process.returncode
+
+    def _record(self) -> None:
+        if self._recorded:
+            return
+        self._recorded = True
+        TRACER.add(
+            self.label,
+            "subprocess",
+            self.start,
+            time.monotonic(),
+            {
+                "argv": self.argv,
+                "platform": self.platform,
+                "exit_code": self.process.returncode,
+                "max_rss_bytes": _rss_bytes(self.rusage),
+            },
+        )
+
+
+def popen(
+    argv: list[str],
+    label: str | None = None,
+    platform: str | None = None,
+    **kwargs: Any,
+) -> TracedProcess:
+    """Start a command in the background; its span ends when wait() returns."""
+    return TracedProcess(argv, label=label, platform=platform, **kwargs)
+
+
+def run(
+    argv: list[str],
+    label: str | None = None,
+    platform: str | None = None,
+    check: bool = False,
+    capture_output: bool = False,
+    **kwargs: Any,
+) -> subprocess.CompletedProcess:
+    """Drop-in replacement for subprocess.run that records a span per command."""
+    if capture_output:
+        kwargs["stdout"] = subprocess.PIPE
+        kwargs["stderr"] = subprocess.PIPE
+    traced = TracedProcess(argv, label=label, platform=platform, **kwargs)
+    stdout, stderr = traced.communicate()
+    completed = subprocess.CompletedProcess(traced.argv, traced.returncode, stdout, stderr)
+    if check:
+        completed.check_returncode()
+    return completed
+
+
+class ProcessFailed(subprocess.CalledProcessError):
+    """A streamed command failed or timed out; carries the log path and output tail."""
+
+    def __init__(self, result: "StreamResult"):
+        super().__init__(result.returncode, result.argv, output="".join(result.tail))
+        self.result = result
+
+    def __str__(self) -> str:
+        if self.result.timed_out:
+            reason = f"timed out after {self.result.timeout:g}s"
+        else:
+            reason = f"exited with status {self.returncode}"
+        text = f"{self.result.label} {reason}"
+        if self.result.log_path:
+            text += f" (log: {self.result.log_path})"
+        return text
+
+
+class StreamResult:
+    def __init__(self, argv: list[str], label: str, log_path: Path | None, tail_lines: int):
+        self.argv = argv
+        self.label = label
+        self.log_path = log_path
+        self.tail: deque[str] = deque(maxlen=tail_lines)
+        self.returncode: int | None = None
+        self.timeout: float | None = None
+        self.timed_out = False
+        self.stopped_early = False
+
+    @property
+    def ok(self) -> bool:
+        return self.stopped_early or (self.returncode == 0 and not self.timed_out)
+
+    def check(self) -> "StreamResult":
+        if not self.ok:
+            raise ProcessFailed(self)
+        return self
+
+    def failure_lines(self, limit: int = 50) -> list[str]:
+        """The last lines of output, for error reports."""
+        lines = [line.rstrip("\n") for line in list(self.tail)[-limit:]]
+        if self.log_path:
+            lines.append(f"Full log: {self.log_path}")
+        return lines
+
+
+def is_diagnostic(line: str) -> bool:
+    """Lines xcodebuild -quiet would still print: errors, warnings and the result banner."""
+    return bool(DIAGNOSTIC_LINE.search(line))
+
+
+def logs_dir() -> Path:
+    return get_project_root() / ".build" / "misc" / "logs"
+
+
+_log_counter = itertools.count(1)
+
+
+def _open_log(label: str, platform: str | None) -> tuple[Path, IO[str]]:
+    """Create a new log file for label and drop the oldest ones beyond LOG_KEEP."""
+    directory = logs_dir() / re.sub(r"[^A-Za-z0-9._-]+", "-", label).strip("-")
+    directory.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    suffix = f"_{platform}" if platform else ""
+    path = directory / f"{timestamp}{suffix}_{os.getpid()}-{next(_log_counter)}.log"
+    handle = path.open("w", encoding="utf-8", errors="replace")
+
+    logs = sorted(directory.glob("*.log"), key=lambda p: p.stat().st_mtime)
+    for old in logs[:-LOG_KEEP]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+    return path, handle
+
+
+def _signal_group(process: subprocess.Popen, sig: int) -> None:
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def terminate_group(process: subprocess.Popen, done: threading.Event, grace: float = KILL_GRACE_SECONDS) -> None:
+    """SIGTERM the child's process group, then SIGKILL it if it has not exited after grace seconds."""
+    _signal_group(process, signal.SIGTERM)
+    if not done.wait(grace):
+        _signal_group(process, signal.SIGKILL)
+
+
+def stream(
+    argv: list[str],
+    label: str | None = None,
+    platform: str | None = None,
+    log: bool = True,
+    echo: bool | Callable[[str], bool] = False,
+    on_line: Callable[[str], bool | None] | None = None,
+    timeout: float | None = None,
+    tail_lines: int = TAIL_LINES,
+    check: bool = False,
+    **kwargs: Any,
+) -> StreamResult:
+    """
+    Run a command, handling its combined stdout/stderr one line at a time.
+
+    Each line goes to a log file under .build/misc/logs/<label>/ (the newest
+    LOG_KEEP per label are kept), into a ring buffer of the last tail_lines
+    lines, to stdout when echo is true or returns true for it, and to on_line.
+    When on_line returns true the command is stopped early and the result
+    still counts as successful. The child runs in its own process group so a
+    timeout, an early stop or an exception (including KeyboardInterrupt)
+    terminates everything it started.
+    """
+    traced = TracedProcess(
+        argv,
+        label=label,
+        platform=platform,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        errors="replace",
+        bufsize=1,
+        start_new_session=True,
+        **kwargs,
+    )
+    process = traced.process
+    log_path, log_file = _open_log(traced.label, platform) if log else (None, None)
+    result = StreamResult(traced.argv, traced.label, log_path, tail_lines)
+    result.timeout = timeout
+    done = threading.Event()
+
+    def expire() -> None:
+        result.timed_out = True
+        terminate_group(process, done)
+
+    timer = threading.Timer(timeout, expire) if timeout else None
+    if timer:
+        timer.daemon = True
+        timer.start()
+
+    try:
+        for line in process.stdout:
+            if log_file:
+                log_file.write(line)
+            result.tail.append(line)
+            if echo is True or (callable(echo) and echo(line)):
+                sys.stdout.write(line)
+                sys.stdout.flush()
+            if on_line is not None and on_line(line):
+                result.stopped_early = True
+                threading.Thread(target=terminate_group, args=(process, done), daemon=True).start()
+                break
+        process.stdout.close()
+        result.returncode = traced.wait()
+    except BaseException:
+        threading.Thread(target=terminate_group, args=(process, done), daemon=True).start()
+        traced.wait()
+        raise
+    finally:
+        done.set()
+        if timer:
+            timer.cancel()
+        if log_file:
+            log_file.close()
+
+    if check:
+        result.check()
+    return result
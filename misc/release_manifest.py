@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Release manifests and retention for archives/ and exports/.
+A manifest records, per platform, the archive, export directory and artifact
+hashes produced by one release run.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+MANIFESTS_DIRNAME = "manifests"
+LATEST_MANIFEST = "latest.json"
+_SIZE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)I?B?\s*$", re.IGNORECASE)
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def describe_artifact(path: Path) -> dict:
+    return {
+        "path": str(path),
+        "size": path.stat().st_size,
+        "sha256": sha256_file(path),
+    }
+
+
+class ReleaseManifest:
+    """Collects per-platform results from concurrent release tasks and writes them once."""
+
+    def __init__(self, exports_dir: Path, version: tuple[str, str] | None = None):
+        self.created_at = datetime.now()
+        self.path = (
+            exports_dir
+            / MANIFESTS_DIRNAME
+            / f"release_{self.created_at.strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        self.version = version
+        self.platforms: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def add_export(
+        self, platform: str, archive: Path, export_dir: Path, artifact: Path | None
+    ) -> dict:
+        """Hash the exported files of one platform and record them."""
+        files = [
+            describe_artifact(path)
+            for path in sorted(export_dir.iterdir())
+            if path.is_file()
+        ]
+        entry = {
+            "archive": str(archive),
+            "export_dir": str(export_dir),
+            "artifact": str(artifact) if artifact else None,
+            "files": files,
+        }
+        with self._lock:
+            self.platforms[platform] = entry
+        return entry
+
+    def add_archive(self, platform: str, archive: Path) -> None:
+        with self._lock:
+            self.platforms.setdefault(platform, {"archive": str(archive), "files": []})
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "created_at": self.created_at.isoformat(timespec="seconds"),
+                "version": list(self.version) if self.version else None,
+                "platforms": dict(sorted(self.platforms.items())),
+            }
+
+    def write(self) -> Path:
+        """Write the manifest and point latest.json at it."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        payload = self.to_dict()
+        with self.path.open("w", encoding="utf-8") as f:
+            json.dump(payload, f, indent=2)
+            f.write("\n")
+        latest = self.path.parent / LATEST_MANIFEST
+        tmp_path = latest.with_suffix(f".{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            json.dump(dict(payload, manifest=str(self.path)), f, indent=2)
+            f.write("\n")
+        os.replace(tmp_path, latest)
+        return self.path
+
+
+def latest_manifest_path(exports_dir: Path) -> Path:
+    return exports_dir / MANIFESTS_DIRNAME / LATEST_MANIFEST
+
+
+def load_manifest(path: Path) -> dict:
+    with path.open("r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("platforms"), dict):
+        raise ValueError(f"not a release manifest: {path}")
+    return manifest
+
+
+def verify_artifact(entry: dict) -> tuple[Path | None, str | None]:
+    """Return (artifact path, error) after checking size and hash against the manifest."""
+    artifact = entry.get("artifact")
+    if not artifact:
+        return None, "no artifact recorded"
+    path = Path(artifact)
+    recorded = next((f for f in entry.get("files", []) if f.get("path") == artifact), None)
+    if not path.is_file():
+        return None, f"artifact missing: {path}"
+    if recorded:
+        if path.stat().st_size != recorded.get("size"):
+            return None, f"artifact size changed since export: {path}"
+        if sha256_file(path) != recorded.get("sha256"):
+            return None, f"artifact hash changed since export: {path}"
+    return path, None
+
+
+def parse_size(value: str) -> int:
+    """Parse sizes such as 500M, 20G or 1.5TB into bytes."""
+    match = _SIZE.match(value)
+    if not match:
+        raise ValueError(f"invalid size: {value}")
+    number = float(match[1])
+    exponent = " KMGT".index((match[2] or " ").upper())
+    return int(number * (1024 ** exponent))
+
+
+def format_size(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024:
+            return f"{value:.1f}{unit}" if unit != "B" else f"{size}B"
+        value /= 1024
+    return f"{value:.1f}TB"
+
+
+def tree_size(path: Path) -> int:
+    if path.is_file():
+        return path.stat().st_size
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class PruneCandidate:
+    def __init__(self, path: Path, kind: str):
+        self.path = path
+        self.kind = kind
+        self.mtime = path.stat().st_mtime
+        self.size = tree_size(path)
+        self.reason = ""
+
+
+def plan_prune(
+    archives_dir: Path,
+    exports_dir: Path,
+    max_age_days: float | None = None,
+    keep: int | None = None,
+    max_size: int | None = None,
+    keep_releases: int | None = None,
+) -> tuple[list[PruneCandidate], list[Path]]:
+    """
+    Decide what to delete.
+
+    Every manifest is retained unless keep_releases is given, in which case
+    only the newest keep_releases are and older manifests are removed
+    (releasing what they referenced). Archives (which hold the dSYMs) and export directories referenced
+    by a retained manifest are never removed. Everything else in archives/
+    and exports/ is removed when it is older than max_age_days, beyond the
+    newest `keep` entries of its kind, or needed to bring the total size
+    under max_size (oldest first).
+
+    Returns (entries to delete, manifests to delete).
+    """
+    manifests_dir = exports_dir / MANIFESTS_DIRNAME
+    manifests = sorted(
+        (p for p in manifests_dir.glob("release_*.json") if p.is_file()),
+        key=lambda p: p.name,
+        reverse=True,
+    ) if manifests_dir.is_dir() else []
+    if keep_releases is None:
+        retained, expired = manifests, []
+    else:
+        retained, expired = manifests[:keep_releases], manifests[keep_releases:]
+
+    protected: set[Path] = set()
+    for manifest_path in retained:
+        try:
+            manifest = load_manifest(manifest_path)
+        except (OSError, ValueError, json.JSONDecodeError):
+            continue
+        for entry in manifest["platforms"].values():
+            for key in ("archive", "export_dir"):
+                if entry.get(key):
+                    protected.add(Path(entry[key]).resolve())
+
+    candidates: list[PruneCandidate] = []
+    if archives_dir.is_dir():
+        candidates.extend(
+            PruneCandidate(p, "archive") for p in archives_dir.glob("*.xcarchive") if p.is_dir()
+        )
+    if exports_dir.is_dir():
+        candidates.extend(
+            PruneCandidate(p, "export") for p in exports_dir.glob("export_*") if p.is_dir()
+        )
+
+    now = time.time()
+    doomed: dict[Path, PruneCandidate] = {}
+    for kind in ("archive", "export"):
+        entries = sorted(
+            (c for c in candidates if c.kind == kind), key=lambda c: c.mtime, reverse=True
+        )
+        for index, candidate in enumerate(entries):
+            if candidate.path.resolve() in protected:
+                continue
+            if keep is not None and index >= keep:
+                candidate.reason = f"beyond newest {keep}"
+            elif max_age_days is not None and now - candidate.mtime > max_age_days * 86400:
+                candidate.reason = f"older than {max_age_days:g} days"
+            else:
+                continue
+            doomed[candidate.path] = candidate
+
+    if max_size is not None:
+        remaining = sum(c.size for c in candidates if c.path not in doomed)
+        for candidate in sorted(candidates, key=lambda c: c.mtime):
+            if remaining <= max_size:
+                break
+            if candidate.path in doomed or candidate.path.resolve() in protected:
+                continue
+            candidate.reason = f"over size budget {format_size(max_size)}"
+            doomed[candidate.path] = candidate
+            remaining -= candidate.size
+
+    return sorted(doomed.values(), key=lambda c: c.mtime), expired
+
+
+def apply_prune(entries: list[PruneCandidate], manifests: list[Path]) -> None:
+    for candidate in entries:
+        shutil.rmtree(candidate.path, ignore_errors=True)
+    for manifest in manifests:
+        try:
+            manifest.unlink()
+        except OSError:
+            pass
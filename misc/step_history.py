@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Local history of xcode.py step durations, keyed by machine, command, step and platform.
+Medians of recent successful runs feed TaskGraph estimates, plans and ETAs.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform as platform_module
+import statistics
+import threading
+from pathlib import Path
+
+from task_graph import RUNNING, SUCCEEDED, TaskGraph
+
+MAX_SAMPLES = 20
+# Rough first-run guesses, replaced by real medians after one successful run.
+DEFAULT_SECONDS = {
+    "archive": 900.0,
+    "build": 600.0,
+    "export": 120.0,
+    "size": 10.0,
+    "upload": 300.0,
+}
+
+
+def get_project_root() -> Path:
+    return Path(__file__).resolve().parent.parent
+
+
+def history_path() -> Path:
+    return get_project_root() / ".build" / "misc" / "history.json"
+
+
+def machine_id() -> str:
+    """Identify this machine so histories from different hardware are not mixed."""
+    host = platform_module.node().split(".")[0] or "unknown"
+    return f"{host}-{platform_module.machine()}-{os.cpu_count() or 0}cpu"
+
+
+def step_key(command: str, step: str, platform: str | None) -> str:
+    return f"{command}/{step}/{platform or '-'}"
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m{seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h{minutes:02d}m"
+
+
+class StepHistory:
+    """Recent durations of successful steps on this machine; safe to share between threads."""
+
+    def __init__(self, path: Path | None = None, machine: str | None = None):
+        self.path = path or history_path()
+        self.machine = machine or machine_id()
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {"machines": {}}
+        if not isinstance(data, dict) or not isinstance(data.get("machines"), dict):
+            return {"machines": {}}
+        return data
+
+    def samples(self, command: str, step: str, platform: str | None) -> list[float]:
+        with self._lock:
+            steps = self._data["machines"].get(self.machine, {})
+            return list(steps.get(step_key(command, step, platform), []))
+
+    def median(self, command: str, step: str, platform: str | None) -> float | None:
+        samples = self.samples(command, step, platform)
+        return statistics.median(samples) if samples else None
+
+    def estimate(self, command: str, step: str, platform: str | None) -> float:
+        median = self.median(command, step, platform)
+        if median is not None:
+            return median
+        return DEFAULT_SECONDS.get(step, 300.0)
+
+    def record(self, command: str, step: str, platform: str | None, seconds: float) -> None:
+        with self._lock:
+            steps = self._data["machines"].setdefault(self.machine, {})
+            samples = steps.setdefault(step_key(command, step, platform), [])
+            samples.append(round(seconds, 1))
+            del samples[:-MAX_SAMPLES]
+
+    def record_graph(self, command: str, graph: TaskGraph) -> None:
+        """Record every succeeded task named "<step>:<platform>" (or just "<step>")."""
+        for task in graph.tasks.values():
+            # Steps that found nothing to do would drag the median down.
+            if task.status != SUCCEEDED or task.duration is None or task.result == "skipped":
+                continue
+            step, _, platform = task.name.partition(":")
+            self.record(command, step, platform or None, task.duration)
+
+    def save(self) -> None:
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+                with tmp_path.open("w", encoding="utf-8") as f:
+                    json.dump(self._data, f, indent=2, sort_keys=True)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass
+
+
+def progress_line(graph: TaskGraph) -> str:
+    """One-line progress summary with the predicted remaining time."""
+    total = len(graph.tasks)
+    running = [task.name for task in graph.tasks.values() if task.status == RUNNING]
+    line = f"[{graph.completed_count()}/{total} steps] ETA {format_duration(graph.eta())}"
+    if running:
+        line += f" (running: {', '.join(running)})"
+    return line
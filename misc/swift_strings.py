@@ -0,0 +1,322 @@
+#!/usr/bin/env python3
+"""
+String-literal scanner for the app's Swift sources, behind `translate.py scan`.
+
+Needs no Xcode: a small Swift lexer skips comments and decodes string
+literals (escapes, interpolation, raw and multi-line strings). Literals
+passed directly to localizing initializers (Text, Button, Label,
+String(localized:), LocalizedStringKey, ...) are candidate catalog keys;
+every other literal still counts as a use of a key, because keys are often
+held in LocalizedStringKey/LocalizedStringResource properties. Each target
+has its own catalog, so literals are only compared with the catalog of the
+targets whose sources contain them.
+
+Files are scanned in parallel processes and results are cached by mtime
+and size in .build/misc/swift-strings.json.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import json_cache
+import xcstrings
+
+SOURCE_DIRS = ("KMReader", "KMReaderWidgets", "Shared")
+# Catalog -> source directories compiled into the same target.
+CATALOG_SOURCES = {
+    "KMReader/Localizable.xcstrings": ("KMReader", "Shared"),
+    "KMReaderWidgets/Localizable.xcstrings": ("KMReaderWidgets", "Shared"),
+}
+CACHE_VERSION = 3
+# Below this many files to scan, starting worker processes costs more than it saves.
+PARALLEL_THRESHOLD = 16
+# Interpolations and format specifiers both become this marker when matching keys.
+PLACEHOLDER = "\x00"
+
+_TOKEN = re.compile(r'//|/\*|(#*)("""|")')
+_COMMENT = re.compile(r"/\*|\*/")
+_CALL_SITE = re.compile(
+    r"(?:(?<![\w.])(?:Text|Button|Label|Toggle|Section|Picker|TextField|SecureField|Link|Menu"
+    r"|LocalizedStringKey|LocalizedStringResource|NSLocalizedString)"
+    r"|\.navigationTitle)\(\s*$|\bString\(\s*localized:\s*$"
+)
+_CALL_LOOKBEHIND = 64
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "0": "\0", "\\": "\\", '"': '"', "'": "'"}
+
+
+def get_project_root() -> Path:
+    return Path(__file__).resolve().parent.parent
+
+
+def cache_path() -> Path:
+    return json_cache.cache_path("swift-strings.json")
+
+
+def match_key(text: str) -> str:
+    """
+    Form under which catalog keys and Swift literals are compared: format
+    specifiers become PLACEHOLDER and the key's escaped "%%" matches a
+    literal "%".
+    """
+    return xcstrings.FORMAT_SPECIFIER.sub(_placeholder, text)
+
+
+def _placeholder(match: re.Match) -> str:
+    return "%" if match["type"] == "%" else PLACEHOLDER
+
+
+def display(value: str) -> str:
+    """A literal as it would read in Swift, with interpolations elided."""
+    return value.replace(PLACEHOLDER, "\\(…)")
+
+
+def _skip_interpolation(text: str, position: int) -> int:
+    """Return the position after the ")" closing an interpolation that starts at position."""
+    depth = 1
+    length = len(text)
+    while position < length:
+        char = text[position]
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return position + 1
+        elif char == '"' or char == "#":
+            match = _TOKEN.match(text, position)
+            if match and match.group(2):
+                _, position = read_literal(text, match.end(), len(match.group(1)), match.group(2) == '"""')
+                continue
+        position += 1
+    return length
+
+
+def read_literal(text: str, position: int, hashes: int = 0, multiline: bool = False) -> tuple[str, int]:
+    """
+    Decode the literal whose opening delimiter ends at position.
+    Returns (value, position after the closing delimiter); interpolations
+    become PLACEHOLDER.
+    """
+    closing = ('"""' if multiline else '"') + "#" * hashes
+    escape = "\\" + "#" * hashes
+    value, end = _decode(text, position, closing, escape, multiline)
+    if multiline and text.startswith(closing, end - len(closing)) and end - len(closing) >= position:
+        # Indentation is stripped from the source lines before escapes are decoded.
+        body = _dedent_multiline(text[position:end - len(closing)])
+        value, _ = _decode(body + closing, 0, closing, escape, multiline)
+    return value, end
+
+
+def _dedent_multiline(raw: str) -> str:
+    """
+    Source of a multi-line literal as Swift reads it: without the opening
+    line, the newline before the closing delimiter, and the closing
+    delimiter's indentation on every line.
+    """
+    newline = raw.find("\n")
+    if newline < 0:
+        return raw
+    body = raw[newline + 1:]
+    last = body.rfind("\n")
+    indent = body[last + 1:]
+    if indent.strip(" \t"):
+        # The closing delimiter is not on its own line (a compile error in Swift).
+        return body
+    body = body[:last] if last >= 0 else ""
+    return "\n".join(
+        line[len(indent):] if line.startswith(indent) else line.lstrip(" \t")
+        for line in body.split("\n")
+    )
+
+
+def _decode(text: str, position: int, closing: str, escape: str, multiline: bool) -> tuple[str, int]:
+    parts: list[str] = []
+    length = len(text)
+    start = position
+    while position < length:
+        char = text[position]
+        if char == '"' and text.startswith(closing, position):
+            parts.append(text[start:position])
+            return "".join(parts), position + len(closing)
+        if char == "\n" and not multiline:
+            break
+        if char == "\\" and text.startswith(escape, position):
+            parts.append(text[start:position])
+            position += len(escape)
+            code = text[position:position + 1]
+            if code == "(":
+                parts.append(PLACEHOLDER)
+                position = _skip_interpolation(text, position + 1)
+            elif code == "u" and text.startswith("{", position + 1):
+                end = text.find("}", position)
+                try:
+                    parts.append(chr(int(text[position + 2:end], 16)))
+                except ValueError:
+                    pass
+                position = end + 1
+            elif code == "\n":
+                # Line continuation in a multi-line literal.
+                position += 1
+            else:
+                parts.append(_ESCAPES.get(code, code))
+                position += 1
+            start = position
+            continue
+        position += 1
+    parts.append(text[start:position])
+    return "".join(parts), position
+
+
+def _skip_block_comment(text: str, position: int) -> int:
+    depth = 1
+    while depth:
+        match = _COMMENT.search(text, position)
+        if match is None:
+            return len(text)
+        depth += 1 if match.group() == "/*" else -1
+        position = match.end()
+    return position
+
+
+def extract(text: str) -> tuple[list[tuple[str, int]], list[str]]:
+    """
+    Return (localized call-site literals with line numbers, every distinct
+    literal in match_key form).
+    """
+    calls: list[tuple[str, int]] = []
+    literals: set[str] = set()
+    position = 0
+    line = 1
+    line_position = 0
+    while True:
+        match = _TOKEN.search(text, position)
+        if match is None:
+            break
+        token = match.group()
+        if token == "//":
+            newline = text.find("\n", match.end())
+            position = len(text) if newline < 0 else newline
+            continue
+        if token == "/*":
+            position = _skip_block_comment(text, match.end())
+            continue
+
+        start = match.start()
+        value, position = read_literal(
+            text, match.end(), len(match.group(1)), match.group(2) == '"""'
+        )
+        key = match_key(value)
+        literals.add(key)
+        if _CALL_SITE.search(text, max(0, start - _CALL_LOOKBEHIND), start):
+            line += text.count("\n", line_position, start)
+            line_position = start
+            calls.append((value, line))
+    return calls, sorted(literals)
+
+
+def _extract_file(path: str) -> tuple[str, list, list]:
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    except OSError:
+        return path, [], []
+    calls, literals = extract(text)
+    return path, calls, literals
+
+
+def iter_swift_files(root: Path, dirs: tuple[str, ...] = SOURCE_DIRS) -> list[Path]:
+    files = []
+    for name in dirs:
+        directory = root / name
+        if directory.is_dir():
+            files.extend(path for path in directory.rglob("*.swift") if path.is_file())
+    return sorted(files)
+
+
+class ScanResult:
+    def __init__(self):
+        # relative path -> (call-site literals, distinct literal keys)
+        self.files: dict[str, tuple[list, list]] = {}
+        self.scanned = 0
+        self.cached = 0
+
+    def _paths(self, dirs: tuple[str, ...] | None):
+        prefixes = tuple(f"{name}/" for name in dirs) if dirs is not None else ("",)
+        return sorted(path for path in self.files if path.startswith(prefixes))
+
+    def used_keys(self, dirs: tuple[str, ...] | None = None) -> set[str]:
+        used: set[str] = set()
+        for path in self._paths(dirs):
+            used.update(self.files[path][1])
+        return used
+
+    def calls(self, dirs: tuple[str, ...] | None = None):
+        """Yield (relative path, literal, line) for every localized call site."""
+        for path in self._paths(dirs):
+            for value, line in self.files[path][0]:
+                yield path, value, line
+
+
+def scan(root: Path | None = None, jobs: int | None = None, cache: Path | None = None) -> ScanResult:
+    """Extract literals from every Swift file, re-reading only files whose mtime or size changed."""
+    root = root or get_project_root()
+    cache = cache or cache_path()
+    cached_files = json_cache.load(cache, {"version": CACHE_VERSION}, ("files",)).get("files", {})
+    result = ScanResult()
+    stats: dict[str, list[int]] = {}
+    pending: list[str] = []
+
+    for path in iter_swift_files(root):
+        relative = path.relative_to(root).as_posix()
+        stat = path.stat()
+        stats[relative] = [stat.st_mtime_ns, stat.st_size]
+        item = cached_files.get(relative)
+        if item is not None and item.get("stat") == stats[relative]:
+            result.files[relative] = ([tuple(call) for call in item["calls"]], item["literals"])
+            result.cached += 1
+        else:
+            pending.append(str(path))
+
+    if len(pending) >= PARALLEL_THRESHOLD and (jobs or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            extracted = list(executor.map(_extract_file, pending, chunksize=8))
+    else:
+        extracted = [_extract_file(path) for path in pending]
+    for path, calls, literals in extracted:
+        result.files[Path(path).relative_to(root).as_posix()] = (calls, literals)
+    result.scanned = len(pending)
+
+    if pending or len(cached_files) != len(result.files):
+        json_cache.save(
+            cache,
+            {
+                "version": CACHE_VERSION,
+                "files": {
+                    relative: {"stat": stats[relative], "calls": calls, "literals": literals}
+                    for relative, (calls, literals) in result.files.items()
+                },
+            },
+        )
+    return result
+
+
+def cross_reference(
+    catalog: xcstrings.Catalog, result: ScanResult, dirs: tuple[str, ...] | None = None
+) -> tuple[list[str], list[tuple[str, str, int]]]:
+    """
+    Return (catalog keys no Swift literal in dirs mentions, localized
+    call-site literals in dirs that are not catalog keys).
+    """
+    catalog_keys = {match_key(key) for key in catalog.strings}
+    used = result.used_keys(dirs)
+    unused = [key for key in catalog.strings if match_key(key) not in used]
+    unextracted = [
+        (path, value, line)
+        for path, value, line in result.calls(dirs)
+        if match_key(value) not in catalog_keys
+    ]
+    return unused, unextracted
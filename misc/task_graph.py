@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Dependency-graph executor for multi-step xcode.py commands.
+Tasks start as soon as their dependencies succeed; failures cancel downstream work.
+With duration estimates, ready tasks on the longest remaining path start first,
+and the same policy predicts the schedule and the remaining time.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class Task:
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[dict[str, Any]], Any],
+        deps: tuple[str, ...] = (),
+        resources: tuple[str, ...] = (),
+        estimate: float | None = None,
+    ):
+        self.name = name
+        self.func = func
+        self.deps = deps
+        self.resources = resources
+        self.estimate = estimate
+        self.status = PENDING
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+
+    @property
+    def duration(self) -> float | None:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def __repr__(self):
+        return f"Task({self.name!r}, {self.status})"
+
+
+class TaskGraph:
+    """
+    Run tasks in dependency order with bounded parallelism.
+
+    A task function receives the results of its dependencies keyed by task
+    name. Returning None or False marks the task as failed, as does raising.
+    Resources model things that cannot be shared (for example one
+    DerivedData directory): a task only starts while every resource it names
+    has spare capacity. Among ready tasks, the one with the longest estimated
+    path to the end of the graph starts first; tasks without an estimate
+    count as default_estimate seconds.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        capacities: dict[str, int] | None = None,
+        default_estimate: float = 60.0,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.capacities = dict(capacities or {})
+        self.default_estimate = default_estimate
+        self.tasks: dict[str, Task] = {}
+        self._in_use: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._origin: float | None = None
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[dict[str, Any]], Any],
+        deps: tuple[str, ...] | list[str] = (),
+        resources: tuple[str, ...] | list[str] = (),
+        estimate: float | None = None,
+    ) -> Task:
+        if name in self.tasks:
+            raise ValueError(f"duplicate task: {name}")
+        for dep in deps:
+            if dep not in self.tasks:
+                raise ValueError(f"task {name} depends on unknown task {dep}")
+        task = Task(name, func, tuple(deps), tuple(resources), estimate)
+        self.tasks[name] = task
+        return task
+
+    def _estimate(self, task: Task) -> float:
+        return self.default_estimate if task.estimate is None else task.estimate
+
+    def priorities(self) -> dict[str, float]:
+        """Estimated seconds from each task's start to the end of its longest downstream path."""
+        priorities: dict[str, float] = {}
+        # Insertion order is a topological order because deps must exist first.
+        for task in reversed(list(self.tasks.values())):
+            downstream = [priorities[t.name] for t in self._dependents(task.name)]
+            priorities[task.name] = self._estimate(task) + max(downstream, default=0.0)
+        return priorities
+
+    def _by_priority(self) -> list[Task]:
+        priorities = self.priorities()
+        return sorted(self.tasks.values(), key=lambda t: -priorities[t.name])
+
+    def _dependents(self, name: str) -> list[Task]:
+        return [task for task in self.tasks.values() if name in task.deps]
+
+    def _cancel_downstream(self, name: str) -> None:
+        stack = [name]
+        while stack:
+            for task in self._dependents(stack.pop()):
+                if task.status == PENDING:
+                    task.status = CANCELLED
+                    stack.append(task.name)
+
+    def _is_ready(self, task: Task) -> bool:
+        if task.status != PENDING:
+            return False
+        if any(self.tasks[dep].status != SUCCEEDED for dep in task.deps):
+            return False
+        return all(
+            self._in_use.get(resource, 0) < self.capacities.get(resource, 1)
+            for resource in task.resources
+        )
+
+    def _acquire(self, task: Task) -> None:
+        for resource in task.resources:
+            self._in_use[resource] = self._in_use.get(resource, 0) + 1
+
+    def _release(self, task: Task) -> None:
+        for resource in task.resources:
+            self._in_use[resource] -= 1
+
+    def _execute(self, task: Task) -> Any:
+        results = {dep: self.tasks[dep].result for dep in task.deps}
+        task.started_at = time.monotonic()
+        try:
+            return task.func(results)
+        finally:
+            task.finished_at = time.monotonic()
+
+    def run(self, on_progress: Callable[["TaskGraph"], None] | None = None) -> bool:
+        """
+        Run every task; return True when all of them succeeded.
+
+        on_progress is called after tasks start and after each batch of
+        completions, for example to print an updated ETA.
+        """
+        self._origin = time.monotonic()
+        running: dict[Future, Task] = {}
+        ordered = self._by_priority()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while True:
+                with self._lock:
+                    for task in ordered:
+                        if len(running) >= self.max_workers:
+                            break
+                        if not self._is_ready(task):
+                            continue
+                        self._acquire(task)
+                        task.status = RUNNING
+                        running[pool.submit(self._execute, task)] = task
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    with self._lock:
+                        self._release(task)
+                        try:
+                            task.result = future.result()
+                        except Exception as exc:
+                            task.error = exc
+                            task.result = None
+                        if task.result is None or task.result is False:
+                            task.status = FAILED
+                            self._cancel_downstream(task.name)
+                        else:
+                            task.status = SUCCEEDED
+
+                if on_progress is not None and running:
+                    on_progress(self)
+
+        # Anything still pending had an unsatisfiable dependency.
+        for task in self.tasks.values():
+            if task.status == PENDING:
+                task.status = CANCELLED
+
+        return all(task.status == SUCCEEDED for task in self.tasks.values())
+
+    def simulate(self) -> dict[str, tuple[float, float]]:
+        """
+        Predict (start, end) offsets from the run's origin for every task
+        that has run or may still run.
+
+        Finished tasks keep their real times, running tasks are assumed to
+        take their estimate (or to finish now when overdue), and pending tasks
+        are list-scheduled with the same priorities, worker limit and
+        resource capacities that run() uses.
+        """
+        now = time.monotonic()
+        origin = self._origin if self._origin is not None else now
+        clock = now - origin
+        schedule: dict[str, tuple[float, float]] = {}
+        finished: set[str] = set()
+        active: dict[str, float] = {}
+
+        with self._lock:
+            for task in self.tasks.values():
+                if task.status == SUCCEEDED:
+                    schedule[task.name] = (task.started_at - origin, task.finished_at - origin)
+                    finished.add(task.name)
+                elif task.status == RUNNING and task.started_at is not None:
+                    start = task.started_at - origin
+                    end = max(clock, start + self._estimate(task))
+                    schedule[task.name] = (start, end)
+                    active[task.name] = end
+            pending = [task for task in self._by_priority() if task.status == PENDING]
+
+        while True:
+            in_use: dict[str, int] = {}
+            for name in active:
+                for resource in self.tasks[name].resources:
+                    in_use[resource] = in_use.get(resource, 0) + 1
+            for task in list(pending):
+                if len(active) >= self.max_workers:
+                    break
+                if not all(dep in finished for dep in task.deps):
+                    continue
+                if any(
+                    in_use.get(resource, 0) >= self.capacities.get(resource, 1)
+                    for resource in task.resources
+                ):
+                    continue
+                for resource in task.resources:
+                    in_use[resource] = in_use.get(resource, 0) + 1
+                end = clock + self._estimate(task)
+                schedule[task.name] = (clock, end)
+                active[task.name] = end
+                pending.remove(task)
+
+            if not active:
+                break
+            clock = min(active.values())
+            for name in [name for name, end in active.items() if end <= clock]:
+                del active[name]
+                finished.add(name)
+
+        return schedule
+
+    def eta(self) -> float:
+        """Predicted seconds until the whole graph has finished."""
+        schedule = self.simulate()
+        if not schedule:
+            return 0.0
+        elapsed = time.monotonic() - self._origin if self._origin is not None else 0.0
+        return max(0.0, max(end for _, end in schedule.values()) - elapsed)
+
+    def completed_count(self) -> int:
+        return sum(
+            task.status in (SUCCEEDED, FAILED, CANCELLED) for task in self.tasks.values()
+        )
+
+    def plan_lines(self) -> list[str]:
+        """Format the predicted schedule of a graph that has not run yet."""
+        schedule = self.simulate()
+        name_width = max([len("Task")] + [len(name) for name in self.tasks])
+        lines = [f"{'Task':<{name_width}}  {'Start':>8}  {'End':>8}  {'Estimate':>9}"]
+        for name, (start, end) in sorted(schedule.items(), key=lambda item: item[1]):
+            estimate = self.tasks[name].estimate
+            estimate_text = f"{estimate:8.1f}s" if estimate is not None else "default"
+            lines.append(
+                f"{name:<{name_width}}  {start:7.1f}s  {end:7.1f}s  {estimate_text:>9}"
+            )
+        if schedule:
+            lines.append(
+                f"Predicted wall time: {max(end for _, end in schedule.values()):.0f}s "
+                f"with {self.max_workers} worker(s)"
+            )
+        return lines
+
+    def summary_lines(self) -> list[str]:
+        """Format a per-task timing table relative to the start of the run."""
+        origin = self._origin or 0.0
+        name_width = max([len("Task")] + [len(name) for name in self.tasks])
+        lines = [
+            f"{'Task':<{name_width}}  {'Status':<9}  {'Start':>8}  {'Duration':>9}"
+        ]
+        for task in self.tasks.values():
+            start = (
+                f"{task.started_at - origin:7.1f}s" if task.started_at is not None else "-"
+            )
+            duration = f"{task.duration:8.1f}s" if task.duration is not None else "-"
+            lines.append(
+                f"{task.name:<{name_width}}  {task.status:<9}  {start:>8}  {duration:>9}"
+            )
+            if task.error is not None:
+                lines.append(f"{'':<{name_width}}  error: {task.error}")
+
+        finished = [t.finished_at for t in self.tasks.values() if t.finished_at is not None]
+        if finished:
+            lines.append(f"Total wall time: {max(finished) - origin:.1f}s")
+        return lines
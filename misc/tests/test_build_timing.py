@@ -0,0 +1,120 @@
+"""Build timing reports from captured -showBuildTimingSummary logs (fixtures/build-timing*.log)."""
+
+from __future__ import annotations
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+MISC = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(MISC))
+
+import build_timing  # noqa: E402
+
+FIXTURES = MISC / "tests" / "fixtures"
+CURRENT_LOG = FIXTURES / "build-timing.log"
+PREVIOUS_LOG = FIXTURES / "build-timing-previous.log"
+
+
+def parse(path: Path) -> dict:
+    with path.open("r", encoding="utf-8") as f:
+        return build_timing.parse_build_log(f)
+
+
+class ParseBuildLogTests(unittest.TestCase):
+    def setUp(self):
+        self.report = parse(CURRENT_LOG)
+
+    def test_result_and_total(self):
+        self.assertIs(self.report["succeeded"], True)
+        self.assertEqual(self.report["total_seconds"], 70.4)
+
+    def test_phases_slowest_first(self):
+        self.assertEqual(
+            self.report["phases"],
+            {
+                "SwiftCompile": {"tasks": 5, "seconds": 50.0},
+                "CompileAssetCatalog": {"tasks": 1, "seconds": 6.0},
+                "Ld": {"tasks": 2, "seconds": 4.0},
+                "CodeSign": {"tasks": 2, "seconds": 2.0},
+                "SwiftEmitModule": {"tasks": 1, "seconds": 1.5},
+            },
+        )
+        self.assertEqual(
+            list(self.report["phases"]), ["SwiftCompile", "CompileAssetCatalog", "Ld", "CodeSign", "SwiftEmitModule"]
+        )
+
+    def test_targets_split_phase_time_by_task_count(self):
+        targets = self.report["targets"]
+        self.assertEqual(list(targets), ["KMReader", "Shared", "KMReaderWidgets"])
+        # 3/5 of SwiftCompile + all of CompileAssetCatalog + 1/2 of Ld and CodeSign.
+        self.assertEqual(targets["KMReader"]["estimated_seconds"], 39.0)
+        self.assertEqual(targets["Shared"]["estimated_seconds"], 12.0)
+        self.assertEqual(targets["KMReaderWidgets"]["estimated_seconds"], 11.0)
+        # Diagnostics that mention the target are not tasks.
+        self.assertEqual(
+            targets["KMReader"]["phases"], {"CodeSign": 1, "CompileAssetCatalog": 1, "Ld": 1, "SwiftCompile": 3}
+        )
+
+    def test_failed_build_without_summary(self):
+        report = build_timing.parse_build_log(["** BUILD FAILED **\n"])
+        self.assertEqual((report["succeeded"], report["total_seconds"], report["phases"]), (False, None, {}))
+        self.assertIn("No Build Timing Summary found in log.", build_timing.format_report(report))
+
+
+class FormatReportTests(unittest.TestCase):
+    def test_without_previous_run(self):
+        lines = build_timing.format_report(parse(CURRENT_LOG))
+        self.assertEqual(lines[0], "Total build time: 70.4s")
+        self.assertIn("SwiftCompile              5       50.0  ", lines)
+        self.assertIn("KMReader              6       39.0  ", lines)
+
+    def test_against_previous_run(self):
+        lines = build_timing.format_report(parse(CURRENT_LOG), parse(PREVIOUS_LOG))
+        self.assertEqual(
+            lines,
+            [
+                "Total build time: 70.4s  (+10.4s (+17%))",
+                "",
+                "Phase                 Tasks    Seconds  vs previous",
+                "SwiftCompile              5       50.0  +10.0s (+25%)",
+                "CompileAssetCatalog       1        6.0  +0.0s (+0%)",
+                "Ld                        2        4.0  -1.0s (-20%)",
+                "CodeSign                  2        2.0  +0.0s (+0%)",
+                "SwiftEmitModule           1        1.5  new",
+                "",
+                "Target            Tasks   Est. sec  vs previous",
+                "KMReader              6       39.0  -1.5s (-4%)",
+                "Shared                2       12.0  -0.5s (-4%)",
+                "KMReaderWidgets       2       11.0  new",
+            ],
+        )
+
+
+class RecordBuildTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="kmreader-build-timing-test-"))
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        patcher = mock.patch.object(build_timing, "reports_dir", return_value=self.tmp)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_each_build_is_compared_with_the_previous_one_for_its_platform(self):
+        report, previous = build_timing.record_build("ios", PREVIOUS_LOG)
+        self.assertIsNone(previous)
+        self.assertEqual(report["platform"], "ios")
+
+        report, previous = build_timing.record_build("ios", CURRENT_LOG)
+        self.assertEqual(previous["total_seconds"], 60.0)
+        self.assertEqual(previous["log"], str(PREVIOUS_LOG))
+        self.assertEqual(build_timing.load_report(self.tmp / "ios.json")["total_seconds"], 70.4)
+
+        _, previous = build_timing.record_build("macos", CURRENT_LOG)
+        self.assertIsNone(previous)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+"""Coverage history over a scratch git repository (catalog_history.history)."""
+
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import catalog_history  # noqa: E402
+import xcstrings  # noqa: E402
+
+CATALOG = "Localizable.xcstrings"
+GIT_ENV = {
+    "GIT_AUTHOR_NAME": "Test",
+    "GIT_AUTHOR_EMAIL": "test@example.com",
+    "GIT_COMMITTER_NAME": "Test",
+    "GIT_COMMITTER_EMAIL": "test@example.com",
+    "GIT_CONFIG_NOSYSTEM": "1",
+    "GIT_CONFIG_GLOBAL": os.devnull,
+}
+
+
+def catalog(translations: dict[str, dict[str, str]], source_language: str = "en") -> str:
+    strings = {}
+    for key, languages in translations.items():
+        strings[key] = xcstrings.Entry(
+            {language: xcstrings.Localization(xcstrings.TRANSLATED, value) for language, value in languages.items()}
+            or None
+        )
+    return xcstrings.dumps(xcstrings.Catalog(strings, source_language=source_language, version="1.0"))
+
+
+BASE = {"Library": {"de": "Bibliothek"}, "Read": {}, "Settings": {"de": "Einstellungen", "fr": "Réglages"}}
+ADDED = {**BASE, "Search": {}}
+TRANSLATED = {**ADDED, "Read": {"de": "Lesen"}}
+VERSIONS = [
+    ("base", catalog(BASE)),
+    ("add a key", catalog(ADDED)),
+    ("translate a key", catalog(TRANSLATED)),
+    # Conflict markers around the whole file: the entries still split cleanly.
+    ("conflict", "<<<<<<< HEAD\n" + catalog(TRANSLATED) + "\n=======\n>>>>>>> other\n"),
+    ("resolve", catalog(TRANSLATED)),
+    ("junk between entries", catalog(TRANSLATED).replace('\n    "Search"', '\n=======\n    "Search"')),
+    ("resolve again", catalog({**TRANSLATED, "Search": {"fr": "Rechercher"}})),
+    ("remove a key", catalog({key: value for key, value in TRANSLATED.items() if key != "Library"})),
+]
+
+
+class HistoryTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if shutil.which("git") is None:
+            raise unittest.SkipTest("git is not installed")
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="kmreader-history-test-"))
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        patcher = mock.patch.dict(os.environ, GIT_ENV)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.repo = self.tmp / "repo"
+        self.repo.mkdir()
+        self.git("init", "-q")
+        for subject, text in VERSIONS:
+            (self.repo / CATALOG).write_text(text, encoding="utf-8")
+            self.git("add", CATALOG)
+            self.git("commit", "-q", "-m", subject)
+        self.cache = self.tmp / "catalog-history.json"
+
+    def git(self, *args: str) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=self.repo, check=True, capture_output=True, text=True
+        ).stdout
+
+    def history(self) -> catalog_history.History:
+        return catalog_history.history(self.repo, CATALOG, cache=self.cache)
+
+    def test_every_version_matches_a_full_measure(self):
+        result = self.history()
+        self.assertEqual([commit.subject for commit in result.commits], [subject for subject, _ in VERSIONS])
+        self.assertEqual(result.measured, len(VERSIONS) - 1)  # "resolve" repeats the "translate a key" blob
+        for commit, coverage in result.rows():
+            with self.subTest(commit=commit.subject):
+                text = self.git("cat-file", "blob", commit.blob)
+                self.assertEqual(coverage.to_json(), catalog_history.measure(text).to_json())
+
+    def test_conflicted_versions_are_errors(self):
+        rows = {commit.subject: coverage for commit, coverage in self.history().rows()}
+        self.assertIsNotNone(rows["conflict"].error)
+        self.assertIsNotNone(rows["junk between entries"].error)
+        self.assertIsNone(rows["resolve again"].error)
+        self.assertEqual(rows["resolve again"].translated, {"de": 3, "fr": 2})
+
+    def test_rerun_reads_only_the_cache(self):
+        first = self.history()
+        second = self.history()
+        self.assertEqual(second.measured, 0)
+        self.assertEqual(
+            [coverage.to_json() for _, coverage in second.rows()],
+            [coverage.to_json() for _, coverage in first.rows()],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Format-specifier lint rules (catalog_lint.arguments/compare/lint_entry)."""
+
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import catalog_lint  # noqa: E402
+import xcstrings  # noqa: E402
+from catalog_lint import ERROR, WARNING  # noqa: E402
+
+
+def compare(source: str, translation: str, allow_missing: bool = False) -> list[tuple[str, str]]:
+    return catalog_lint.compare(catalog_lint.arguments(source)[0], translation, allow_missing)
+
+
+class ArgumentsTests(unittest.TestCase):
+    def test_flags_width_and_precision_are_not_part_of_the_type(self):
+        self.assertEqual(catalog_lint.arguments("%.1f of %@"), ({1: "f", 2: "@"}, None))
+        self.assertEqual(catalog_lint.arguments("%02d:%-5lld %+.3e"), ({1: "d", 2: "lld", 3: "e"}, None))
+        self.assertEqual(catalog_lint.arguments("%2$@ %1$.2f"), ({1: "f", 2: "@"}, None))
+
+    def test_star_width_takes_an_int_argument(self):
+        self.assertEqual(catalog_lint.arguments("%*d items, %@"), ({1: "d", 2: "d", 3: "@"}, None))
+
+    def test_escaped_percent_is_not_an_argument(self):
+        self.assertEqual(catalog_lint.arguments("100%% of %lld"), ({1: "lld"}, None))
+
+    def test_malformed_combinations(self):
+        self.assertEqual(
+            catalog_lint.arguments("%1$@ and %@")[1], "mixes positional (%1$@) and sequential (%@) specifiers"
+        )
+        self.assertEqual(catalog_lint.arguments("%1$@ %1$.1f")[1], "argument 1 used as both %@ and %f")
+
+
+class CompareTests(unittest.TestCase):
+    def test_reordered_sequential_arguments_with_precision(self):
+        self.assertEqual(
+            compare("%.1f of %@", "%@ de %.1f"),
+            [(ERROR, "argument 1 is %@, source has %f"), (ERROR, "argument 2 is %f, source has %@")],
+        )
+
+    def test_positional_argument_with_precision_changes_type(self):
+        self.assertEqual(compare("%1$.1f GB", "%1$@ GB"), [(ERROR, "argument 1 is %@, source has %f")])
+
+    def test_different_precision_is_fine(self):
+        self.assertEqual(compare("%.1f GB", "%.2f Go"), [])
+        self.assertEqual(compare("%1$@ of %2$.1f", "%2$.0f von %1$@"), [])
+
+    def test_missing_argument_is_a_warning_unless_allowed(self):
+        self.assertEqual(compare("%1$.1f of %2$@", "%2$@"), [(WARNING, "missing argument %1$f")])
+        self.assertEqual(compare("%lld books", "One book", allow_missing=True), [])
+
+    def test_extra_argument(self):
+        self.assertEqual(compare("Books", "%lld Bücher"), [(ERROR, "extra argument %1$lld not in source")])
+
+
+class LintEntryTests(unittest.TestCase):
+    def test_plural_cases_are_checked_against_the_source(self):
+        entry = xcstrings.parse_entry(
+            """{
+      "localizations" : {
+        "de" : {
+          "variations" : {
+            "plural" : {
+              "one" : {
+                "stringUnit" : {
+                  "state" : "translated",
+                  "value" : "Ein Buch"
+                }
+              },
+              "other" : {
+                "stringUnit" : {
+                  "state" : "translated",
+                  "value" : "%.1f Bücher"
+                }
+              }
+            }
+          }
+        }
+      }
+    }"""
+        )
+        issues = catalog_lint.lint_entry("%lld books", entry)
+        self.assertEqual(
+            [str(issue) for issue in issues],
+            ["error: '%lld books' [de/plural.other]: argument 1 is %f, source has %lld"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
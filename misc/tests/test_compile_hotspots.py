@@ -0,0 +1,122 @@
+"""Ranking and baseline checks of -debug-time-* frontend output (fixtures/compile-hotspots.log)."""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+MISC = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(MISC))
+
+import compile_hotspots  # noqa: E402
+from compile_hotspots import EXPRESSION_KIND, FUNCTION_KIND  # noqa: E402
+
+LOG = MISC / "tests" / "fixtures" / "compile-hotspots.log"
+PROJECT_ROOT = Path("/Users/ci/KMReader")
+READER = "KMReader/Features/Reader/ReaderView.swift"
+LIBRARY = "KMReader/Features/Library/LibraryView.swift"
+CHUNKED = "Shared/Extensions/Collection+Chunked.swift"
+
+
+def log_lines() -> list[str]:
+    return LOG.read_text(encoding="utf-8").splitlines(keepends=True)
+
+
+class RankTests(unittest.TestCase):
+    def setUp(self):
+        self.hotspots = compile_hotspots.parse_timings(log_lines(), PROJECT_ROOT)
+
+    def test_ranked_slowest_first_with_the_slowest_architecture(self):
+        ranked = compile_hotspots.rank(self.hotspots)
+        self.assertEqual(
+            [(h.location(), h.kind, h.ms) for h in ranked[:5]],
+            [
+                (f"{READER}:48:16", FUNCTION_KIND, 412.35),
+                (f"{READER}:61:29", EXPRESSION_KIND, 327.44),
+                (f"{LIBRARY}:33:16", FUNCTION_KIND, 142.07),
+                (f"{LIBRARY}:80:10", FUNCTION_KIND, 103.5),
+                (f"{CHUNKED}:9:17", FUNCTION_KIND, 96.4),
+            ],
+        )
+        self.assertEqual(len(ranked), 9)
+
+    def test_dependencies_and_files_outside_the_project_are_skipped(self):
+        self.assertFalse([h for h in self.hotspots if "SourcePackages" in h.file or h.file.startswith("/")])
+
+    def test_expressions_are_attributed_to_their_enclosing_function(self):
+        expressions = {h.location(): h.function for h in self.hotspots if h.kind == EXPRESSION_KIND}
+        self.assertEqual(expressions[f"{READER}:61:29"], "get {}")
+        self.assertEqual(expressions[f"{CHUNKED}:11:24"], "func chunked(into:)")
+        expression = next(h for h in self.hotspots if h.location() == f"{READER}:61:29")
+        self.assertEqual(expression.key, f"{READER}|{EXPRESSION_KIND}|get {{}}")
+
+    def test_threshold_and_file_totals(self):
+        self.assertEqual(len(compile_hotspots.rank(self.hotspots, 100.0)), 4)
+        self.assertEqual(
+            compile_hotspots.file_totals(self.hotspots),
+            [(READER, 0.04 + 412.35 + 6.12), (LIBRARY, 142.07 + 103.5), (CHUNKED, 96.4)],
+        )
+
+
+class BaselineTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="kmreader-hotspots-test-"))
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.baseline = self.tmp / "baseline.json"
+
+    def analyze(self, lines: list[str], threshold_ms: float = 100.0, update: bool = False) -> tuple[int, str]:
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            code = compile_hotspots.analyze(
+                lines, PROJECT_ROOT, self.baseline, threshold_ms=threshold_ms, update_baseline=update
+            )
+        return code, output.getvalue()
+
+    def test_baseline_records_only_hotspots_over_the_threshold(self):
+        self.assertEqual(self.analyze(log_lines(), update=True)[0], 0)
+        recorded = compile_hotspots.load_baseline(self.baseline)
+        self.assertEqual(recorded["threshold_ms"], 100.0)
+        self.assertEqual(
+            recorded["hotspots"],
+            {
+                f"{LIBRARY}|{FUNCTION_KIND}|func gridColumns(for:)": 103.5,
+                f"{LIBRARY}|{FUNCTION_KIND}|get {{}}": 142.1,
+                f"{READER}|{EXPRESSION_KIND}|get {{}}": 327.4,
+                f"{READER}|{FUNCTION_KIND}|get {{}}": 412.4,
+            },
+        )
+
+    def test_unchanged_build_passes_even_when_lines_move(self):
+        self.analyze(log_lines(), update=True)
+        moved = [line.replace("ReaderView.swift:61:29", "ReaderView.swift:75:29") for line in log_lines()]
+        code, output = self.analyze(moved)
+        self.assertEqual(code, 0)
+        self.assertIn("No new type-checking hotspots over 100ms.", output)
+
+    def test_new_hotspot_over_the_threshold_fails(self):
+        self.analyze(log_lines(), update=True)
+        slower = [line.replace("96.40ms", "180.00ms") for line in log_lines()]
+        code, output = self.analyze(slower)
+        self.assertEqual(code, 1)
+        self.assertIn("New type-checking hotspots over 100ms:", output)
+        self.assertIn(f"{CHUNKED}:9:17", output.split("New type-checking hotspots")[1])
+
+    def test_new_hotspot_under_the_threshold_passes(self):
+        self.analyze(log_lines(), update=True)
+        self.assertEqual(self.analyze(log_lines(), threshold_ms=150.0)[0], 0)
+        code, _ = self.analyze(log_lines(), threshold_ms=90.0)
+        self.assertEqual(code, 1)
+
+    def test_missing_baseline_is_not_a_failure(self):
+        code, output = self.analyze(log_lines())
+        self.assertEqual(code, 0)
+        self.assertIn("run with --update-baseline", output)
+
+
+if __name__ == "__main__":
+    unittest.main()
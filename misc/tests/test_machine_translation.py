@@ -0,0 +1,211 @@
+"""Autofill against the local stub endpoint (machine_translation._StubServer)."""
+
+from __future__ import annotations
+
+import json
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import machine_translation  # noqa: E402
+import translate  # noqa: E402
+import xcstrings  # noqa: E402
+from machine_translation import Cell  # noqa: E402
+
+CATALOG = """{
+  "sourceLanguage" : "en",
+  "strings" : {
+    "%lld books" : {
+      "localizations" : {
+        "de" : {
+          "variations" : {
+            "plural" : {
+              "one" : {
+                "stringUnit" : {
+                  "state" : "translated",
+                  "value" : "%lld Buch"
+                }
+              },
+              "other" : {
+                "stringUnit" : {
+                  "state" : "translated",
+                  "value" : "%lld Bücher"
+                }
+              }
+            }
+          }
+        }
+      }
+    },
+    "Library" : {
+      "localizations" : {
+        "de" : {
+          "stringUnit" : {
+            "state" : "translated",
+            "value" : "Bibliothek"
+          }
+        },
+        "fr" : {
+          "stringUnit" : {
+            "state" : "needs_review",
+            "value" : "Bibliothèque"
+          }
+        }
+      }
+    },
+    "Read %@" : {
+
+    }
+  },
+  "version" : "1.0"
+}"""
+
+
+def cells(count: int, language: str = "de") -> list[Cell]:
+    return [Cell(f"key {index}", language, f"Text {index} of %@") for index in range(count)]
+
+
+def quiet(_: str) -> None:
+    pass
+
+
+class DroppingBackend:
+    """Returns translations without their format specifiers."""
+
+    cache_id = "dropping"
+
+    def translate(self, source_language: str, target_language: str, texts: list[str]) -> list[str]:
+        return [text.replace("%@", "").strip() for text in texts]
+
+
+class StubServerTestCase(unittest.TestCase):
+    fail_every = 0
+
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="kmreader-mt-test-"))
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.server = machine_translation._StubServer(("127.0.0.1", 0), fail_every=self.fail_every)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.backend = machine_translation.HTTPBackend(f"http://127.0.0.1:{self.server.server_address[1]}/")
+
+    def autofill(self, cells: list[Cell], cache=None, **options) -> machine_translation.AutofillResult:
+        options = {"jobs": 2, "rate": 0, "batch_size": 5, "retry_delay": 0.01, "log": quiet, **options}
+        return machine_translation.autofill(cells, self.backend, cache=cache, **options)
+
+
+class AutofillTests(StubServerTestCase):
+    fail_every = 2
+
+    def test_failed_requests_are_retried(self):
+        result = self.autofill(cells(12))
+        self.assertEqual((result.failed, result.rejected), ([], []))
+        self.assertEqual(len(result.translations), 12)
+        self.assertEqual(result.translations[("key 3", "de")], "[de] Text 3 of %@")
+        # 3 batches; every second request is answered with 503 and retried.
+        self.assertEqual(result.requests, self.server.requests)
+        self.assertGreater(result.requests, 3)
+
+    def test_retries_are_bounded(self):
+        self.server.fail_every = 1
+        result = self.autofill(cells(3), retries=2)
+        self.assertEqual(len(result.failed), 1)
+        self.assertEqual(self.server.requests, 3)
+        self.assertIn("HTTP 503", result.failed[0][1])
+
+    def test_second_run_is_served_from_the_cache(self):
+        cache_path = self.tmp / "mt-cache.json"
+        first = self.autofill(cells(7), machine_translation.ResponseCache(self.backend.cache_id, cache_path))
+        self.assertEqual(first.cached, 0)
+        saved = json.loads(cache_path.read_text(encoding="utf-8"))
+        self.assertEqual(saved["version"], machine_translation.CACHE_VERSION)
+        self.assertEqual(len(saved["backends"][self.backend.cache_id]["de"]), 7)
+        requests = self.server.requests
+
+        second = self.autofill(cells(7), machine_translation.ResponseCache(self.backend.cache_id, cache_path))
+        self.assertEqual((second.cached, second.requests), (7, 0))
+        self.assertEqual(second.translations, first.translations)
+        self.assertEqual(self.server.requests, requests)
+
+        other = self.autofill(cells(7), machine_translation.ResponseCache("http:elsewhere", cache_path))
+        self.assertEqual(other.cached, 0)
+
+
+class RejectionTests(unittest.TestCase):
+    def test_translations_with_different_placeholders_are_rejected_and_not_cached(self):
+        tmp = Path(tempfile.mkdtemp(prefix="kmreader-mt-test-"))
+        self.addCleanup(shutil.rmtree, tmp, ignore_errors=True)
+        cache = machine_translation.ResponseCache(DroppingBackend.cache_id, tmp / "mt-cache.json")
+        result = machine_translation.autofill(cells(2), DroppingBackend(), cache=cache, rate=0, log=quiet)
+        self.assertEqual(result.translations, {})
+        self.assertEqual(
+            [(cell.key, value) for cell, value in result.rejected], [("key 0", "Text 0 of"), ("key 1", "Text 1 of")]
+        )
+        self.assertIsNone(cache.get("de", "Text 0 of %@"))
+
+    def test_placeholders_match(self):
+        self.assertTrue(machine_translation.placeholders_match("%1$@ of %2$lld", "%2$lld von %1$@"))
+        self.assertFalse(machine_translation.placeholders_match("%@ of %lld", "%@ von %@"))
+        self.assertTrue(machine_translation.placeholders_match("%.1f GB of %@", "%@ : %.2f Go"))
+        self.assertFalse(machine_translation.placeholders_match("%.1f GB of %@", "%@ GB"))
+        self.assertFalse(machine_translation.placeholders_match("%02d:%02d", "%02d:%@"))
+
+
+class CatalogWriteBackTests(StubServerTestCase):
+    def test_plural_and_review_cells_come_through_unchanged(self):
+        data = xcstrings.loads(CATALOG)
+        plural_before = xcstrings.dumps({"de": data.strings["%lld books"].localization("de")})
+        cells, skipped_review, skipped_variations = translate.autofill_cells(data, translate.find_missing(data))
+        self.assertEqual((skipped_review, skipped_variations), (1, 1))
+        self.assertNotIn(("%lld books", "de"), {(cell.key, cell.language) for cell in cells})
+
+        result = self.autofill(cells)
+        self.assertEqual((result.failed, result.rejected), ([], []))
+        touched = translate.apply_autofill(data, result.translations)
+
+        self.assertEqual(touched, {"%lld books", "Library", "Read %@"})
+        plural = data.strings["%lld books"]
+        self.assertEqual(xcstrings.dumps({"de": plural.localization("de")}), plural_before)
+        self.assertEqual(plural.localization("de").variations["plural"]["one"].value, "%lld Buch")
+        self.assertEqual(plural.localization("fr").value, "[fr] %lld books")
+        self.assertEqual(plural.localization("fr").state, xcstrings.NEEDS_REVIEW)
+        library = data.strings["Library"]
+        self.assertEqual(library.localization("fr").value, "Bibliothèque")
+        self.assertEqual(library.localization("de").state, xcstrings.TRANSLATED)
+        self.assertEqual(list(data.strings["Read %@"].localizations)[:2], ["de", "es"])
+
+
+class BatchingTests(unittest.TestCase):
+    def test_batches_split_by_language_count_and_characters(self):
+        mixed = cells(5) + cells(2, "fr") + [Cell("long", "de", "x" * 40)]
+        batches = machine_translation.make_batches(mixed, batch_size=3, batch_chars=60)
+        self.assertEqual(
+            [(batch.language, [cell.key for cell in batch.cells]) for batch in batches],
+            [
+                ("de", ["key 0", "key 1", "key 2"]),
+                ("de", ["key 3", "key 4"]),
+                ("de", ["long"]),
+                ("fr", ["key 0", "key 1"]),
+            ],
+        )
+
+    def test_rate_limiter_spaces_requests(self):
+        limiter = machine_translation.RateLimiter(rate=50)
+        started = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        # One token is available at once; the other five take 1/50s each.
+        self.assertGreaterEqual(time.monotonic() - started, 0.09)
+
+
+if __name__ == "__main__":
+    unittest.main()
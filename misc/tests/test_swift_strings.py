@@ -0,0 +1,54 @@
+"""Swift string-literal decoding and call-site extraction."""
+
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import swift_strings  # noqa: E402
+from swift_strings import PLACEHOLDER  # noqa: E402
+
+
+def calls(source: str) -> list[str]:
+    return [value for value, _ in swift_strings.extract(source)[0]]
+
+
+class ReadLiteralTests(unittest.TestCase):
+    def test_escapes_and_interpolation(self):
+        self.assertEqual(calls(r'Text("Tab\tquote\" \(count) \u{1F600}")'), [f'Tab\tquote" {PLACEHOLDER} \U0001F600'])
+
+    def test_raw_string(self):
+        self.assertEqual(calls(r'Text(#"a\n "b" \#(x)"#)'), [f'a\\n "b" {PLACEHOLDER}'])
+
+    def test_multiline_strips_delimiter_lines_and_indentation(self):
+        source = 'Text("""\n    foo\n    """)'
+        self.assertEqual(calls(source), ["foo"])
+
+    def test_multiline_keeps_relative_indentation_and_joins_continuations(self):
+        source = 'Text("""\n    first\n      second\n\n    third \\\n    line\n    """)'
+        self.assertEqual(calls(source), ["first\n  second\n\nthird line"])
+
+    def test_multiline_raw_string(self):
+        source = 'Text(#"""\n  raw \\n "quoted"\n  """#)'
+        self.assertEqual(calls(source), ['raw \\n "quoted"'])
+
+    def test_multiline_with_nested_multiline_interpolation(self):
+        source = 'Text("""\n  a \\("""\n    inner\n    """) b\n  """)'
+        self.assertEqual(calls(source), [f"a {PLACEHOLDER} b"])
+
+
+class ExtractTests(unittest.TestCase):
+    def test_comments_are_skipped(self):
+        source = '// Text("no")\n/* Text("no") /* nested */ */\nText("yes")'
+        self.assertEqual(swift_strings.extract(source), ([("yes", 3)], ["yes"]))
+
+    def test_only_localizing_calls_are_call_sites(self):
+        literals = swift_strings.extract('let a = "plain"\nString(localized: "key")\nString("other")')
+        self.assertEqual(literals, ([("key", 2)], ["key", "other", "plain"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+"""Upload stage against a stub xcrun that fails randomly (tests/stubs/xcrun)."""
+
+from __future__ import annotations
+
+import os
+import plistlib
+import shutil
+import sys
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+MISC = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(MISC))
+
+import upload_stage  # noqa: E402
+import xcode  # noqa: E402
+
+STUB = MISC / "tests" / "stubs" / "xcrun"
+PERMANENT_ERROR = 'ERROR ITMS-4238: "Redundant Binary Upload". build 503 already exists.'
+
+
+def write_ipa(path: Path, version: str = "1.2.0", build: str = "503") -> Path:
+    info = plistlib.dumps({"CFBundleShortVersionString": version, "CFBundleVersion": build})
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("Payload/KMReader.app/Info.plist", info)
+    return path
+
+
+class StubTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = Path(tempfile.mkdtemp(prefix="kmreader-upload-test-"))
+        self.addCleanup(shutil.rmtree, self.tmp, ignore_errors=True)
+        self.log = self.tmp / "xcrun.log"
+        self.environ(
+            KMREADER_XCRUN=str(STUB),
+            KMREADER_XCRUN_STUB_LOG=str(self.log),
+            KMREADER_XCRUN_STUB_SEED="3",
+        )
+
+    def environ(self, **values: str) -> None:
+        patcher = mock.patch.dict(os.environ, values)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def calls(self) -> int:
+        try:
+            return len(self.log.read_text(encoding="utf-8").splitlines())
+        except OSError:
+            return 0
+
+    def upload(self, retries: int) -> tuple[bool, int]:
+        cmd = upload_stage.altool_command(self.tmp / "app.ipa", "ios", "KEY", "ISSUER", "key.p8")
+        return upload_stage.upload_with_retry(cmd, "ios", retries=retries, retry_delay=0, log=lambda _: None)
+
+
+class UploadWithRetryTests(StubTestCase):
+    def test_random_transient_failures_are_retried_until_success(self):
+        self.environ(KMREADER_XCRUN_STUB_FAIL_RATE="0.7")
+        success, attempts = self.upload(retries=30)
+        self.assertTrue(success)
+        # Seed 3 fails twice before succeeding at a 70% failure rate.
+        self.assertEqual(attempts, 3)
+        self.assertEqual(self.calls(), 3)
+
+    def test_retries_are_bounded(self):
+        self.environ(KMREADER_XCRUN_STUB_FAIL_RATE="1")
+        self.assertEqual(self.upload(retries=3), (False, 4))
+        self.assertEqual(self.calls(), 4)
+
+    def test_permanent_failure_is_not_retried(self):
+        self.environ(KMREADER_XCRUN_STUB_FAIL_RATE="1", KMREADER_XCRUN_STUB_ERROR=PERMANENT_ERROR)
+        self.assertEqual(self.upload(retries=3), (False, 1))
+
+    def test_tempfail_exit_code_is_transient(self):
+        self.environ(
+            KMREADER_XCRUN_STUB_FAIL_RATE="1",
+            KMREADER_XCRUN_STUB_ERROR="unexpected failure",
+            KMREADER_XCRUN_STUB_EXIT="75",
+        )
+        self.assertEqual(self.upload(retries=2), (False, 3))
+
+
+class TransientClassificationTests(unittest.TestCase):
+    def test_build_and_version_numbers_are_not_server_errors(self):
+        self.assertFalse(upload_stage.is_transient(1, PERMANENT_ERROR))
+        self.assertFalse(upload_stage.is_transient(1, "CFBundleShortVersionString [1.0.503] must be higher"))
+
+    def test_http_status_errors_are_transient(self):
+        for output in ("HTTP status code 503", "HTTP/1.1 502 Bad Gateway", "statusCode=500", "status: 504"):
+            with self.subTest(output=output):
+                self.assertTrue(upload_stage.is_transient(1, output))
+
+
+class BuildRunnerUploadTests(StubTestCase):
+    def setUp(self):
+        super().setUp()
+        key = self.tmp / "AuthKey.p8"
+        key.write_text("key", encoding="utf-8")
+        self.environ(
+            APP_STORE_CONNECT_API_KEY_PATH=str(key),
+            APP_STORE_CONNECT_API_KEY_ID="KEY",
+            APP_STORE_CONNECT_API_ISSUER_ID="ISSUER",
+            KMREADER_XCRUN_STUB_FAIL_RATE="0.5",
+        )
+        self.artifact = write_ipa(self.tmp / "KMReader-iOS.ipa")
+        self.runner = xcode.BuildRunner(project=str(self.tmp / "KMReader.xcodeproj"))
+        self.runner.upload_status = upload_stage.UploadStatus(self.tmp / "upload-status.json")
+
+    def upload(self, force: bool = False) -> bool:
+        with mock.patch("builtins.print"):
+            return self.runner.upload(
+                str(self.artifact), "ios", load_env=False, retries=30, retry_delay=0, force=force
+            )
+
+    def test_rerun_skips_an_uploaded_build(self):
+        self.assertTrue(self.upload())
+        first_run_calls = self.calls()
+        self.assertGreaterEqual(first_run_calls, 1)
+        entry = upload_stage.UploadStatus(self.tmp / "upload-status.json").get("ios:1.2.0(503)")
+        self.assertEqual(entry["status"], "uploaded")
+        self.assertEqual(entry["attempts"], first_run_calls)
+
+        self.assertTrue(self.upload())
+        self.assertEqual(self.calls(), first_run_calls)
+
+        self.assertTrue(self.upload(force=True))
+        self.assertGreater(self.calls(), first_run_calls)
+
+    def test_failed_upload_is_retried_on_rerun(self):
+        self.environ(KMREADER_XCRUN_STUB_FAIL_RATE="1", KMREADER_XCRUN_STUB_ERROR=PERMANENT_ERROR)
+        self.assertFalse(self.upload())
+        self.assertEqual(self.runner.upload_status.get("ios:1.2.0(503)")["status"], "failed")
+
+        self.environ(KMREADER_XCRUN_STUB_FAIL_RATE="0")
+        self.assertTrue(self.upload())
+        self.assertTrue(self.runner.upload_status.is_uploaded("ios:1.2.0(503)"))
+
+
+if __name__ == "__main__":
+    unittest.main()
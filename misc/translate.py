@@ -1,27 +1,25 @@
 #!/usr/bin/env python3
 
-import json
 import os
 import argparse
+import csv
+import json
 import sys
 
-from localize_sort import sort_keys
+import catalog_check
+import catalog_exchange
+import catalog_git
+import catalog_history
+import catalog_lint
+import machine_translation
+import swift_strings
+import translation_memory
+import xcstrings
 
 
 # Path to the xcstrings file relative to the project root
 XISTRINGS_PATH = "KMReader/Localizable.xcstrings"
-REQUIRED_LANGUAGES = [
-    "de",
-    "en",
-    "es",
-    "fr",
-    "it",
-    "ja",
-    "ko",
-    "ru",
-    "zh-Hans",
-    "zh-Hant",
-]
+REQUIRED_LANGUAGES = list(xcstrings.LOCALIZATION_KEY_ORDER)
 
 
 def eprint(*args, **kwargs):
@@ -38,57 +36,276 @@ def get_project_root():
 
 
 def load_data(file_path):
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return xcstrings.load(file_path)
 
 
 def save_data(file_path, data):
-    with open(file_path, "w", encoding="utf-8") as f:
-        # Match Xcode formatting: 2 space indent, space BEFORE and AFTER colon
-        json.dump(data, f, indent=2, ensure_ascii=False, separators=(",", " : "))
+    # Xcode formatting: 2 space indent, space BEFORE and AFTER colon
+    xcstrings.save(file_path, data)
 
 
 def sort_strings(data):
-    strings = data.get("strings")
-    if not isinstance(strings, dict):
-        return
-    data["strings"] = {key: strings[key] for key in sort_keys(strings.keys())}
+    data.sort_strings()
 
 
 def find_missing(data):
     missing = []
-    strings = data.get("strings", {})
-    for key, value in strings.items():
-        if value.get("shouldTranslate") is False:
+    for key, entry in data.strings.items():
+        if not entry.translatable:
             continue
 
-        localizations = value.get("localizations", {})
-        missing_langs = []
-        for lang in REQUIRED_LANGUAGES:
-            if lang not in localizations:
-                missing_langs.append(lang)
-                continue
-
-            loc = localizations[lang]
-            if (
-                not loc
-                or "stringUnit" not in loc
-                or loc.get("stringUnit", {}).get("state") != "translated"
-            ):
-                missing_langs.append(lang)
-
+        missing_langs = entry.missing_languages(REQUIRED_LANGUAGES)
         if missing_langs:
             missing.append((key, missing_langs))
 
     return missing
 
 
+def load_checked_data(project_root, file_path, since=None):
+    """The whole catalog, or only the keys added or modified since a git revision."""
+    if not since:
+        return load_data(file_path)
+    try:
+        diff = catalog_git.diff_since(project_root, since, file_path)
+    except ValueError as exc:
+        eprint(f"Error: {exc}")
+        sys.exit(1)
+    eprint(f"Changes since {since}: {diff.summary()}")
+    return diff.changed_catalog()
+
+
+def suggest_translations(memory, data, missing, top, min_score):
+    suggestions = {}
+    for key, langs in missing:
+        entry = data.strings.get(key)
+        suggestions[key] = memory.suggest(
+            translation_memory.source_text(key, entry) if entry else key,
+            langs,
+            top=top,
+            min_score=min_score,
+            exclude=key,
+        )
+    return suggestions
+
+
+def autofill_cells(data, missing):
+    """
+    Cells machine translation may fill: absent or untranslated, never pending
+    review, and never plural/device variations (they have no single stringUnit).
+    """
+    cells = []
+    skipped_review = 0
+    skipped_variations = 0
+    for key, langs in missing:
+        entry = data.strings[key]
+        source = translation_memory.source_text(key, entry)
+        for lang in langs:
+            if lang == machine_translation.SOURCE_LANGUAGE:
+                continue
+            localization = entry.localization(lang)
+            if localization is not None and localization.state == xcstrings.NEEDS_REVIEW:
+                skipped_review += 1
+                continue
+            if localization is not None and not localization.has_unit:
+                skipped_variations += 1
+                continue
+            cells.append(machine_translation.Cell(key, lang, source))
+    return cells, skipped_review, skipped_variations
+
+
+def apply_autofill(data, translations):
+    """Write machine translations as needs_review; returns the keys that changed."""
+    touched = set()
+    for (key, lang), value in translations.items():
+        localizations = data.strings[key].ensure_localizations()
+        localization = localizations.get(lang)
+        if localization is None:
+            localizations[lang] = xcstrings.Localization(xcstrings.NEEDS_REVIEW, value)
+        elif localization.has_unit:
+            # Update in place so substitutions and other extra keys survive.
+            localization.state = xcstrings.NEEDS_REVIEW
+            localization.value = value
+        else:
+            continue
+        touched.add(key)
+    for key in touched:
+        entry = data.strings[key]
+        entry.localizations = xcstrings.sort_localizations(entry.localizations)
+    return touched
+
+
 def main():
     parser = argparse.ArgumentParser(description="Translation utility for KMReader")
     subparsers = parser.add_subparsers(dest="command", help="Commands")
 
     # List command
-    subparsers.add_parser("list", help="List missing translations")
+    list_parser = subparsers.add_parser("list", help="List missing translations")
+    list_parser.add_argument(
+        "--since",
+        metavar="REV",
+        help="Only check keys added or modified since a git revision (e.g. HEAD in a pre-commit hook)",
+    )
+
+    # Check command
+    check_parser = subparsers.add_parser(
+        "check", help="Stream the catalog once and verify Xcode formatting, ordering and required fields"
+    )
+    check_parser.add_argument(
+        "paths", nargs="*", help=f"Catalogs to check (default: {XISTRINGS_PATH})"
+    )
+    check_parser.add_argument(
+        "--max",
+        type=int,
+        default=catalog_check.DEFAULT_MAX_VIOLATIONS,
+        help="Stop after this many violations per file",
+    )
+
+    # Lint command
+    lint_parser = subparsers.add_parser(
+        "lint", help="Check format specifiers of every translation against the source"
+    )
+    lint_parser.add_argument(
+        "--since", metavar="REV", help="Only lint keys added or modified since a git revision"
+    )
+    lint_parser.add_argument(
+        "--strict", action="store_true", help="Also fail on warnings (translations missing an argument)"
+    )
+
+    # Scan command
+    scan_parser = subparsers.add_parser(
+        "scan", help="Cross-reference Swift string literals with the catalogs (no Xcode needed)"
+    )
+    scan_parser.add_argument("--jobs", type=int, help="Worker processes (default: CPU count)")
+    scan_parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    scan_parser.add_argument(
+        "--strict", action="store_true", help="Fail if any unused key or unextracted literal is found"
+    )
+
+    # Suggest command
+    suggest_parser = subparsers.add_parser(
+        "suggest", help="Suggest translations from similar translated keys"
+    )
+    suggest_parser.add_argument(
+        "keys", nargs="*", help="Keys to look up (default: every key with missing translations)"
+    )
+    suggest_parser.add_argument("--top", type=int, default=3, help="Suggestions per language")
+    suggest_parser.add_argument(
+        "--min-score",
+        type=float,
+        default=translation_memory.DEFAULT_MIN_SCORE,
+        help="Minimum trigram similarity (0-1)",
+    )
+    suggest_parser.add_argument(
+        "--since", metavar="REV", help="Only keys added or modified since a git revision"
+    )
+    suggest_parser.add_argument("--json", action="store_true", help="Print suggestions as JSON")
+
+    # Autofill command
+    autofill_parser = subparsers.add_parser(
+        "autofill", help="Machine-translate missing cells and mark them needs_review"
+    )
+    autofill_parser.add_argument(
+        "keys", nargs="*", help="Keys to fill (default: every key with missing translations)"
+    )
+    autofill_parser.add_argument(
+        "--since", metavar="REV", help="Only keys added or modified since a git revision"
+    )
+    autofill_parser.add_argument(
+        "--language", dest="languages", action="append", help="Only fill this language (repeatable)"
+    )
+    autofill_parser.add_argument(
+        "--backend",
+        choices=sorted(machine_translation.BACKENDS),
+        default="http",
+        help="Translation backend (default: http)",
+    )
+    autofill_parser.add_argument(
+        "--endpoint", help=f"HTTP backend URL (default: ${machine_translation.ENDPOINT_ENV})"
+    )
+    autofill_parser.add_argument(
+        "--jobs", type=int, default=machine_translation.DEFAULT_JOBS, help="Concurrent requests"
+    )
+    autofill_parser.add_argument(
+        "--rate", type=float, default=machine_translation.DEFAULT_RATE, help="Requests per second (0: unlimited)"
+    )
+    autofill_parser.add_argument(
+        "--batch-size", type=int, default=machine_translation.DEFAULT_BATCH_SIZE, help="Texts per request"
+    )
+    autofill_parser.add_argument(
+        "--batch-chars", type=int, default=machine_translation.DEFAULT_BATCH_CHARS, help="Characters per request"
+    )
+    autofill_parser.add_argument(
+        "--retries", type=int, default=machine_translation.DEFAULT_RETRIES, help="Retries per batch"
+    )
+    autofill_parser.add_argument("--no-cache", action="store_true", help="Ignore the response cache")
+    autofill_parser.add_argument(
+        "--dry-run", action="store_true", help="Show what would be translated without sending anything"
+    )
+
+    # Export command
+    export_parser = subparsers.add_parser(
+        "export", help="Export cells for CAT tools as NDJSON or XLIFF"
+    )
+    export_parser.add_argument(
+        "--format", choices=catalog_exchange.FORMATS, default="ndjson", help="Output format (default: ndjson)"
+    )
+    export_parser.add_argument(
+        "--language",
+        dest="languages",
+        action="append",
+        help="Export this language (repeatable; default: every target language)",
+    )
+    export_parser.add_argument(
+        "--state",
+        dest="states",
+        action="append",
+        choices=catalog_exchange.STATES,
+        help="Only cells in this state (repeatable)",
+    )
+    export_parser.add_argument(
+        "--missing", action="store_true", help="Only cells that are not translated yet"
+    )
+    export_parser.add_argument(
+        "-o",
+        "--output",
+        help="Output file (default: stdout); a directory of <language>.xliff files for XLIFF with several languages",
+    )
+
+    # Import command
+    import_parser = subparsers.add_parser(
+        "import", help="Import NDJSON or XLIFF cells in a single write"
+    )
+    import_parser.add_argument("files", nargs="+", help="Files to import ('-' reads NDJSON from stdin)")
+    import_parser.add_argument(
+        "--format", choices=("auto", "ndjson", "xliff"), default="auto", help="Input format (default: by extension)"
+    )
+    import_parser.add_argument(
+        "--force", action="store_true", help="Apply cells even if they changed in the catalog since export"
+    )
+    import_parser.add_argument(
+        "--dry-run", action="store_true", help="Report what would change without writing"
+    )
+
+    # History command
+    history_parser = subparsers.add_parser(
+        "history", help="Translated/missing counts per language at every commit that changed the catalog"
+    )
+    history_parser.add_argument("rev", nargs="?", default="HEAD", help="Revision whose history to walk (default: HEAD)")
+    history_parser.add_argument(
+        "--catalog", default=XISTRINGS_PATH, help=f"Catalog path in the repository (default: {XISTRINGS_PATH})"
+    )
+    history_parser.add_argument(
+        "--language",
+        dest="languages",
+        action="append",
+        help="Report this language (repeatable; default: every required language)",
+    )
+    history_parser.add_argument("--format", choices=("csv", "json"), default="csv", help="Output format (default: csv)")
+    history_parser.add_argument("--max-count", type=int, help="Only the newest N commits that changed the catalog")
+    history_parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    history_parser.add_argument(
+        "--no-cache", action="store_true", help="Ignore and do not update .build/misc/catalog-history.json"
+    )
 
     # Update command
     update_parser = subparsers.add_parser(
@@ -115,9 +332,8 @@ def main():
         eprint(f"Error: Could not find {XISTRINGS_PATH} at {file_path}")
         sys.exit(1)
 
-    data = load_data(file_path)
-
     if args.command == "list":
+        data = load_checked_data(project_root, file_path, args.since)
         missing = find_missing(data)
         if not missing:
             eprint("No missing translations found.")
@@ -126,19 +342,313 @@ def main():
             for key, langs in missing:
                 print(f"  - {key} ({', '.join(langs)})")
 
+    elif args.command == "check":
+        failed = False
+        for name in args.paths or [XISTRINGS_PATH]:
+            path = name if args.paths else file_path
+            try:
+                checker = catalog_check.check_file(path, args.max)
+            except (OSError, UnicodeDecodeError) as e:
+                eprint(f"Error: Could not read {name}: {e}")
+                sys.exit(1)
+            if not checker.violations:
+                eprint(f"{name}: {checker.entries} keys, formatting and order OK.")
+            else:
+                failed = True
+                more = " (stopped early)" if checker.truncated else ""
+                eprint(f"{name}: {len(checker.violations)} violations{more}:")
+                for violation in checker.violations:
+                    print(f"  {name}:{violation.line}: {violation}")
+        if not checker.check_key_order:
+            eprint("Note: key order was not checked; Finder's comparator is only available on macOS.")
+        if failed:
+            sys.exit(1)
+
+    elif args.command == "lint":
+        if args.since:
+            data = load_checked_data(project_root, file_path, args.since)
+            issues = catalog_lint.lint_catalog(data)
+            eprint(f"Linted {len(data.strings)} changed keys.")
+        else:
+            result = catalog_lint.lint_file(file_path)
+            issues = result.issues
+            eprint(f"Linted {result.linted} keys ({result.cached} unchanged, from cache).")
+        if not issues:
+            eprint("No format specifier problems found.")
+        else:
+            errors = [issue for issue in issues if issue.severity == catalog_lint.ERROR]
+            eprint(
+                f"Found {len(errors)} errors and {len(issues) - len(errors)} warnings "
+                f"in {len({issue.key for issue in issues})} keys:"
+            )
+            for issue in issues:
+                print(f"  - {issue}")
+            if errors or args.strict:
+                sys.exit(1)
+
+    elif args.command == "scan":
+        result = swift_strings.scan(jobs=args.jobs)
+        eprint(f"Scanned {result.scanned} Swift files ({result.cached} unchanged, from cache).")
+        report = {}
+        for catalog_path, dirs in swift_strings.CATALOG_SOURCES.items():
+            path = os.path.join(project_root, catalog_path)
+            if not os.path.exists(path):
+                continue
+            unused, unextracted = swift_strings.cross_reference(load_data(path), result, dirs)
+            report[catalog_path] = (unused, unextracted)
+        if args.json:
+            print(json.dumps(
+                {
+                    catalog_path: {
+                        "unused": unused,
+                        "unextracted": [
+                            {"file": file, "line": line, "literal": swift_strings.display(value)}
+                            for file, value, line in unextracted
+                        ],
+                    }
+                    for catalog_path, (unused, unextracted) in report.items()
+                },
+                ensure_ascii=False,
+                indent=2,
+            ))
+        found = False
+        for catalog_path, (unused, unextracted) in report.items():
+            if not unused and not unextracted:
+                eprint(f"{catalog_path}: every key is used and every localized literal is extracted.")
+                continue
+            found = True
+            if args.json:
+                continue
+            if unused:
+                eprint(f"{catalog_path}: {len(unused)} keys not found in Swift sources:")
+                for key in unused:
+                    print(f"  - {key}")
+            if unextracted:
+                eprint(f"{catalog_path}: {len(unextracted)} localized literals not in the catalog:")
+                for file, value, line in unextracted:
+                    print(f"  - {file}:{line}: {swift_strings.display(value)}")
+        if found and args.strict:
+            sys.exit(1)
+
+    elif args.command == "suggest":
+        if args.keys:
+            # Keys need not be in the catalog yet; unknown keys are looked up as text.
+            data = load_data(file_path)
+            missing = [(key, REQUIRED_LANGUAGES) for key in args.keys]
+        else:
+            data = load_checked_data(project_root, file_path, args.since)
+            missing = find_missing(data)
+
+        memory = translation_memory.load(file_path)
+        eprint(
+            f"Translation memory: {len(memory.documents)} keys "
+            f"({memory.indexed} indexed, {memory.reused} cached)"
+        )
+        suggestions = suggest_translations(memory, data, missing, args.top, args.min_score)
+
+        if args.json:
+            print(
+                json.dumps(
+                    {
+                        key: {
+                            lang: [match.to_json() for match in matches]
+                            for lang, matches in by_lang.items()
+                        }
+                        for key, by_lang in suggestions.items()
+                    },
+                    indent=2,
+                    ensure_ascii=False,
+                )
+            )
+        elif not suggestions:
+            eprint("No missing translations found.")
+        else:
+            for key, by_lang in suggestions.items():
+                print(f"- {key}")
+                for lang, matches in by_lang.items():
+                    if not matches:
+                        print(f"    {lang}: (no similar translated keys)")
+                        continue
+                    for match in matches:
+                        print(f"    {lang}: {match.value!r}  [{match.score:.2f} {match.key!r}]")
+
+    elif args.command == "autofill":
+        data = load_data(file_path)
+        if args.keys:
+            unknown = [key for key in args.keys if key not in data.strings]
+            if unknown:
+                eprint(f"Error: keys not found: {unknown}")
+                sys.exit(1)
+            subset = xcstrings.Catalog(strings={key: data.strings[key] for key in args.keys})
+        elif args.since:
+            subset = load_checked_data(project_root, file_path, args.since)
+        else:
+            subset = data
+        missing = find_missing(subset)
+        if args.languages:
+            missing = [
+                (key, [lang for lang in langs if lang in args.languages]) for key, langs in missing
+            ]
+        cells, skipped_review, skipped_variations = autofill_cells(data, missing)
+        if skipped_review:
+            eprint(f"Skipping {skipped_review} cells already awaiting review (needs_review).")
+        if skipped_variations:
+            eprint(f"Skipping {skipped_variations} cells with plural/device variations.")
+        if not cells:
+            eprint("Nothing to translate.")
+            return
+
+        batches = machine_translation.make_batches(cells, args.batch_size, args.batch_chars)
+        if args.dry_run:
+            eprint(f"Would translate {len(cells)} cells in {len(batches)} batches:")
+            for batch in batches:
+                print(f"  {batch.language}: {len(batch.cells)} texts, {sum(map(len, batch.texts))} chars")
+            return
+
+        try:
+            backend = machine_translation.make_backend(args.backend, args.endpoint)
+        except ValueError as exc:
+            eprint(f"Error: {exc}")
+            sys.exit(1)
+        cache = None if args.no_cache else machine_translation.ResponseCache(backend.cache_id)
+        result = machine_translation.autofill(
+            cells,
+            backend,
+            cache=cache,
+            jobs=args.jobs,
+            rate=args.rate,
+            batch_size=args.batch_size,
+            batch_chars=args.batch_chars,
+            retries=args.retries,
+            log=eprint,
+        )
+
+        touched = apply_autofill(data, result.translations)
+        if touched:
+            save_data(file_path, data)
+
+        eprint(
+            f"Filled {len(result.translations)} cells in {len(touched)} keys as needs_review "
+            f"({result.cached} from cache, {result.requests} requests)."
+        )
+        for cell, value in result.rejected:
+            eprint(f"  rejected {cell.language} for '{cell.key}': placeholders differ: {value!r}")
+        for batch, error in result.failed:
+            eprint(f"  failed {batch.language} batch of {len(batch.cells)}: {error}")
+        if result.rejected or result.failed:
+            sys.exit(1)
+
+    elif args.command == "export":
+        languages = args.languages or [
+            lang for lang in REQUIRED_LANGUAGES if lang != catalog_exchange.SOURCE_LANGUAGE
+        ]
+
+        def cells(langs):
+            return catalog_exchange.iter_cells(file_path, langs, args.states, args.missing)
+
+        try:
+            if args.format == "ndjson":
+                if args.output:
+                    with open(args.output, "w", encoding="utf-8") as out:
+                        count = catalog_exchange.write_ndjson(cells(languages), out)
+                else:
+                    count = catalog_exchange.write_ndjson(cells(languages), sys.stdout)
+            else:
+                write = catalog_exchange.WRITERS[args.format]
+                if len(languages) == 1 and not (args.output and os.path.isdir(args.output)):
+                    if args.output:
+                        with open(args.output, "w", encoding="utf-8") as out:
+                            count = write(cells(languages), languages[0], out, XISTRINGS_PATH)
+                    else:
+                        count = write(cells(languages), languages[0], sys.stdout, XISTRINGS_PATH)
+                else:
+                    # XLIFF 2.0 has one target language per document; 1.2 follows suit for CAT tools.
+                    if not args.output:
+                        eprint("Error: XLIFF export of several languages needs --output <directory>")
+                        sys.exit(1)
+                    os.makedirs(args.output, exist_ok=True)
+                    count = 0
+                    for lang in languages:
+                        with open(os.path.join(args.output, f"{lang}.xliff"), "w", encoding="utf-8") as out:
+                            count += write(cells([lang]), lang, out, XISTRINGS_PATH)
+        except (OSError, xcstrings.CatalogError) as e:
+            eprint(f"Error: {e}")
+            sys.exit(1)
+        eprint(f"Exported {count} cells ({', '.join(languages)}).")
+
+    elif args.command == "import":
+        def read(name):
+            fmt = args.format
+            if fmt == "auto":
+                fmt = "xliff" if name.lower().endswith((".xliff", ".xlf", ".xml")) else "ndjson"
+            if name == "-":
+                yield from catalog_exchange.read_ndjson(sys.stdin)
+            elif fmt == "xliff":
+                with open(name, "rb") as f:
+                    yield from catalog_exchange.read_xliff(f)
+            else:
+                with open(name, "r", encoding="utf-8") as f:
+                    yield from catalog_exchange.read_ndjson(f)
+
+        def records():
+            for name in args.files:
+                yield from read(name)
+
+        try:
+            result = catalog_exchange.apply_cells(file_path, records(), args.force, args.dry_run)
+        except (OSError, ValueError, SyntaxError) as e:
+            # ParseError from malformed XLIFF is a SyntaxError.
+            eprint(f"Error: {e}")
+            sys.exit(1)
+        verb = "Would import" if args.dry_run else "Imported"
+        eprint(
+            f"{verb} {len(result.applied)} cells "
+            f"({result.unchanged} unchanged, {result.empty} without a translation)."
+        )
+        for title, items in (("Conflicts", result.conflicts), ("Rejected", result.rejected)):
+            if items:
+                eprint(f"{title} ({len(items)}):")
+                for cell, reason in items:
+                    print(f"  - {cell.key} ({cell.language}): {reason}")
+        if result.conflicts or result.rejected:
+            sys.exit(1)
+
+    elif args.command == "history":
+        try:
+            result = catalog_history.history(
+                project_root, args.catalog, args.rev, args.max_count, use_cache=not args.no_cache
+            )
+        except (OSError, ValueError) as e:
+            eprint(f"Error: {e}")
+            sys.exit(1)
+        languages = args.languages or REQUIRED_LANGUAGES
+        out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+        try:
+            if args.format == "json":
+                json.dump(catalog_history.json_rows(result, languages), out, ensure_ascii=False, indent=2)
+                out.write("\n")
+            else:
+                csv.writer(out, lineterminator="\n").writerows(catalog_history.csv_rows(result, languages))
+        finally:
+            if args.output:
+                out.close()
+        blobs = {commit.blob for commit in result.commits if commit.blob is not None}
+        eprint(
+            f"{len(result.commits)} commits changed {args.catalog}: "
+            f"{result.measured} catalog versions measured, {len(blobs) - result.measured} from cache."
+        )
+
     elif args.command == "update":
+        data = load_data(file_path)
         key = args.key
-        if key not in data["strings"]:
+        if key not in data.strings:
             eprint(
-                f"Key '{key}' not found in strings. Available keys (first 10): {list(data['strings'].keys())[:10]}",
+                f"Key '{key}' not found in strings. Available keys (first 10): {list(data.strings.keys())[:10]}",
             )
-            eprint(f"Total keys: {len(data['strings'])}")
-            data["strings"][key] = {"localizations": {}}
-
-        if "localizations" not in data["strings"][key]:
-            data["strings"][key]["localizations"] = {}
+            eprint(f"Total keys: {len(data.strings)}")
+            data.strings[key] = xcstrings.Entry(localizations={})
 
-        localizations = data["strings"][key]["localizations"]
+        localizations = data.strings[key].ensure_localizations()
         eprint(f"Existing translations for '{key}': {list(localizations.keys())}")
 
         translations = {
@@ -157,9 +667,7 @@ def main():
         updated_langs = []
         for lang, value in translations.items():
             if value is not None and value.strip() != "":
-                localizations[lang] = {
-                    "stringUnit": {"state": "translated", "value": value}
-                }
+                localizations[lang] = xcstrings.Localization(xcstrings.TRANSLATED, value)
                 updated_langs.append(lang)
 
         if updated_langs:
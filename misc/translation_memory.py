@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Translation memory over Localizable.xcstrings for `translate.py suggest`.
+
+Every key's English source text is split into character trigrams and put in
+an inverted index. A query touches only the posting lists of its rarest
+trigrams (prefix filtering), so finding similar keys never scans the whole
+catalog. The index is cached in .build/misc/translation-memory.json together
+with a digest per entry; when the catalog changes only the entries whose
+digest changed are re-indexed.
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+import json_cache
+import xcstrings
+
+NGRAM = 3
+CACHE_VERSION = 2
+DEFAULT_MIN_SCORE = 0.3
+SOURCE_LANGUAGE = "en"
+_WHITESPACE = re.compile(r"\s+")
+
+
+def cache_path() -> Path:
+    return json_cache.cache_path("translation-memory.json")
+
+
+def normalize(text: str) -> str:
+    """Lowercase, drop format specifiers and collapse whitespace."""
+    text = xcstrings.FORMAT_SPECIFIER.sub(" ", text.lower())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def ngrams(text: str) -> frozenset[str]:
+    padded = f" {normalize(text)} "
+    if len(padded) < NGRAM:
+        return frozenset()
+    return frozenset(padded[index:index + NGRAM] for index in range(len(padded) - NGRAM + 1))
+
+
+def source_text(key: str, entry: xcstrings.Entry) -> str:
+    """The English text of an entry: its translated en value, else the key itself."""
+    localization = entry.localization(SOURCE_LANGUAGE)
+    if localization is not None and localization.has_unit and localization.value:
+        return localization.value
+    return key
+
+
+class Document:
+    __slots__ = ("key", "digest", "source", "grams", "translations")
+
+    def __init__(self, key: str, digest: str, source: str, translations: dict[str, str]):
+        self.key = key
+        self.digest = digest
+        self.source = source
+        self.grams = ngrams(source)
+        self.translations = translations
+
+    @classmethod
+    def from_entry(cls, key: str, digest: str, entry: xcstrings.Entry) -> "Document":
+        translations = {}
+        if entry.translatable:
+            for language, localization in (entry.localizations or {}).items():
+                if localization.is_translated and localization.value:
+                    translations[language] = localization.value
+        return cls(key, digest, source_text(key, entry), translations)
+
+    def to_json(self) -> dict:
+        return {"digest": self.digest, "source": self.source, "translations": self.translations}
+
+
+class Suggestion:
+    __slots__ = ("key", "source", "value", "score")
+
+    def __init__(self, key: str, source: str, value: str, score: float):
+        self.key = key
+        self.source = source
+        self.value = value
+        self.score = score
+
+    def to_json(self) -> dict:
+        return {
+            "key": self.key,
+            "source": self.source,
+            "value": self.value,
+            "score": round(self.score, 3),
+        }
+
+
+class TranslationMemory:
+    def __init__(self, catalog_digest: str | None = None):
+        self.catalog_digest = catalog_digest
+        self.documents: dict[str, Document] = {}
+        self.postings: dict[str, list[Document]] = {}
+        self.reused = 0
+        self.indexed = 0
+
+    def add(self, document: Document) -> None:
+        self.documents[document.key] = document
+        if not document.translations:
+            return
+        for gram in document.grams:
+            self.postings.setdefault(gram, []).append(document)
+
+    def candidates(self, grams: frozenset[str], min_score: float) -> dict[Document, float]:
+        """Dice similarity of every indexed document that can reach min_score."""
+        size = len(grams)
+        if not size:
+            return {}
+        ordered = sorted(grams, key=lambda gram: len(self.postings.get(gram, ())))
+        found: set[Document] = set()
+        for index, gram in enumerate(ordered):
+            # A document sharing none of the first `index` grams overlaps in at
+            # most size - index of them, which bounds its Dice score.
+            remaining = size - index
+            if 2 * remaining / (size + remaining) < min_score:
+                break
+            found.update(self.postings.get(gram, ()))
+        scores = {}
+        for document in found:
+            overlap = len(grams & document.grams)
+            score = 2 * overlap / (size + len(document.grams))
+            if score >= min_score:
+                scores[document] = score
+        return scores
+
+    def suggest(
+        self,
+        text: str,
+        languages: list[str],
+        top: int = 3,
+        min_score: float = DEFAULT_MIN_SCORE,
+        exclude: str | None = None,
+    ) -> dict[str, list[Suggestion]]:
+        """The top most similar translated entries per language."""
+        scores = self.candidates(ngrams(text), min_score)
+        ranked = sorted(
+            (item for item in scores.items() if item[0].key != exclude),
+            key=lambda item: (-item[1], item[0].key),
+        )
+        suggestions: dict[str, list[Suggestion]] = {language: [] for language in languages}
+        for document, score in ranked:
+            for language in languages:
+                matches = suggestions[language]
+                value = document.translations.get(language)
+                if value is not None and len(matches) < top:
+                    matches.append(Suggestion(document.key, document.source, value, score))
+            if all(len(matches) >= top for matches in suggestions.values()):
+                break
+        return suggestions
+
+    def to_json(self) -> dict:
+        return {
+            "version": CACHE_VERSION,
+            "ngram": NGRAM,
+            "catalog_digest": self.catalog_digest,
+            "documents": {key: document.to_json() for key, document in self.documents.items()},
+        }
+
+
+def load(catalog_path: Path | str, cache: Path | None = None) -> TranslationMemory:
+    """Index the catalog, reusing cached documents whose entry has not changed."""
+    cache = cache or cache_path()
+    with open(catalog_path, "r", encoding="utf-8") as f:
+        text = f.read()
+    catalog_digest = xcstrings.block_digest(text)
+    cached = json_cache.load(cache, {"version": CACHE_VERSION, "ngram": NGRAM}, ("documents",))
+    cached_documents = cached.get("documents", {})
+    memory = TranslationMemory(catalog_digest)
+
+    if cached.get("catalog_digest") == catalog_digest:
+        for key, item in cached_documents.items():
+            memory.add(Document(key, item["digest"], item["source"], item["translations"]))
+        memory.reused = len(memory.documents)
+        return memory
+
+    for key, block in xcstrings.entry_blocks(text).items():
+        digest = xcstrings.block_digest(block)
+        item = cached_documents.get(key)
+        if item is not None and item.get("digest") == digest:
+            memory.add(Document(key, digest, item["source"], item["translations"]))
+            memory.reused += 1
+            continue
+        entry = xcstrings.parse_entry(block)
+        if isinstance(entry, xcstrings.Entry):
+            memory.add(Document.from_entry(key, digest, entry))
+            memory.indexed += 1
+    json_cache.save(cache, memory.to_json())
+    return memory
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+App Store Connect upload stage for xcode.py.
+Retries transient altool failures with exponential backoff and remembers
+which (platform, version, build) combinations were already uploaded.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import plistlib
+import random
+import re
+import threading
+import time
+import zipfile
+from datetime import datetime
+from pathlib import Path
+
+import proc
+
+XCRUN_ENV = "KMREADER_XCRUN"
+DEFAULT_RETRIES = 4
+DEFAULT_RETRY_DELAY = 15.0
+MAX_RETRY_DELAY = 240.0
+# EX_TEMPFAIL, plus signals that usually mean the connection was torn down.
+TRANSIENT_EXIT_CODES = {75, -13}
+TRANSIENT_PATTERNS = re.compile(
+    "|".join(
+        [
+            r"network connection was lost",
+            r"timed? ?out",
+            r"could not connect",
+            r"connection (?:reset|refused|closed)",
+            r"not connected to the internet",
+            r"NSURLErrorDomain",
+            r"\b(?:-1001|-1004|-1005|-1009)\b",
+            # 5xx only next to "status"/"HTTP": altool also quotes build and version numbers.
+            r"\b(?:status(?:[ _]?code)?|HTTP(?:/\d(?:\.\d)?)?)[ /:=]*50[0234]\b",
+            r"service unavailable",
+            r"temporarily unavailable",
+            r"try again later",
+        ]
+    ),
+    re.IGNORECASE,
+)
+_VERSION_SETTING = re.compile(r"^\s*(MARKETING_VERSION|CURRENT_PROJECT_VERSION)\s*=\s*\"?([^\";]+)\"?;")
+
+
+def get_project_root() -> Path:
+    return Path(__file__).resolve().parent.parent
+
+
+def status_path() -> Path:
+    return get_project_root() / ".build" / "misc" / "upload-status.json"
+
+
+def xcrun() -> str:
+    """xcrun executable; KMREADER_XCRUN can point at a stub for testing."""
+    return os.environ.get(XCRUN_ENV, "").strip() or "xcrun"
+
+
+def project_version(project: str) -> tuple[str, str] | None:
+    """Return (MARKETING_VERSION, CURRENT_PROJECT_VERSION) from project.pbxproj."""
+    values: dict[str, str] = {}
+    try:
+        with (Path(project) / "project.pbxproj").open("r", encoding="utf-8") as f:
+            for line in f:
+                if match := _VERSION_SETTING.match(line):
+                    values.setdefault(match[1], match[2].strip())
+    except OSError:
+        return None
+    if "MARKETING_VERSION" not in values or "CURRENT_PROJECT_VERSION" not in values:
+        return None
+    return values["MARKETING_VERSION"], values["CURRENT_PROJECT_VERSION"]
+
+
+def artifact_version(artifact: Path) -> tuple[str, str] | None:
+    """Read (CFBundleShortVersionString, CFBundleVersion) from an IPA without extracting it."""
+    if artifact.suffix.lower() != ".ipa":
+        return None
+    try:
+        with zipfile.ZipFile(artifact) as archive:
+            for name in archive.namelist():
+                parts = name.split("/")
+                if len(parts) == 3 and parts[0] == "Payload" and parts[2] == "Info.plist":
+                    info = plistlib.loads(archive.read(name))
+                    break
+            else:
+                return None
+    except (OSError, zipfile.BadZipFile, plistlib.InvalidFileException):
+        return None
+
+    marketing = info.get("CFBundleShortVersionString")
+    build = info.get("CFBundleVersion")
+    if not isinstance(marketing, str) or not isinstance(build, str):
+        return None
+    return marketing, build
+
+
+def status_key(platform: str, version: tuple[str, str]) -> str:
+    marketing, build = version
+    return f"{platform}:{marketing}({build})"
+
+
+class UploadStatus:
+    """Persistent record of successful uploads, safe to share between threads."""
+
+    def __init__(self, path: Path | None = None):
+        self.path = path or status_path()
+        self._lock = threading.Lock()
+        self._entries = self._load()
+
+    def _load(self) -> dict:
+        try:
+            with self.path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def is_uploaded(self, key: str) -> bool:
+        with self._lock:
+            return self._entries.get(key, {}).get("status") == "uploaded"
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            return self._entries.get(key)
+
+    def record(self, key: str, artifact: Path, status: str, attempts: int) -> None:
+        with self._lock:
+            self._entries[key] = {
+                "status": status,
+                "artifact": str(artifact),
+                "attempts": attempts,
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with tmp_path.open("w", encoding="utf-8") as f:
+                json.dump(self._entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def is_transient(returncode: int, output: str) -> bool:
+    return returncode in TRANSIENT_EXIT_CODES or bool(TRANSIENT_PATTERNS.search(output))
+
+
+def backoff_delay(attempt: int, base: float = DEFAULT_RETRY_DELAY, cap: float = MAX_RETRY_DELAY) -> float:
+    """Exponential backoff with jitter for the given 1-based retry attempt."""
+    delay = min(cap, base * (2 ** (attempt - 1)))
+    return delay * random.uniform(0.5, 1.5)
+
+
+def altool_command(
+    artifact: Path, upload_type: str, key_id: str, issuer_id: str, key_file: str
+) -> list[str]:
+    return [
+        xcrun(),
+        "altool",
+        "--upload-app",
+        "-f",
+        str(artifact),
+        "-t",
+        upload_type,
+        "--api-key",
+        key_id,
+        "--api-issuer",
+        issuer_id,
+        "--p8-file-path",
+        key_file,
+    ]
+
+
+def upload_with_retry(
+    cmd: list[str],
+    platform: str,
+    retries: int = DEFAULT_RETRIES,
+    retry_delay: float = DEFAULT_RETRY_DELAY,
+    log=print,
+) -> tuple[bool, int]:
+    """
+    Run an upload command, retrying transient failures.
+
+    Returns (success, attempts). Output is captured so failures can be
+    classified; it is echoed when an attempt fails.
+    """
+    attempts = 0
+    while True:
+        attempts += 1
+        result = proc.run(
+            cmd,
+            label="xcrun altool upload",
+            platform=platform,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode == 0:
+            return True, attempts
+
+        output = (result.stdout or "") + (result.stderr or "")
+        for line in output.strip().splitlines()[-15:]:
+            log(f"  [{platform}] {line}")
+
+        if attempts > retries or not is_transient(result.returncode, output):
+            return False, attempts
+
+        delay = backoff_delay(attempts, base=retry_delay)
+        log(
+            f"[{platform}] transient upload failure (exit {result.returncode}); "
+            f"retry {attempts}/{retries} in {delay:.0f}s"
+        )
+        time.sleep(delay)
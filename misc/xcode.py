@@ -7,13 +7,26 @@ Provides device selection with persistence.
 import argparse
 import json
 import os
+import plistlib
 import shutil
 import subprocess
 import sys
 import tempfile
+import zipfile
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
+
+import build_cache
+import build_timing
+import bundle_size
+import compile_hotspots
+import device_inventory
+import proc
+import release_manifest
+import step_history
+import upload_stage
+from task_graph import SUCCEEDED, TaskGraph
 
 
 def is_interactive() -> bool:
@@ -74,173 +87,38 @@ class DeviceManager:
                 f"{Color.YELLOW}Warning: Could not save {self.DEVICES_FILE}: {e}{Color.NC}"
             )
 
-    def list_simulators(self, platform: str) -> List[Device]:
+    def list_simulators(self, platform: str, refresh: bool = False) -> List[Device]:
         """List available simulators for the given platform."""
-        try:
-            result = subprocess.run(
-                ["xcrun", "simctl", "list", "devices", "--json"],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            data = json.loads(result.stdout)
-            devices = []
-
-            platform_filter = {
-                "ios": "com.apple.CoreSimulator.SimRuntime.iOS",
-                "tvos": "com.apple.CoreSimulator.SimRuntime.tvOS",
-            }
-
-            runtime_prefix = platform_filter.get(platform.lower())
-            if not runtime_prefix:
-                return devices
-
-            for runtime, device_list in data["devices"].items():
-                if runtime.startswith(runtime_prefix):
-                    for device in device_list:
-                        if device.get("isAvailable", False):
-                            devices.append(
-                                Device(
-                                    name=device["name"],
-                                    udid=device["udid"],
-                                    state=device.get("state", ""),
-                                    platform=platform,
-                                    is_available=True,
-                                )
-                            )
-
-            return devices
-        except (subprocess.CalledProcessError, json.JSONDecodeError, KeyError) as e:
-            print(f"{Color.RED}Error listing simulators: {e}{Color.NC}")
-            return []
-
-    def list_physical_devices(self, platform: str) -> List[Device]:
-        """List available physical devices for the given platform."""
-        platform_aliases = {
-            "ios": {"ios"},
-            "tvos": {"tvos"},
-        }
-
-        target_platforms = platform_aliases.get(platform.lower())
-        if not target_platforms:
-            return []
-
-        # Prefer CoreDevice JSON output, which is stable for scripting and works
-        # regardless of the user-assigned device name.
-        json_output_path: Optional[str] = None
-        try:
-            with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as tmp:
-                json_output_path = tmp.name
-
-            subprocess.run(
-                [
-                    "xcrun",
-                    "devicectl",
-                    "list",
-                    "devices",
-                    "--json-output",
-                    json_output_path,
-                ],
-                capture_output=True,
-                text=True,
-                check=True,
+        return [
+            Device(
+                name=device["name"],
+                udid=device["udid"],
+                state=device["state"],
+                platform=platform,
+                is_available=True,
             )
+            for device in device_inventory.simulators(platform, refresh=refresh)
+        ]
 
-            with open(json_output_path, "r") as f:
-                payload = json.load(f)
-
-            devices: List[Device] = []
-            for item in payload.get("result", {}).get("devices", []):
-                hardware = item.get("hardwareProperties", {})
-                if hardware.get("reality") != "physical":
-                    continue
-
-                hardware_platform = str(hardware.get("platform", "")).lower()
-                if hardware_platform not in target_platforms:
-                    continue
-
-                udid = hardware.get("udid")
-                if not udid:
-                    continue
-
-                device_props = item.get("deviceProperties", {})
-                connection_props = item.get("connectionProperties", {})
-
-                name = device_props.get("name") or hardware.get("marketingName") or "Unknown Device"
-                state = connection_props.get("tunnelState") or connection_props.get("pairingState") or ""
-
-                devices.append(
-                    Device(
-                        name=name,
-                        udid=udid,
-                        state=state,
-                        platform=platform,
-                        is_available=True,
-                    )
-                )
-
-            return devices
-        except (subprocess.CalledProcessError, json.JSONDecodeError, IOError) as e:
-            print(
-                f"{Color.YELLOW}Warning: Could not list physical devices via devicectl: {e}{Color.NC}"
-            )
-        finally:
-            if json_output_path and os.path.exists(json_output_path):
-                try:
-                    os.remove(json_output_path)
-                except OSError:
-                    pass
-
-        # Fallback for older toolchains where devicectl is unavailable.
-        try:
-            result = subprocess.run(
-                ["xcrun", "xctrace", "list", "devices"],
-                capture_output=True,
-                text=True,
-                check=True,
+    def list_physical_devices(self, platform: str, refresh: bool = False) -> List[Device]:
+        """List available physical devices for the given platform."""
+        return [
+            Device(
+                name=device["name"],
+                udid=device["udid"],
+                state=device["state"],
+                platform=platform,
+                is_available=True,
             )
+            for device in device_inventory.physical_devices(platform, refresh=refresh)
+        ]
 
-            devices = []
-            platform_names = {
-                "ios": "iPhone",
-                "tvos": "Apple TV",
-            }
-
-            platform_name = platform_names.get(platform.lower())
-            if not platform_name:
-                return devices
-
-            for line in result.stdout.split("\n"):
-                line = line.strip()
-                if "Simulator" in line:
-                    continue
-                if platform_name in line and "(" in line and ")" in line:
-                    parts = line.rsplit("(", 1)
-                    if len(parts) == 2:
-                        name_part = parts[0].strip()
-                        udid = parts[1].rstrip(")").strip()
-
-                        if "(" in name_part:
-                            name = name_part.rsplit("(", 1)[0].strip()
-                        else:
-                            name = name_part
-
-                        devices.append(
-                            Device(
-                                name=name,
-                                udid=udid,
-                                state="",
-                                platform=platform,
-                                is_available=True,
-                            )
-                        )
-
-            return devices
-        except subprocess.CalledProcessError as e:
-            print(
-                f"{Color.YELLOW}Warning: Could not list physical devices: {e}{Color.NC}"
-            )
-            return []
+    def _list_devices(
+        self, platform: str, is_simulator: bool, refresh: bool = False
+    ) -> List[Device]:
+        if is_simulator:
+            return self.list_simulators(platform, refresh=refresh)
+        return self.list_physical_devices(platform, refresh=refresh)
 
     def get_device_key(self, platform: str, is_simulator: bool) -> str:
         """Generate key for storing device preference."""
@@ -278,12 +156,18 @@ class DeviceManager:
         Returns device UDID or None if selection failed.
         """
         # List available devices
-        if is_simulator:
-            devices = self.list_simulators(platform)
-            device_type_name = "simulator"
-        else:
-            devices = self.list_physical_devices(platform)
-            device_type_name = "device"
+        devices = self._list_devices(platform, is_simulator)
+        device_type_name = "simulator" if is_simulator else "device"
+
+        # The inventory is cached briefly; refresh it when the requested or
+        # saved device is missing so a newly created simulator is picked up.
+        wanted = device_arg or (
+            None if force_select else self.get_saved_device(platform, is_simulator)
+        )
+        if not devices or (
+            wanted and not any(wanted in (d.name, d.udid) for d in devices)
+        ):
+            devices = self._list_devices(platform, is_simulator, refresh=True)
 
         if not devices:
             print(f"{Color.RED}No {platform} {device_type_name}s found{Color.NC}")
@@ -377,7 +261,11 @@ class BuildRunner:
         else:
             repo_root = Path(__file__).resolve().parent.parent
             self.project = str((repo_root / project).resolve())
+        # Seconds before a streamed xcodebuild is stopped; None waits forever.
+        self.command_timeout: Optional[float] = None
+        self.history = step_history.StepHistory()
         self.device_manager = DeviceManager()
+        self.upload_status = upload_stage.UploadStatus()
 
     @staticmethod
     def _is_ci_environment() -> bool:
@@ -391,6 +279,33 @@ class BuildRunner:
             return ["-skipMacroValidation", "-skipPackagePluginValidation"]
         return []
 
+    def _xcodebuild(
+        self, cmd: List[str], platform: Optional[str], label: Optional[str] = None
+    ) -> None:
+        """
+        Run xcodebuild with its full output in a log file.
+
+        Only errors, warnings and the result banner reach the console, as with
+        -quiet; on failure the tail of the output is printed and
+        proc.ProcessFailed (a CalledProcessError) is raised.
+        """
+        result = proc.stream(
+            cmd,
+            label=label,
+            platform=platform,
+            echo=proc.is_diagnostic,
+            timeout=self.command_timeout,
+        )
+        if not result.ok:
+            print(f"{Color.RED}Last lines of {result.label} output:{Color.NC}")
+            for line in result.failure_lines():
+                print(f"  {line}")
+        result.check()
+
+    def _package_args(self) -> List[str]:
+        """Return arguments for the shared SwiftPM checkouts, resolving packages first if needed."""
+        return build_cache.source_package_args(self.project, self.scheme)
+
     @staticmethod
     def _auth_args() -> List[str]:
         """Return authentication arguments for App Store Connect API key."""
@@ -484,6 +399,8 @@ class BuildRunner:
         destination_dir: str = "archives",
         show_in_organizer: bool = False,
         ci_mode: bool = False,
+        incremental: bool = False,
+        verify_clean: bool = False,
     ) -> Tuple[bool, Optional[Path]]:
         """Archive app and return success flag and archive path."""
         normalized = self._platform_normalized(platform)
@@ -529,8 +446,26 @@ class BuildRunner:
             )
 
         auth_args = self._auth_args()
+        package_args = self._package_args()
+
+        # Incremental mode keeps a persistent per-platform DerivedData and only
+        # cleans it when the project or resolved packages changed.
+        derived_data_args: List[str] = []
+        fingerprint = ""
+        run_clean = True
+        if incremental:
+            derived_data = build_cache.incremental_derived_data_path(self.scheme, normalized)
+            derived_data_args = ["-derivedDataPath", str(derived_data)]
+            fingerprint = build_cache.project_fingerprint(self.project)
+            run_clean = build_cache.needs_clean(derived_data, fingerprint)
+            print(f"DerivedData: {derived_data}")
+            if run_clean:
+                print(
+                    f"{Color.YELLOW}Project inputs changed since the last incremental archive; cleaning{Color.NC}"
+                )
+            else:
+                print(f"{Color.GREEN}Project inputs unchanged; skipping clean{Color.NC}")
 
-        print(f"{Color.YELLOW}Cleaning build folder...{Color.NC}")
         clean_cmd = [
             "xcodebuild",
             "clean",
@@ -542,12 +477,12 @@ class BuildRunner:
             "Release",
             "-destination",
             destination,
-            "-quiet",
         ]
+        clean_cmd.extend(derived_data_args)
+        clean_cmd.extend(package_args)
         clean_cmd.extend(validation_args)
         clean_cmd.extend(auth_args)
 
-        print(f"{Color.YELLOW}Archiving...{Color.NC}")
         archive_cmd = [
             "xcodebuild",
             "archive",
@@ -561,32 +496,91 @@ class BuildRunner:
             destination,
             "-archivePath",
             str(archive_path),
-            "-quiet",
         ]
+        archive_cmd.extend(derived_data_args)
+        archive_cmd.extend(package_args)
         archive_cmd.extend(validation_args)
         archive_cmd.extend(auth_args)
 
         try:
-            subprocess.run(clean_cmd, check=True)
-            subprocess.run(archive_cmd, check=True)
-            print(f"{Color.GREEN}✓ Archive created successfully!{Color.NC}")
-            print(f"Archive location: {archive_path}")
-            if show_in_organizer:
-                print("")
-                print(
-                    "Archive is now available in Xcode Organizer (Window > Organizer)"
-                )
-            return True, archive_path
+            if run_clean:
+                print(f"{Color.YELLOW}Cleaning build folder...{Color.NC}")
+                self._xcodebuild(clean_cmd, normalized)
+            print(f"{Color.YELLOW}Archiving...{Color.NC}")
+            self._xcodebuild(archive_cmd, normalized)
         except subprocess.CalledProcessError as e:
             print(f"{Color.RED}✗ Archive failed: {e}{Color.NC}")
             return False, None
 
+        if incremental:
+            build_cache.save_fingerprint(derived_data, fingerprint)
+            if verify_clean and not self._verify_clean_archive(
+                archive_path, destination, package_args + validation_args + auth_args
+            ):
+                return False, None
+
+        print(f"{Color.GREEN}✓ Archive created successfully!{Color.NC}")
+        print(f"Archive location: {archive_path}")
+        if show_in_organizer:
+            print("")
+            print(
+                "Archive is now available in Xcode Organizer (Window > Organizer)"
+            )
+        return True, archive_path
+
+    def _verify_clean_archive(
+        self, archive_path: Path, destination: str, extra_args: List[str]
+    ) -> bool:
+        """Archive again from an empty DerivedData and compare against an incremental archive."""
+        print(f"{Color.YELLOW}Verifying incremental archive against a clean archive...{Color.NC}")
+        scratch = Path(tempfile.mkdtemp(prefix="kmreader-verify-clean."))
+        clean_archive = scratch / archive_path.name
+        cmd = [
+            "xcodebuild",
+            "archive",
+            "-project",
+            self.project,
+            "-scheme",
+            self.scheme,
+            "-configuration",
+            "Release",
+            "-destination",
+            destination,
+            "-archivePath",
+            str(clean_archive),
+            "-derivedDataPath",
+            str(scratch / "DerivedData"),
+        ]
+        cmd.extend(extra_args)
+
+        try:
+            self._xcodebuild(cmd, None, label="xcodebuild archive (verify-clean)")
+            differences = build_cache.compare_archives(archive_path, clean_archive)
+        except subprocess.CalledProcessError as e:
+            print(f"{Color.RED}✗ Clean verification archive failed: {e}{Color.NC}")
+            return False
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+        if differences:
+            print(f"{Color.RED}✗ Incremental archive differs from a clean archive:{Color.NC}")
+            for line in differences[:20]:
+                print(f"  - {line}")
+            if len(differences) > 20:
+                print(f"  ... and {len(differences) - 20} more")
+            return False
+
+        print(f"{Color.GREEN}✓ Incremental archive matches a clean archive{Color.NC}")
+        return True
+
     def archive(
         self,
         platform: str,
         destination_dir: str = "archives",
         show_in_organizer: bool = False,
         ci_mode: bool = False,
+        incremental: bool = False,
+        verify_clean: bool = False,
     ) -> bool:
         """Archive app for the specified platform."""
         success, _ = self._archive_internal(
@@ -594,6 +588,8 @@ class BuildRunner:
             destination_dir=destination_dir,
             show_in_organizer=show_in_organizer,
             ci_mode=ci_mode,
+            incremental=incremental,
+            verify_clean=verify_clean,
         )
         return success
 
@@ -607,6 +603,26 @@ class BuildRunner:
         load_env: bool = True,
     ) -> bool:
         """Export an existing archive to IPA/PKG."""
+        success, _ = self._export_internal(
+            archive_path,
+            export_options=export_options,
+            destination_dir=destination_dir,
+            keep_archive=keep_archive,
+            platform_label=platform_label,
+            load_env=load_env,
+        )
+        return success
+
+    def _export_internal(
+        self,
+        archive_path: str,
+        export_options: Optional[str] = None,
+        destination_dir: Optional[str] = None,
+        keep_archive: bool = False,
+        platform_label: Optional[str] = None,
+        load_env: bool = True,
+    ) -> Tuple[bool, Optional[Path]]:
+        """Export an existing archive and return success flag and export directory."""
         script_dir = Path(__file__).resolve().parent
         project_root = script_dir.parent
         if load_env:
@@ -622,13 +638,13 @@ class BuildRunner:
 
         if not archive.exists() or not archive.is_dir():
             print(f"{Color.RED}Error: Archive not found at '{archive}'{Color.NC}")
-            return False
+            return False, None
 
         if not export_options_path.exists() or not export_options_path.is_file():
             print(
                 f"{Color.RED}Error: Export options plist not found at '{export_options_path}'{Color.NC}"
             )
-            return False
+            return False, None
 
         destination.mkdir(parents=True, exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -650,15 +666,14 @@ class BuildRunner:
             str(export_path),
             "-exportOptionsPlist",
             str(export_options_path),
-            "-quiet",
         ]
         cmd.extend(auth_args)
 
         try:
-            subprocess.run(cmd, check=True)
+            self._xcodebuild(cmd, platform_label)
         except subprocess.CalledProcessError as e:
             print(f"{Color.RED}✗ Export failed: {e}{Color.NC}")
-            return False
+            return False, None
 
         if platform_label:
             for ext in ("ipa", "pkg"):
@@ -684,9 +699,17 @@ class BuildRunner:
             shutil.rmtree(archive, ignore_errors=False)
             print(f"{Color.GREEN}✓ Archive deleted{Color.NC}")
 
-        return True
+        return True, export_path
 
-    def upload(self, artifact_path: str, platform: str, load_env: bool = True) -> bool:
+    def upload(
+        self,
+        artifact_path: str,
+        platform: str,
+        load_env: bool = True,
+        retries: int = upload_stage.DEFAULT_RETRIES,
+        retry_delay: float = upload_stage.DEFAULT_RETRY_DELAY,
+        force: bool = False,
+    ) -> bool:
         """Upload exported artifact to App Store Connect."""
         script_dir = Path(__file__).resolve().parent
         project_root = script_dir.parent
@@ -719,38 +742,143 @@ class BuildRunner:
             return False
 
         normalized = self._platform_normalized(platform) or "ios"
+        version = upload_stage.artifact_version(artifact) or upload_stage.project_version(
+            self.project
+        )
+        status_key = upload_stage.status_key(normalized, version) if version else None
+        if status_key and not force and self.upload_status.is_uploaded(status_key):
+            print(
+                f"{Color.GREEN}✓ {status_key} was already uploaded; skipping {artifact.name}{Color.NC}"
+            )
+            return True
+
         upload_type = self._platform_upload_type(normalized)
         print(f"Uploading {artifact} ({self._platform_display(normalized)}) to App Store Connect...")
 
-        cmd = [
-            "xcrun",
-            "altool",
-            "--upload-app",
-            "-f",
-            str(artifact),
-            "-t",
-            upload_type,
-            "--api-key",
-            key_id,
-            "--api-issuer",
-            issuer_id,
-            "--p8-file-path",
-            key_file,
-        ]
+        cmd = upload_stage.altool_command(artifact, upload_type, key_id, issuer_id, key_file)
+        success, attempts = upload_stage.upload_with_retry(
+            cmd, normalized, retries=retries, retry_delay=retry_delay
+        )
+        if status_key:
+            self.upload_status.record(
+                status_key, artifact, "uploaded" if success else "failed", attempts
+            )
 
-        try:
-            subprocess.run(cmd, check=True)
+        if success:
             print(f"{Color.GREEN}✓ Upload completed for {artifact}{Color.NC}")
             return True
-        except subprocess.CalledProcessError as e:
-            print(f"{Color.RED}✗ Upload failed: {e}{Color.NC}")
+        print(
+            f"{Color.RED}✗ Upload failed for {artifact} after {attempts} attempt(s){Color.NC}"
+        )
+        return False
+
+    def upload_manifest(
+        self,
+        manifest_path: Optional[str] = None,
+        platforms: Optional[List[str]] = None,
+        retries: int = upload_stage.DEFAULT_RETRIES,
+        retry_delay: float = upload_stage.DEFAULT_RETRY_DELAY,
+        force: bool = False,
+    ) -> bool:
+        """Upload the artifacts recorded in a release manifest (default: the latest)."""
+        script_dir = Path(__file__).resolve().parent
+        project_root = script_dir.parent
+        self._load_env_if_present(script_dir, project_root)
+
+        path = (
+            Path(manifest_path).expanduser()
+            if manifest_path
+            else release_manifest.latest_manifest_path(project_root / "exports")
+        )
+        try:
+            manifest = release_manifest.load_manifest(path)
+        except (OSError, ValueError, json.JSONDecodeError) as e:
+            print(f"{Color.RED}Error: could not read release manifest '{path}': {e}{Color.NC}")
             return False
 
+        print(f"Using release manifest: {manifest.get('manifest', path)}")
+        entries = manifest["platforms"]
+        selected = platforms or sorted(entries)
+        success = True
+        for key in selected:
+            entry = entries.get(key)
+            if not entry or not entry.get("artifact"):
+                print(f"{Color.YELLOW}No {key} artifact in manifest; skipping.{Color.NC}")
+                continue
+            artifact, error = release_manifest.verify_artifact(entry)
+            if error:
+                print(f"{Color.RED}✗ {self._platform_display(key)}: {error}{Color.NC}")
+                success = False
+                continue
+            if not self.upload(
+                str(artifact),
+                key,
+                load_env=False,
+                retries=retries,
+                retry_delay=retry_delay,
+                force=force,
+            ):
+                success = False
+        return success
+
+    def prune(
+        self,
+        max_age_days: Optional[float] = None,
+        keep: Optional[int] = None,
+        max_size: Optional[str] = None,
+        keep_releases: Optional[int] = None,
+        dry_run: bool = False,
+    ) -> bool:
+        """Delete old archives/ and exports/ entries not referenced by a retained manifest."""
+        project_root = Path(__file__).resolve().parent.parent
+        try:
+            size_budget = release_manifest.parse_size(max_size) if max_size else None
+        except ValueError as e:
+            print(f"{Color.RED}Error: {e}{Color.NC}")
+            return False
+
+        entries, manifests = release_manifest.plan_prune(
+            project_root / "archives",
+            project_root / "exports",
+            max_age_days=max_age_days,
+            keep=keep,
+            max_size=size_budget,
+            keep_releases=keep_releases,
+        )
+        if not entries and not manifests:
+            print(f"{Color.GREEN}Nothing to prune.{Color.NC}")
+            return True
+
+        verb = "Would delete" if dry_run else "Deleting"
+        freed = 0
+        for candidate in entries:
+            freed += candidate.size
+            print(
+                f"{verb} {candidate.path} "
+                f"({release_manifest.format_size(candidate.size)}, {candidate.reason})"
+            )
+        for manifest in manifests:
+            print(f"{verb} {manifest} (beyond newest {keep_releases} releases)")
+
+        if not dry_run:
+            release_manifest.apply_prune(entries, manifests)
+        print(
+            f"{Color.GREEN}{'Would free' if dry_run else 'Freed'} "
+            f"{release_manifest.format_size(freed)}{Color.NC}"
+        )
+        return True
+
     def release(
         self,
         show_in_organizer: bool = False,
         skip_export: bool = False,
         platform: Optional[str] = None,
+        incremental: bool = False,
+        verify_clean: bool = False,
+        upload_jobs: int = 3,
+        upload_retries: int = upload_stage.DEFAULT_RETRIES,
+        size_budgets: Optional[str] = None,
+        plan: bool = False,
     ) -> bool:
         """Archive/export/upload for platforms."""
         script_dir = Path(__file__).resolve().parent
@@ -789,138 +917,395 @@ class BuildRunner:
         print(f"{Color.BLUE}KMReader - Release{Color.NC}")
         print(f"{Color.BLUE}========================================{Color.NC}")
         print("")
-        print(f"{Color.GREEN}Step 1: Creating archives for all platforms...{Color.NC}")
-        print("")
 
-        archive_results: List[Tuple[str, Path]] = []
-        archive_failed = False
-        ci_mode = self._is_ci_environment()
+        # A rerun after a partial failure skips platforms whose current
+        # version/build already reached App Store Connect.
+        version = upload_stage.project_version(self.project)
+        if version and not skip_export:
+            pending = []
+            for key in platforms:
+                status_key = upload_stage.status_key(key, version)
+                if self.upload_status.is_uploaded(status_key):
+                    print(f"{Color.GREEN}✓ {status_key} already uploaded; skipping{Color.NC}")
+                else:
+                    pending.append(key)
+            if not pending:
+                print(f"{Color.GREEN}✓ Nothing to release.{Color.NC}")
+                return True
+            platforms = pending
+            print("")
 
-        for key in platforms:
-            print(f"{Color.YELLOW}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Color.NC}")
-            print(f"{Color.YELLOW}Archiving for {key}...{Color.NC}")
-            print(f"{Color.YELLOW}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Color.NC}")
+        ci_mode = self._is_ci_environment()
+        manifest = release_manifest.ReleaseManifest(exports_dir, version)
+
+        # Each platform is an archive -> export -> upload chain. Archives share
+        # the default DerivedData, so only one xcodebuild archive runs at a time;
+        # exports and uploads overlap with the remaining archives. Incremental
+        # archives use per-platform DerivedData and may run side by side.
+        archive_slots = len(platforms) if incremental else 1
+        graph = TaskGraph(
+            max_workers=len(platforms) * 2,
+            capacities={"archive": archive_slots, "upload": max(1, upload_jobs)},
+        )
 
-            success, archive_path = self._archive_internal(
-                key,
-                destination_dir=str(archives_dir),
-                show_in_organizer=show_in_organizer,
-                ci_mode=ci_mode,
-            )
-            if not success or not archive_path:
-                print(f"{Color.RED}✗ Archive failed for {key}!{Color.NC}")
-                archive_failed = True
-                print("")
-                continue
+        def archive_task(key: str):
+            def run(_results):
+                print(f"{Color.YELLOW}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Color.NC}")
+                print(f"{Color.YELLOW}Archiving for {key}...{Color.NC}")
+                print(f"{Color.YELLOW}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Color.NC}")
+                success, archive_path = self._archive_internal(
+                    key,
+                    destination_dir=str(archives_dir),
+                    show_in_organizer=show_in_organizer,
+                    ci_mode=ci_mode,
+                    incremental=incremental,
+                    verify_clean=verify_clean,
+                )
+                if not success or not archive_path:
+                    print(f"{Color.RED}✗ Archive failed for {key}!{Color.NC}")
+                    return None
+                print(f"{Color.GREEN}✓ Archive saved: {archive_path}{Color.NC}")
+                manifest.add_archive(key, archive_path)
+                return archive_path
+
+            return run
+
+        def export_task(key: str):
+            def run(results):
+                display_name = self._platform_display(key)
+                print(f"{Color.YELLOW}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Color.NC}")
+                print(f"{Color.YELLOW}Exporting {display_name} archive...{Color.NC}")
+                print(f"{Color.YELLOW}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Color.NC}")
+                archive_path = results[f"archive:{key}"]
+                success, export_path = self._export_internal(
+                    str(archive_path),
+                    export_options=str(export_options[key]),
+                    destination_dir=str(exports_dir),
+                    keep_archive=True,
+                    platform_label=display_name,
+                    load_env=False,
+                )
+                if not success or not export_path:
+                    return None
+                return manifest.add_export(
+                    key, archive_path, export_path, self._find_artifact(export_path, key)
+                )
 
-            archive_results.append((key, archive_path))
-            print(f"{Color.GREEN}✓ Archive saved: {archive_path}{Color.NC}")
-            print("")
+            return run
 
-        if archive_failed:
-            print(f"{Color.RED}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Color.NC}")
-            print(f"{Color.RED}✗ Some archives failed! Skipping export.{Color.NC}")
-            print(f"{Color.RED}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Color.NC}")
+        budgets_path = Path(size_budgets) if size_budgets else bundle_size.default_budgets_path()
+        try:
+            budgets = bundle_size.load_budgets(budgets_path)
+        except (OSError, ValueError, json.JSONDecodeError) as e:
+            print(f"{Color.RED}Error: could not read size budgets: {e}{Color.NC}")
             return False
 
-        print(f"{Color.GREEN}✓ All archives created successfully!{Color.NC}")
-        print("")
+        def size_task(key: str):
+            def run(results):
+                entry = results[f"export:{key}"]
+                if not entry.get("artifact"):
+                    return entry
+                if not self._check_bundle_size(Path(entry["artifact"]), key, budgets):
+                    return None
+                return entry
 
-        if skip_export:
-            print(f"{Color.YELLOW}Skip export requested. Release process finished after archive.{Color.NC}")
-            return True
+            return run
 
-        print(f"{Color.GREEN}Step 2: Exporting all archives...{Color.NC}")
-        print("")
+        def upload_task(key: str):
+            def run(results):
+                display_name = self._platform_display(key)
+                entry = results[f"size:{key}"]
+                if not entry.get("artifact"):
+                    print(
+                        f"{Color.YELLOW}No artifact found for {display_name}; skipping upload.{Color.NC}"
+                    )
+                    return "skipped"
+                artifact, error = release_manifest.verify_artifact(entry)
+                if error:
+                    print(f"{Color.RED}✗ {display_name}: {error}{Color.NC}")
+                    return None
+                if not self.upload(
+                    str(artifact), key, load_env=False, retries=upload_retries
+                ):
+                    return None
+                return artifact
 
-        for key, archive_path in archive_results:
-            display_name = self._platform_display(key)
-            print(f"{Color.YELLOW}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Color.NC}")
-            print(f"{Color.YELLOW}Exporting {display_name} archive...{Color.NC}")
-            print(f"{Color.YELLOW}━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━{Color.NC}")
-
-            success = self.export(
-                str(archive_path),
-                export_options=str(export_options[key]),
-                destination_dir=str(exports_dir),
-                keep_archive=True,
-                platform_label=display_name,
-                load_env=False,
-            )
-            if not success:
-                return False
-            print("")
+            return run
 
-        print(f"{Color.GREEN}✓ All exports completed successfully!{Color.NC}")
-        print("")
-        print(f"{Color.GREEN}Uploading exported builds...{Color.NC}")
+        def estimate(step: str, key: str) -> float:
+            return self.history.estimate("release", step, key)
 
         for key in platforms:
-            display_name = self._platform_display(key)
-            artifact_patterns = {
-                "ios": ["KMReader-iOS.ipa", "*.ipa"],
-                "macos": ["KMReader-macOS.pkg", "*.pkg"],
-                "tvos": ["KMReader-tvOS.ipa", "*tvOS*.ipa"],
-            }
-            found: Optional[Path] = None
-
-            for pattern in artifact_patterns[key]:
-                candidates = sorted(exports_dir.rglob(pattern))
-                if key == "ios":
-                    candidates = [c for c in candidates if not c.name.endswith("tvOS.ipa")]
-                if candidates:
-                    found = candidates[-1]
-                    break
-
-            if not found:
-                print(
-                    f"{Color.YELLOW}No artifact found for {display_name}; skipping upload.{Color.NC}"
-                )
+            graph.add(
+                f"archive:{key}",
+                archive_task(key),
+                resources=["archive"],
+                estimate=estimate("archive", key),
+            )
+            if skip_export:
                 continue
+            graph.add(
+                f"export:{key}",
+                export_task(key),
+                deps=[f"archive:{key}"],
+                estimate=estimate("export", key),
+            )
+            graph.add(
+                f"size:{key}",
+                size_task(key),
+                deps=[f"export:{key}"],
+                estimate=estimate("size", key),
+            )
+            graph.add(
+                f"upload:{key}",
+                upload_task(key),
+                deps=[f"size:{key}"],
+                resources=["upload"],
+                estimate=estimate("upload", key),
+            )
 
-            if not self.upload(str(found), key, load_env=False):
-                return False
+        if plan:
+            self._print_plan(graph, "release")
+            return True
+
+        success = graph.run(on_progress=self._print_progress)
+        self.history.record_graph("release", graph)
+        self.history.save()
+        manifest_path = manifest.write() if manifest.platforms else None
+        for task in graph.tasks.values():
+            if task.started_at is not None and task.finished_at is not None:
+                proc.TRACER.add(
+                    task.name,
+                    "task",
+                    task.started_at,
+                    task.finished_at,
+                    {"status": task.status},
+                )
 
         print("")
         print(f"{Color.BLUE}========================================{Color.NC}")
         print(f"{Color.BLUE}Release Summary{Color.NC}")
         print(f"{Color.BLUE}========================================{Color.NC}")
         print("")
-        print(f"{Color.GREEN}Archives created:{Color.NC}")
-        for _, archive_path in archive_results:
-            print(f"  - {archive_path}")
+        for line in graph.summary_lines():
+            print(f"  {line}")
         print("")
+
+        archive_paths = [
+            graph.tasks[f"archive:{key}"].result
+            for key in platforms
+            if graph.tasks[f"archive:{key}"].status == SUCCEEDED
+        ]
+        if archive_paths:
+            print(f"{Color.GREEN}Archives created:{Color.NC}")
+            for archive_path in archive_paths:
+                print(f"  - {archive_path}")
+            print("")
+        if manifest_path:
+            print(f"{Color.GREEN}Release manifest:{Color.NC}")
+            print(f"  - {manifest_path}")
+            print("")
+
+        if not success:
+            print(f"{Color.RED}✗ Release failed; downstream steps of failed tasks were cancelled.{Color.NC}")
+            return False
+
+        if skip_export:
+            print(f"{Color.YELLOW}Skip export requested. Release process finished after archive.{Color.NC}")
+            return True
+
         print(f"{Color.GREEN}Exports location:{Color.NC}")
         print(f"  - {exports_dir}")
         print("")
         print(f"{Color.GREEN}✓ Release process completed!{Color.NC}")
         return True
 
-    def build(self, platform: str, ci_mode: bool = False) -> bool:
-        """Build for the specified platform."""
-        normalized = platform.lower()
-        if normalized not in ("ios", "macos", "tvos"):
-            print(f"{Color.RED}Unknown platform: {platform}{Color.NC}")
+    @staticmethod
+    def _print_progress(graph: TaskGraph) -> None:
+        print(f"{Color.BLUE}{step_history.progress_line(graph)}{Color.NC}")
+
+    def _print_plan(self, graph: TaskGraph, command: str) -> None:
+        """Print the predicted schedule; estimates are medians of this machine's history."""
+        print(f"{Color.BLUE}Predicted schedule ({self.history.machine}):{Color.NC}")
+        for line in graph.plan_lines():
+            print(f"  {line}")
+        unknown = []
+        for name in graph.tasks:
+            step, _, platform = name.partition(":")
+            if not self.history.samples(command, step, platform or None):
+                unknown.append(name)
+        if unknown:
+            print(
+                f"{Color.YELLOW}No history yet for {', '.join(unknown)}; using default estimates{Color.NC}"
+            )
+
+    def _check_bundle_size(self, artifact: Path, platform: str, budgets: dict) -> bool:
+        """Print the size breakdown of an exported artifact and enforce budgets."""
+        try:
+            report = bundle_size.build_report(artifact, platform)
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            print(f"{Color.YELLOW}Warning: could not analyze {artifact.name}: {e}{Color.NC}")
+            return True
+
+        report_path = bundle_size.report_path(platform)
+        previous = bundle_size.load_report(report_path)
+        for line in bundle_size.format_report(report, previous):
+            print(f"  {line}")
+
+        violations = bundle_size.check_budgets(report, previous, budgets)
+        if violations:
+            for violation in violations:
+                print(f"{Color.RED}✗ {self._platform_display(platform)} size budget: {violation}{Color.NC}")
             return False
+        bundle_size.save_report(report_path, report)
+        return True
 
-        # For iOS and tvOS, select simulator for building
-        device_udid = None
-        destination = None
-        if normalized in ("ios", "tvos"):
-            # Always use simulator for builds
-            is_simulator = True
-            device_udid = self.device_manager.select_device(platform, is_simulator)
-            if device_udid:
-                destination = f"id={device_udid}"
-            else:
-                destination = self._generic_simulator_destination(normalized)
-                print(
-                    f"{Color.YELLOW}No concrete {platform} simulator selected; using {destination}{Color.NC}"
+    def size_report(
+        self,
+        artifact_path: str,
+        platform: Optional[str] = None,
+        budgets: Optional[str] = None,
+        save: bool = False,
+    ) -> bool:
+        """Print the size breakdown of an IPA, PKG or archive."""
+        artifact = Path(artifact_path).expanduser()
+        if not artifact.exists():
+            print(f"{Color.RED}Artifact not found at '{artifact}'{Color.NC}")
+            return False
+        try:
+            report = bundle_size.build_report(artifact, platform)
+            budget_config = bundle_size.load_budgets(
+                Path(budgets) if budgets else bundle_size.default_budgets_path()
+            )
+        except (OSError, ValueError, zipfile.BadZipFile, json.JSONDecodeError) as e:
+            print(f"{Color.RED}Error: {e}{Color.NC}")
+            return False
+
+        report_path = bundle_size.report_path(report["platform"])
+        previous = bundle_size.load_report(report_path)
+        for line in bundle_size.format_report(report, previous):
+            print(line)
+
+        violations = bundle_size.check_budgets(report, previous, budget_config)
+        for violation in violations:
+            print(f"{Color.RED}✗ Size budget: {violation}{Color.NC}")
+        if save and not violations:
+            bundle_size.save_report(report_path, report)
+            print(f"{Color.GREEN}Report saved: {report_path}{Color.NC}")
+        return not violations
+
+    @staticmethod
+    def _find_artifact(export_path: Path, platform: str) -> Optional[Path]:
+        """Pick the uploadable artifact of a fresh export directory for the manifest."""
+        artifact_patterns = {
+            "ios": ["KMReader-iOS.ipa", "*.ipa"],
+            "macos": ["KMReader-macOS.pkg", "*.pkg"],
+            "tvos": ["KMReader-tvOS.ipa", "*tvOS*.ipa"],
+        }
+        for pattern in artifact_patterns[platform]:
+            candidates = sorted(export_path.glob(pattern))
+            if platform == "ios":
+                candidates = [c for c in candidates if not c.name.endswith("tvOS.ipa")]
+            if candidates:
+                return candidates[-1]
+        return None
+
+    def build(
+        self,
+        platforms: Union[str, List[str]],
+        ci_mode: bool = False,
+        timing: bool = False,
+        jobs: int = 1,
+        plan: bool = False,
+    ) -> bool:
+        """Build one or more platforms, starting the longest expected build first."""
+        if isinstance(platforms, str):
+            platforms = [platforms]
+        normalized_platforms: List[str] = []
+        for platform in platforms:
+            normalized = platform.lower()
+            if normalized not in ("ios", "macos", "tvos"):
+                print(f"{Color.RED}Unknown platform: {platform}{Color.NC}")
+                return False
+            if normalized not in normalized_platforms:
+                normalized_platforms.append(normalized)
+
+        jobs = max(1, min(jobs, len(normalized_platforms)))
+        history_command = "build-ci" if ci_mode else "build"
+        graph = TaskGraph(max_workers=jobs)
+        # Builds in the default DerivedData cannot overlap, so parallel builds
+        # each get their own directory.
+        parallel = jobs > 1
+
+        def build_task(key: str, destination: Optional[str]):
+            def run(_results):
+                derived_data = (
+                    build_cache.parallel_build_derived_data_path(self.scheme, key)
+                    if parallel
+                    else None
                 )
-        elif normalized == "macos":
-            destination = "platform=macOS"
+                return self._build_platform(key, destination, ci_mode, timing, derived_data)
+
+            return run
 
-        print(f"{Color.GREEN}Building for {platform.upper()}...{Color.NC}")
+        destinations: Dict[str, Optional[str]] = {}
+        if not plan:
+            # Device selection may prompt, so it happens before anything runs.
+            for key in normalized_platforms:
+                destinations[key] = self._build_destination(key)
+
+        for key in normalized_platforms:
+            graph.add(
+                f"build:{key}",
+                build_task(key, destinations.get(key)),
+                estimate=self.history.estimate(history_command, "build", key),
+            )
+
+        if plan:
+            self._print_plan(graph, history_command)
+            return True
+
+        if len(normalized_platforms) > 1:
+            print(
+                f"{Color.BLUE}Building {', '.join(normalized_platforms)} with {jobs} job(s); "
+                f"estimated {step_history.format_duration(graph.eta())}{Color.NC}"
+            )
+        success = graph.run(
+            on_progress=self._print_progress if len(normalized_platforms) > 1 else None
+        )
+        self.history.record_graph(history_command, graph)
+        self.history.save()
+
+        if len(normalized_platforms) > 1:
+            print("")
+            for line in graph.summary_lines():
+                print(f"  {line}")
+        return success
+
+    def _build_destination(self, normalized: str) -> Optional[str]:
+        """Pick the build destination; iOS and tvOS always build for a simulator."""
+        if normalized == "macos":
+            return "platform=macOS"
+
+        device_udid = self.device_manager.select_device(normalized, True)
+        if device_udid:
+            return f"id={device_udid}"
+        destination = self._generic_simulator_destination(normalized)
+        print(
+            f"{Color.YELLOW}No concrete {normalized} simulator selected; using {destination}{Color.NC}"
+        )
+        return destination
+
+    def _build_platform(
+        self,
+        normalized: str,
+        destination: Optional[str],
+        ci_mode: bool = False,
+        timing: bool = False,
+        derived_data: Optional[Path] = None,
+    ) -> bool:
+        """Build one platform for an already chosen destination."""
+        print(f"{Color.GREEN}Building for {normalized.upper()}...{Color.NC}")
 
         # Do not force -sdk. Let destination drive platform selection, same as Xcode UI.
         cmd = [
@@ -930,11 +1315,12 @@ class BuildRunner:
             "-scheme",
             self.scheme,
             "build",
-            "-quiet",
         ]
-
         if destination:
             cmd.extend(["-destination", destination])
+        if derived_data:
+            cmd.extend(["-derivedDataPath", str(derived_data)])
+        cmd.extend(self._package_args())
 
         if ci_mode:
             cmd.extend(self._validation_args(ci_mode=True))
@@ -942,14 +1328,123 @@ class BuildRunner:
                 ["CODE_SIGN_IDENTITY=", "CODE_SIGNING_REQUIRED=NO", "CODE_SIGNING_ALLOWED=NO"]
             )
 
+        if timing:
+            return self._build_with_timing(cmd, normalized)
+
         try:
-            subprocess.run(cmd, check=True)
-            print(f"{Color.GREEN}{platform.upper()} built successfully!{Color.NC}")
+            self._xcodebuild(cmd, normalized)
+            print(f"{Color.GREEN}{normalized.upper()} built successfully!{Color.NC}")
             return True
         except subprocess.CalledProcessError as e:
             print(f"{Color.RED}Build failed: {e}{Color.NC}")
             return False
 
+    def _build_with_timing(self, cmd: List[str], platform: str) -> bool:
+        """Build with -showBuildTimingSummary, capture the log and report phase/target timings."""
+        log_dir = build_timing.reports_dir()
+        log_dir.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        log_path = log_dir / f"{platform}_{timestamp}.log"
+        print(f"Build log: {log_path}")
+
+        with log_path.open("w", encoding="utf-8") as log:
+            result = proc.run(
+                cmd + ["-showBuildTimingSummary"],
+                platform=platform,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+
+        if result.returncode != 0:
+            print(f"{Color.RED}Build failed with exit code {result.returncode}{Color.NC}")
+            lines = log_path.read_text(encoding="utf-8", errors="replace").splitlines()
+            for line in lines[-30:]:
+                print(f"  {line}")
+            return False
+
+        print(f"{Color.GREEN}{platform.upper()} built successfully!{Color.NC}")
+        report, previous = build_timing.record_build(platform, log_path)
+        print("")
+        print(f"{Color.BLUE}Build timing for {self._platform_display(platform)}:{Color.NC}")
+        for line in build_timing.format_report(report, previous):
+            print(f"  {line}")
+        return True
+
+    def analyze_compile(
+        self,
+        platform: str,
+        threshold_ms: float = compile_hotspots.DEFAULT_THRESHOLD_MS,
+        top: int = 30,
+        baseline: Optional[str] = None,
+        update_baseline: bool = False,
+        log: Optional[str] = None,
+    ) -> int:
+        """Build with frontend type-checking timers and report hotspots; return exit code."""
+        project_root = Path(__file__).resolve().parent.parent
+        baseline_path = (
+            Path(baseline).expanduser() if baseline else compile_hotspots.default_baseline_path()
+        )
+
+        if log:
+            log_path = Path(log).expanduser()
+            if not log_path.is_file():
+                print(f"{Color.RED}Error: log not found at '{log_path}'{Color.NC}")
+                return 1
+        else:
+            normalized = platform.lower()
+            destination = (
+                "platform=macOS"
+                if normalized == "macos"
+                else self._generic_simulator_destination(normalized)
+            )
+            # A dedicated DerivedData keeps the extra flags from invalidating
+            # regular builds; clean so every file is type-checked again.
+            derived_data = (
+                project_root / "DerivedData" / "analyze-compile" / f"{self.scheme}-{normalized}"
+            )
+            log_dir = project_root / ".build" / "misc" / "analyze-compile"
+            log_dir.mkdir(parents=True, exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            log_path = log_dir / f"{normalized}_{timestamp}.log"
+
+            cmd = [
+                "xcodebuild",
+                "-project",
+                self.project,
+                "-scheme",
+                self.scheme,
+                "-destination",
+                destination,
+                "-derivedDataPath",
+                str(derived_data),
+                "clean",
+                "build",
+                "OTHER_SWIFT_FLAGS=$(inherited) " + " ".join(compile_hotspots.FRONTEND_FLAGS),
+                "CODE_SIGN_IDENTITY=",
+                "CODE_SIGNING_REQUIRED=NO",
+                "CODE_SIGNING_ALLOWED=NO",
+            ]
+            cmd.extend(self._package_args())
+            cmd.extend(self._validation_args(ci_mode=False))
+
+            print(f"{Color.GREEN}Building {platform.upper()} with type-checking timers...{Color.NC}")
+            print(f"Build log: {log_path}")
+            with log_path.open("w", encoding="utf-8") as f:
+                result = proc.run(cmd, platform=normalized, stdout=f, stderr=subprocess.STDOUT)
+            if result.returncode != 0:
+                print(f"{Color.RED}Build failed with exit code {result.returncode}; see {log_path}{Color.NC}")
+                return 1
+
+        with log_path.open("r", encoding="utf-8", errors="replace") as f:
+            return compile_hotspots.analyze(
+                f,
+                project_root,
+                baseline_path,
+                threshold_ms=threshold_ms,
+                top=top,
+                update_baseline=update_baseline,
+            )
+
     def run(
         self,
         platform: str,
@@ -978,7 +1473,9 @@ class BuildRunner:
         """Build and run on macOS."""
         print(f"{Color.GREEN}Building and running on macOS...{Color.NC}")
 
-        # Build first
+        # Build into a DerivedData we control so the app path is known without
+        # a second xcodebuild -showBuildSettings evaluation.
+        derived_data = build_cache.run_derived_data_path(self.scheme)
         build_cmd = [
             "xcodebuild",
             "-project",
@@ -987,50 +1484,49 @@ class BuildRunner:
             self.scheme,
             "-destination",
             "platform=macOS",
+            "-derivedDataPath",
+            str(derived_data),
             "build",
-            "-quiet",
         ]
+        build_cmd.extend(self._package_args())
 
         try:
-            subprocess.run(build_cmd, check=True)
-
-            # Find the built app
-            result = subprocess.run(
-                build_cmd + ["-showBuildSettings"],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-
-            app_path = None
-            for line in result.stdout.split("\n"):
-                if "BUILT_PRODUCTS_DIR" in line:
-                    built_products_dir = line.split("=")[1].strip()
-                    app_path = os.path.join(built_products_dir, f"{self.scheme}.app")
-                    break
-
-            if app_path and os.path.exists(app_path):
-                print(f"{Color.GREEN}Launching {self.scheme}...{Color.NC}")
-                subprocess.run(["open", app_path])
-                return True
-            else:
-                print(f"{Color.RED}Could not find built app{Color.NC}")
-                return False
-
+            self._xcodebuild(build_cmd, "macos")
         except subprocess.CalledProcessError as e:
             print(f"{Color.RED}Failed to build/run: {e}{Color.NC}")
             return False
 
+        app_path = build_cache.built_app_path(derived_data, self.scheme, None)
+        if not app_path:
+            print(f"{Color.RED}Could not find built app{Color.NC}")
+            return False
+
+        print(f"{Color.GREEN}Launching {self.scheme}...{Color.NC}")
+        proc.run(["open", str(app_path)])
+        return True
+
     def _run_simulator(self, platform: str, device_udid: str) -> bool:
         """Build and run on simulator."""
-        if platform.lower() not in ("ios", "tvos"):
+        sdk_suffixes = {"ios": "iphonesimulator", "tvos": "appletvsimulator"}
+        sdk_suffix = sdk_suffixes.get(platform.lower())
+        if not sdk_suffix:
             print(f"{Color.RED}Unknown platform: {platform}{Color.NC}")
             return False
 
+        # Boot the simulator while the build runs; bootstatus -b boots it if
+        # needed and exits once it is ready to accept installs.
+        print(f"{Color.GREEN}Booting simulator in the background...{Color.NC}")
+        boot_proc = proc.popen(
+            ["xcrun", "simctl", "bootstatus", device_udid, "-b"],
+            platform=platform.lower(),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
         print(f"{Color.GREEN}Building for {platform.upper()} simulator...{Color.NC}")
 
         # Do not force -sdk. Let destination drive platform selection, same as Xcode UI.
-        # Build
+        derived_data = build_cache.run_derived_data_path(self.scheme)
         build_cmd = [
             "xcodebuild",
             "-project",
@@ -1039,63 +1535,70 @@ class BuildRunner:
             self.scheme,
             "-destination",
             f"id={device_udid}",
+            "-derivedDataPath",
+            str(derived_data),
             "build",
-            "-quiet",
         ]
+        build_cmd.extend(self._package_args())
 
-        try:
-            subprocess.run(build_cmd, check=True)
-
-            # Get build settings to find app path
-            result = subprocess.run(
-                build_cmd + ["-showBuildSettings"],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
+        def stop_boot() -> None:
+            # Nothing will be installed; do not wait for the boot to finish.
+            if boot_proc.returncode is None:
+                boot_proc.process.terminate()
+            boot_proc.wait()
 
-            app_path = None
-            for line in result.stdout.split("\n"):
-                if "BUILT_PRODUCTS_DIR" in line:
-                    built_products_dir = line.split("=")[1].strip()
-                    app_path = os.path.join(built_products_dir, f"{self.scheme}.app")
-                    break
+        try:
+            self._xcodebuild(build_cmd, platform.lower())
+        except subprocess.CalledProcessError as e:
+            stop_boot()
+            print(f"{Color.RED}Failed to build/run: {e}{Color.NC}")
+            return False
+        except BaseException:
+            stop_boot()
+            raise
+
+        app_path = build_cache.built_app_path(derived_data, self.scheme, sdk_suffix)
+        if not app_path:
+            stop_boot()
+            print(f"{Color.RED}Could not find built app{Color.NC}")
+            return False
 
-            if not app_path or not os.path.exists(app_path):
-                print(f"{Color.RED}Could not find built app{Color.NC}")
-                return False
+        bundle_id = self._get_bundle_id(str(app_path))
+        if not bundle_id:
+            stop_boot()
+            print(f"{Color.RED}Could not determine bundle identifier{Color.NC}")
+            return False
 
-            # Boot simulator if needed
-            print(f"{Color.GREEN}Booting simulator...{Color.NC}")
-            subprocess.run(
-                ["xcrun", "simctl", "boot", device_udid], stderr=subprocess.DEVNULL
-            )  # Ignore error if already booted
+        if boot_proc.wait() != 0:
+            # Older simctl without bootstatus -b; boot directly and ignore
+            # the error if it is already booted.
+            proc.run(
+                ["xcrun", "simctl", "boot", device_udid],
+                platform=platform.lower(),
+                stderr=subprocess.DEVNULL,
+            )
 
-            # Install app
+        try:
             print(f"{Color.GREEN}Installing app...{Color.NC}")
-            subprocess.run(
-                ["xcrun", "simctl", "install", device_udid, app_path], check=True
+            proc.run(
+                ["xcrun", "simctl", "install", device_udid, str(app_path)],
+                platform=platform.lower(),
+                check=True,
             )
 
-            # Get bundle identifier
-            bundle_id = self._get_bundle_id(app_path)
-            if not bundle_id:
-                print(f"{Color.RED}Could not determine bundle identifier{Color.NC}")
-                return False
-
-            # Launch app
             print(f"{Color.GREEN}Launching app...{Color.NC}")
-            subprocess.run(
-                ["xcrun", "simctl", "launch", device_udid, bundle_id], check=True
+            proc.run(
+                ["xcrun", "simctl", "launch", device_udid, bundle_id],
+                platform=platform.lower(),
+                check=True,
             )
-
-            print(f"{Color.GREEN}App launched successfully!{Color.NC}")
-            return True
-
         except subprocess.CalledProcessError as e:
             print(f"{Color.RED}Failed to build/run: {e}{Color.NC}")
             return False
 
+        print(f"{Color.GREEN}App launched successfully!{Color.NC}")
+        return True
+
     def _run_device(self, platform: str, device_udid: str) -> bool:
         """Build and run on physical device."""
         if platform.lower() not in ("ios", "tvos"):
@@ -1117,11 +1620,11 @@ class BuildRunner:
             "-destination",
             f"id={device_udid}",
             "build",
-            "-quiet",
         ]
+        cmd.extend(self._package_args())
 
         try:
-            subprocess.run(cmd, check=True)
+            self._xcodebuild(cmd, platform.lower())
             print(
                 f"{Color.GREEN}App installed successfully! Launch it manually on your device.{Color.NC}"
             )
@@ -1137,15 +1640,11 @@ class BuildRunner:
             return None
 
         try:
-            result = subprocess.run(
-                ["defaults", "read", info_plist, "CFBundleIdentifier"],
-                capture_output=True,
-                text=True,
-                check=True,
-            )
-            return result.stdout.strip()
-        except subprocess.CalledProcessError:
+            with open(info_plist, "rb") as f:
+                bundle_id = plistlib.load(f).get("CFBundleIdentifier")
+        except (OSError, plistlib.InvalidFileException):
             return None
+        return bundle_id if isinstance(bundle_id, str) and bundle_id else None
 
 
 def main():
@@ -1154,16 +1653,84 @@ def main():
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
 
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        help=(
+            "Record subprocess timings, print a summary and write a Chrome trace "
+            "(default: .build/misc/traces/<command>_<timestamp>.json; also enabled by KMREADER_TRACE)"
+        ),
+    )
+    parser.add_argument(
+        "--trace-file",
+        metavar="PATH",
+        help="Write the Chrome trace to PATH (implies --trace)",
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Stop any xcodebuild invocation (and its child processes) that runs longer than this",
+    )
+
     subparsers = parser.add_subparsers(dest="command", help="Command to execute")
 
     # Build command
-    build_parser = subparsers.add_parser("build", help="Build for a platform")
+    build_parser = subparsers.add_parser("build", help="Build for one or more platforms")
     build_parser.add_argument(
-        "platform", choices=["ios", "macos", "tvos"], help="Target platform"
+        "platform", nargs="+", choices=["ios", "macos", "tvos"], help="Target platform(s)"
+    )
+    build_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Platforms to build at once; parallel builds use per-platform DerivedData (default: 1)",
+    )
+    build_parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Print the predicted schedule from build history without building",
     )
     build_parser.add_argument(
         "--ci", action="store_true", help="CI mode (no code signing)"
     )
+    build_parser.add_argument(
+        "--timing",
+        action="store_true",
+        help="Capture the build log with -showBuildTimingSummary and report per-phase/per-target timings",
+    )
+
+    # Analyze compile command
+    analyze_parser = subparsers.add_parser(
+        "analyze-compile", help="Rank Swift type-checking hotspots"
+    )
+    analyze_parser.add_argument(
+        "platform", choices=["ios", "macos", "tvos"], help="Target platform"
+    )
+    analyze_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=compile_hotspots.DEFAULT_THRESHOLD_MS,
+        help="Milliseconds above which a new hotspot fails the command (default: 100)",
+    )
+    analyze_parser.add_argument(
+        "--top", type=int, default=30, help="Number of hotspots to list (default: 30)"
+    )
+    analyze_parser.add_argument(
+        "--baseline",
+        default=None,
+        help="Baseline JSON (default: .build/misc/compile-hotspots-baseline.json)",
+    )
+    analyze_parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="Record current hotspots over the threshold as the baseline",
+    )
+    analyze_parser.add_argument(
+        "--log", default=None, help="Analyze an existing build log instead of building"
+    )
 
     # Archive command
     archive_parser = subparsers.add_parser("archive", help="Archive for a platform")
@@ -1185,6 +1752,16 @@ def main():
         action="store_true",
         help="Enable CI-safe validation flags",
     )
+    archive_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse persistent per-platform DerivedData; clean only when project inputs change",
+    )
+    archive_parser.add_argument(
+        "--verify-clean",
+        action="store_true",
+        help="With --incremental, also archive from scratch and compare the results",
+    )
 
     # Export command
     export_parser = subparsers.add_parser("export", help="Export archive")
@@ -1215,9 +1792,43 @@ def main():
 
     # Upload command
     upload_parser = subparsers.add_parser("upload", help="Upload exported artifact")
-    upload_parser.add_argument("artifact_path", help="Path to IPA/PKG artifact")
     upload_parser.add_argument(
-        "platform", help="Platform label (ios/macos/tvos)"
+        "artifact_path", nargs="?", help="Path to IPA/PKG artifact"
+    )
+    upload_parser.add_argument(
+        "platform", nargs="?", help="Platform label (ios/macos/tvos)"
+    )
+    upload_parser.add_argument(
+        "--manifest",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="PATH",
+        help="Upload the artifacts of a release manifest (default: exports/manifests/latest.json)",
+    )
+    upload_parser.add_argument(
+        "--platform",
+        dest="manifest_platforms",
+        action="append",
+        choices=["ios", "macos", "tvos"],
+        help="With --manifest, only upload this platform (repeatable)",
+    )
+    upload_parser.add_argument(
+        "--retries",
+        type=int,
+        default=upload_stage.DEFAULT_RETRIES,
+        help="Retries for transient upload failures (default: 4)",
+    )
+    upload_parser.add_argument(
+        "--retry-delay",
+        type=float,
+        default=upload_stage.DEFAULT_RETRY_DELAY,
+        help="Base backoff delay in seconds (default: 15)",
+    )
+    upload_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Upload even if this version/build is recorded as uploaded",
     )
 
     # Release command
@@ -1240,6 +1851,86 @@ def main():
         default=None,
         help="Process a single platform",
     )
+    release_parser.add_argument(
+        "--upload-jobs",
+        type=int,
+        default=3,
+        help="Maximum concurrent uploads (default: 3)",
+    )
+    release_parser.add_argument(
+        "--upload-retries",
+        type=int,
+        default=upload_stage.DEFAULT_RETRIES,
+        help="Retries for transient upload failures (default: 4)",
+    )
+    release_parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Print the predicted schedule from release history without running anything",
+    )
+    release_parser.add_argument(
+        "--size-budgets",
+        default=None,
+        help="Size budgets JSON checked before upload (default: misc/size_budgets.json if present)",
+    )
+    release_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reuse persistent per-platform DerivedData; clean only when project inputs change",
+    )
+    release_parser.add_argument(
+        "--verify-clean",
+        action="store_true",
+        help="With --incremental, also archive from scratch and compare the results",
+    )
+
+    # Size report command
+    size_parser = subparsers.add_parser(
+        "size-report", help="Break down the size of an IPA, PKG or archive"
+    )
+    size_parser.add_argument("artifact_path", help="Path to IPA/PKG/.app/.xcarchive")
+    size_parser.add_argument(
+        "--platform",
+        choices=["ios", "macos", "tvos"],
+        default=None,
+        help="Platform whose previous report and budgets apply (default: detected)",
+    )
+    size_parser.add_argument(
+        "--budgets", default=None, help="Size budgets JSON (default: misc/size_budgets.json)"
+    )
+    size_parser.add_argument(
+        "--save",
+        action="store_true",
+        help="Store this report as the platform's previous report",
+    )
+
+    # Prune command
+    prune_parser = subparsers.add_parser(
+        "prune", help="Delete old archives and exports"
+    )
+    prune_parser.add_argument(
+        "--max-age-days", type=float, default=None, help="Delete entries older than this"
+    )
+    prune_parser.add_argument(
+        "--keep", type=int, default=None, help="Keep only the newest N archives and exports"
+    )
+    prune_parser.add_argument(
+        "--max-size",
+        default=None,
+        help="Delete oldest entries until archives/ and exports/ fit (e.g. 20G)",
+    )
+    prune_parser.add_argument(
+        "--keep-releases",
+        type=int,
+        default=None,
+        help=(
+            "Delete all but the newest N release manifests (default: keep all); "
+            "archives and exports of kept manifests are never pruned"
+        ),
+    )
+    prune_parser.add_argument(
+        "--dry-run", action="store_true", help="Only print what would be deleted"
+    )
 
     # Run command
     run_parser = subparsers.add_parser("run", help="Build and run on a device")
@@ -1282,18 +1973,52 @@ def main():
         parser.print_help()
         return 1
 
+    if args.command == "upload":
+        if args.manifest is not None and args.artifact_path:
+            parser.error("upload: pass either an artifact path or --manifest, not both")
+        if args.manifest is None and not (args.artifact_path and args.platform):
+            parser.error("upload: artifact_path and platform are required without --manifest")
+
+    if args.trace or args.trace_file:
+        proc.TRACER.configure(args.command, args.trace_file)
+    else:
+        proc.TRACER.configure_from_env(args.command)
+
+    try:
+        return run_command(args)
+    finally:
+        proc.TRACER.finish()
+
+
+def run_command(args: argparse.Namespace) -> int:
+    """Dispatch a parsed command line."""
     runner = BuildRunner()
+    runner.command_timeout = args.timeout
 
     if args.command == "build":
-        success = runner.build(args.platform, args.ci)
+        success = runner.build(
+            args.platform, args.ci, timing=args.timing, jobs=args.jobs, plan=args.plan
+        )
         return 0 if success else 1
 
+    elif args.command == "analyze-compile":
+        return runner.analyze_compile(
+            args.platform,
+            threshold_ms=args.threshold,
+            top=args.top,
+            baseline=args.baseline,
+            update_baseline=args.update_baseline,
+            log=args.log,
+        )
+
     elif args.command == "archive":
         success = runner.archive(
             args.platform,
             destination_dir=args.destination,
             show_in_organizer=args.show_in_organizer,
             ci_mode=args.ci,
+            incremental=args.incremental or args.verify_clean,
+            verify_clean=args.verify_clean,
         )
         return 0 if success else 1
 
@@ -1307,8 +2032,24 @@ def main():
         )
         return 0 if success else 1
 
+    elif args.command == "upload" and args.manifest is not None:
+        success = runner.upload_manifest(
+            args.manifest or None,
+            platforms=args.manifest_platforms,
+            retries=args.retries,
+            retry_delay=args.retry_delay,
+            force=args.force,
+        )
+        return 0 if success else 1
+
     elif args.command == "upload":
-        success = runner.upload(args.artifact_path, args.platform)
+        success = runner.upload(
+            args.artifact_path,
+            args.platform,
+            retries=args.retries,
+            retry_delay=args.retry_delay,
+            force=args.force,
+        )
         return 0 if success else 1
 
     elif args.command == "release":
@@ -1316,6 +2057,31 @@ def main():
             show_in_organizer=args.show_in_organizer,
             skip_export=args.skip_export,
             platform=args.platform,
+            incremental=args.incremental or args.verify_clean,
+            verify_clean=args.verify_clean,
+            upload_jobs=args.upload_jobs,
+            upload_retries=args.upload_retries,
+            size_budgets=args.size_budgets,
+            plan=args.plan,
+        )
+        return 0 if success else 1
+
+    elif args.command == "size-report":
+        success = runner.size_report(
+            args.artifact_path,
+            platform=args.platform,
+            budgets=args.budgets,
+            save=args.save,
+        )
+        return 0 if success else 1
+
+    elif args.command == "prune":
+        success = runner.prune(
+            max_age_days=args.max_age_days,
+            keep=args.keep,
+            max_size=args.max_size,
+            keep_releases=args.keep_releases,
+            dry_run=args.dry_run,
         )
         return 0 if success else 1
 
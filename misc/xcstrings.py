@@ -0,0 +1,627 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory model of Localizable.xcstrings shared by the misc/ tools.
+
+Plain string units are parsed straight into slotted Localization objects
+(no per-localization dicts), language and state codes are interned, and
+anything else (variations, substitutions, unknown keys) is kept as parsed
+in a single extra mapping that only exists when needed. Variations are
+built while parsing rather than on first use: json's scanner creates
+nested objects before the hook sees the enclosing key, so deferring them
+would save nothing, and their cases already parse to Localization
+objects. load()/dumps() are the one canonical reader and writer; output
+matches Xcode's formatting byte for byte (2-space indent, " : "
+separators, sorted schema keys, no trailing newline).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import json_codec
+from localize_sort import sort_keys
+
+try:
+    from json.encoder import c_encode_basestring as _encode_string
+except ImportError:  # pragma: no cover - pure-Python json build
+    from json.encoder import py_encode_basestring as _encode_string
+
+# Ordering applied to newly added localizations; also the languages translate.py requires.
+LOCALIZATION_KEY_ORDER = (
+    "de",
+    "en",
+    "es",
+    "fr",
+    "it",
+    "ja",
+    "ko",
+    "ru",
+    "zh-Hans",
+    "zh-Hant",
+)
+INDENT = "  "
+# printf-style specifiers as used in Swift String(format:) and String Catalogs.
+# "type" is the length modifier and conversion; flags, width and precision
+# only change how the argument is printed, not which argument it takes.
+FORMAT_SPECIFIER = re.compile(
+    r"%(?:(?P<position>\d+)\$)?(?P<flags>[-+ #0']*)(?P<width>\d+|\*)?(?:\.(?P<precision>\d+|\*))?"
+    r"(?P<type>(?:hh|h|ll|l|q|z|t|j|L)?[@dDiuUxXoOfeEgGcCsSpaAF%])"
+)
+STRINGS_OPEN = '\n  "strings" : {'
+ENTRY_MARKER = '\n    "'
+TRANSLATED = sys.intern("translated")
+NEEDS_REVIEW = sys.intern("needs_review")
+NEW = sys.intern("new")
+
+
+class CatalogError(ValueError):
+    """Valid JSON that is not a string catalog."""
+
+
+class _Unit(tuple):
+    """A parsed {"state", "value"} object awaiting its Localization."""
+
+    __slots__ = ()
+
+
+class Localization:
+    """One language of one key; state/value hold the stringUnit, _extra anything else."""
+
+    __slots__ = ("state", "value", "_extra")
+
+    def __init__(self, state: str | None = None, value: str | None = None, extra: dict | None = None):
+        self.state = sys.intern(state) if state is not None else None
+        self.value = value
+        self._extra = extra
+
+    @property
+    def has_unit(self) -> bool:
+        return self.value is not None
+
+    @property
+    def is_translated(self) -> bool:
+        return self.state == TRANSLATED
+
+    @property
+    def extra(self) -> dict:
+        """Keys besides stringUnit (variations, substitutions, ...); allocated on first use."""
+        if self._extra is None:
+            self._extra = {}
+        return self._extra
+
+    @property
+    def variations(self) -> dict | None:
+        """Parsed variations ({selector: {case: Localization}}), or None for a plain string."""
+        if self._extra is None:
+            return None
+        return self._extra.get("variations")
+
+    def __repr__(self) -> str:
+        return f"Localization({self.state!r}, {self.value!r})"
+
+
+class Entry:
+    """One key of the catalog. Fields that are absent in the file are None."""
+
+    __slots__ = ("localizations", "comment", "should_translate", "extraction_state", "_extra")
+
+    def __init__(
+        self,
+        localizations: dict[str, Localization] | None = None,
+        comment: str | None = None,
+        should_translate: bool | None = None,
+        extraction_state: str | None = None,
+        extra: dict | None = None,
+    ):
+        self.localizations = localizations
+        self.comment = comment
+        self.should_translate = should_translate
+        self.extraction_state = extraction_state
+        self._extra = extra
+
+    @property
+    def translatable(self) -> bool:
+        return self.should_translate is not False
+
+    def ensure_localizations(self) -> dict[str, Localization]:
+        if self.localizations is None:
+            self.localizations = {}
+        return self.localizations
+
+    def localization(self, language: str) -> Localization | None:
+        if self.localizations is None:
+            return None
+        return self.localizations.get(language)
+
+    def missing_languages(self, languages: Iterable[str]) -> list[str]:
+        """Languages without a translated stringUnit."""
+        localizations = self.localizations or {}
+        missing = []
+        for language in languages:
+            localization = localizations.get(language)
+            if localization is None or not localization.is_translated:
+                missing.append(language)
+        return missing
+
+    def _fields(self) -> list[tuple[str, object]]:
+        fields: list[tuple[str, object]] = []
+        if self.comment is not None:
+            fields.append(("comment", self.comment))
+        if self.extraction_state is not None:
+            fields.append(("extractionState", self.extraction_state))
+        if self.localizations is not None:
+            fields.append(("localizations", self.localizations))
+        if self.should_translate is not None:
+            fields.append(("shouldTranslate", self.should_translate))
+        if self._extra:
+            fields.extend(self._extra.items())
+            fields.sort(key=lambda item: item[0])
+        return fields
+
+
+class Catalog:
+    """A whole .xcstrings file; strings keeps the file's key order."""
+
+    __slots__ = ("source_language", "strings", "version", "_extra")
+
+    def __init__(
+        self,
+        strings: dict[str, Entry] | None = None,
+        source_language: str | None = "en",
+        version: str | None = "1.0",
+        extra: dict | None = None,
+    ):
+        self.source_language = source_language
+        self.strings = strings if strings is not None else {}
+        self.version = version
+        self._extra = extra
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def sort_strings(self) -> None:
+        self.strings = {key: self.strings[key] for key in sort_keys(self.strings.keys())}
+
+    def _fields(self) -> list[tuple[str, object]]:
+        fields: list[tuple[str, object]] = []
+        if self.source_language is not None:
+            fields.append(("sourceLanguage", self.source_language))
+        fields.append(("strings", self.strings))
+        if self.version is not None:
+            fields.append(("version", self.version))
+        if self._extra:
+            fields.extend(self._extra.items())
+            fields.sort(key=lambda item: item[0])
+        return fields
+
+
+def format_specifiers(text: str) -> list[str]:
+    """
+    Argument types of text's specifiers ("%@", "%f", ...) in a comparable
+    (sorted) order; a "*" width or precision takes an extra "%d".
+    """
+    specifiers = []
+    for match in FORMAT_SPECIFIER.finditer(text):
+        if match["type"] == "%":
+            continue
+        specifiers.append("%" + match["type"])
+        specifiers.extend("%d" for part in (match["width"], match["precision"]) if part == "*")
+    return sorted(specifiers)
+
+
+def sort_localizations(localizations: dict) -> dict:
+    """Known languages in LOCALIZATION_KEY_ORDER, then the rest in Finder order."""
+    ordered = {}
+    seen = set()
+
+    for key in LOCALIZATION_KEY_ORDER:
+        if key in localizations:
+            ordered[key] = localizations[key]
+            seen.add(key)
+
+    for key in sort_keys(k for k in localizations.keys() if k not in seen):
+        ordered[key] = localizations[key]
+
+    return ordered
+
+
+# Loading
+
+
+def _object_hook(pairs: list[tuple[str, object]]) -> object:
+    # Called bottom-up by the C scanner, so string units never become dicts.
+    if len(pairs) == 2:
+        (first, state), (second, value) = pairs
+        if first == "state" and second == "value" and type(state) is str and type(value) is str:
+            return _Unit((sys.intern(state), value))
+    elif len(pairs) == 1:
+        key, unit = pairs[0]
+        if key == "stringUnit" and type(unit) is _Unit:
+            return Localization(unit[0], unit[1])
+    return dict(pairs)
+
+
+def _localization(value: object) -> Localization | object:
+    if type(value) is Localization:
+        return value
+    if not isinstance(value, dict):
+        return value
+    unit = value.get("stringUnit")
+    if type(unit) is _Unit:
+        extra = {key: item for key, item in value.items() if key != "stringUnit"}
+        return Localization(unit[0], unit[1], extra)
+    return Localization(extra=value)
+
+
+def _entry(value: object) -> Entry | object:
+    if not isinstance(value, dict):
+        return value
+    fields = value
+    localizations = fields.pop("localizations", None)
+    if isinstance(localizations, dict):
+        localizations = {
+            sys.intern(language): _localization(item)
+            for language, item in localizations.items()
+        }
+    elif localizations is not None:
+        fields["localizations"] = localizations
+        localizations = None
+    should_translate = fields.pop("shouldTranslate", None)
+    if should_translate is not None and type(should_translate) is not bool:
+        fields["shouldTranslate"] = should_translate
+        should_translate = None
+    extraction_state = fields.pop("extractionState", None)
+    if extraction_state is not None:
+        extraction_state = sys.intern(extraction_state)
+    return Entry(
+        localizations=localizations,
+        comment=fields.pop("comment", None),
+        should_translate=should_translate,
+        extraction_state=extraction_state,
+        extra=fields or None,
+    )
+
+
+def loads(text: str) -> Catalog:
+    data = json.loads(text, object_pairs_hook=_object_hook)
+    if not isinstance(data, dict) or not isinstance(data.get("strings"), dict):
+        raise CatalogError("not a string catalog")
+    strings = data.pop("strings")
+    for key, value in strings.items():
+        strings[key] = _entry(value)
+    return Catalog(
+        strings=strings,
+        source_language=data.pop("sourceLanguage", None),
+        version=data.pop("version", None),
+        extra=data or None,
+    )
+
+
+def load(path: Path | str) -> Catalog:
+    with open(path, "r", encoding="utf-8") as f:
+        return loads(f.read())
+
+
+def parse_entry(block: str) -> Entry | object:
+    """Parse one value of the strings map, as returned by entry_blocks()."""
+    return _entry(json.loads(block, object_pairs_hook=_object_hook))
+
+
+def strings_span(text: str) -> tuple[int, int] | None:
+    """
+    (start, end) of the entries of the strings map in Xcode-formatted text,
+    or None when the text is not formatted that way.
+
+    Xcode puts every key of "strings" at the start of a line indented by four
+    spaces, and JSON strings never contain raw newlines, so each entry starts
+    at an ENTRY_MARKER between start and end.
+    """
+    start = text.find(STRINGS_OPEN)
+    if start < 0:
+        return None
+    start += len(STRINGS_OPEN)
+    if text.startswith("}", start):
+        return start, start
+    # "strings" is the last object-valued key Xcode writes, so its closing brace
+    # is the last one at this indent; split_entries rejects a wrong guess.
+    end = text.rfind("\n  }", start)
+    if end < 0:
+        return None
+    return start, end
+
+
+def split_entries(text: str, start: int, end: int) -> dict[str, str] | None:
+    """Cut the entries starting between start and end out of the text without parsing it."""
+    blocks: dict[str, str] = {}
+    scanstring = json.decoder.scanstring
+    position = text.find(ENTRY_MARKER, start, end)
+    while position >= 0:
+        try:
+            key, value_start = scanstring(text, position + len(ENTRY_MARKER))
+        except ValueError:
+            return None
+        if not text.startswith(" : ", value_start):
+            return None
+        value_start += 3
+        position = text.find(ENTRY_MARKER, value_start, end)
+        stop = position if position >= 0 else end
+        block = text[value_start:stop]
+        if block.endswith(","):
+            block = block[:-1]
+        if not (block.startswith("{") and block.endswith("}")):
+            return None
+        blocks[key] = block
+    return blocks
+
+
+def split_catalog(text: str) -> tuple[str, dict[str, str], str]:
+    """
+    (text before the first entry, entry blocks, text after the last entry).
+    head + the entries joined by join_entries() + tail reproduces the file;
+    catalogs not formatted by Xcode are re-serialized first.
+    """
+    span = strings_span(text)
+    blocks = split_entries(text, *span) if span is not None else None
+    if blocks is None:
+        text = dumps(loads(text))
+        span = strings_span(text)
+        blocks = split_entries(text, *span)
+    start, end = span
+    return text[:start], blocks, text[end:]
+
+
+def join_entries(head: str, blocks: Iterable[tuple[str, str]], tail: str) -> str:
+    """Inverse of split_catalog() for any sequence of (key, block)."""
+    body = ",".join(
+        f"{ENTRY_MARKER[:-1]}{_encode_string(key)} : {block}" for key, block in blocks
+    )
+    # An empty strings map is written as "{}" on one line.
+    closing = "\n" + INDENT + "}"
+    if body and not tail.startswith(closing):
+        tail = closing[:-1] + tail
+    elif not body and tail.startswith(closing):
+        tail = tail[len(closing) - 1:]
+    return head + body + tail
+
+
+def entry_block(entry: Entry | object) -> str:
+    """Serialize one value of the strings map the way entry_blocks() returns it."""
+    return "".join(_iter_value(entry, 2))
+
+
+def entry_blocks(text: str) -> dict[str, str]:
+    """
+    Map each key to the canonical serialized text of its entry.
+
+    Xcode-formatted catalogs are cut up without parsing; anything else is
+    parsed and re-serialized, which yields the same blocks for the same content.
+    """
+    span = strings_span(text)
+    if span is not None:
+        blocks = split_entries(text, *span)
+        if blocks is not None:
+            return blocks
+    catalog = loads(text)
+    return {key: entry_block(entry) for key, entry in catalog.strings.items()}
+
+
+def iter_segments(lines: Iterable[str]) -> Iterator[tuple[str | None, str]]:
+    """
+    Stream an Xcode-formatted catalog as (key, entry block) segments and
+    (None, text) for everything between them; joined, the segments are the
+    file. Only one entry is held at a time. Raises CatalogError for text not
+    formatted by Xcode.
+    """
+    strings_line = STRINGS_OPEN[1:]
+    entry_prefix = ENTRY_MARKER[1:]
+    entry_end = INDENT * 2 + "}"
+    lines = iter(lines)
+    in_strings = found = False
+    for line in lines:
+        if not in_strings:
+            yield None, line
+            if line.startswith(strings_line):
+                found = True
+                in_strings = not line.startswith("}", len(strings_line))
+            continue
+        if not line.startswith(entry_prefix):
+            if not line.startswith(INDENT + "}"):
+                raise CatalogError(f"unexpected line in strings: {line[:40]!r}")
+            in_strings = False
+            yield None, line
+            continue
+        try:
+            key, end = json.decoder.scanstring(line, len(entry_prefix))
+        except ValueError as exc:
+            raise CatalogError(str(exc)) from None
+        if not line.startswith(" : {", end):
+            raise CatalogError(f"unexpected entry line: {line[:40]!r}")
+        end += 3
+        yield None, line[:end]
+        if line.startswith("{}", end):
+            yield key, "{}"
+            yield None, line[end + 2:]
+            continue
+        parts = [line[end:]]
+        for line in lines:
+            if line.startswith(entry_end) and line[len(entry_end):].rstrip("\n") in ("", ","):
+                parts.append(entry_end)
+                yield key, "".join(parts)
+                yield None, line[len(entry_end):]
+                break
+            parts.append(line)
+        else:
+            raise CatalogError(f"unterminated entry {key!r}")
+    if in_strings or not found:
+        raise CatalogError("no Xcode-formatted strings map")
+
+
+def iter_entries(path: Path | str) -> Iterator[tuple[str, Entry | object]]:
+    """(key, entry) of a catalog one entry at a time; other formatting is loaded whole."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        started = False
+        try:
+            for key, segment in iter_segments(f):
+                if key is not None:
+                    started = True
+                    yield key, parse_entry(segment)
+            return
+        except CatalogError:
+            if started:
+                raise
+    yield from load(path).strings.items()
+
+
+def block_digest(block: str) -> str:
+    return hashlib.blake2b(block.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# Serialization
+
+
+def _encode_scalar(value: object) -> str:
+    if value is None:
+        return "null"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, str):
+        return _encode_string(value)
+    return json.dumps(value)
+
+
+def _iter_object(fields: list[tuple[str, object]], level: int) -> Iterator[str]:
+    if not fields:
+        yield "{}"
+        return
+    inner = "\n" + INDENT * (level + 1)
+    separator = ","
+    yield "{"
+    first = True
+    for key, value in fields:
+        yield inner if first else separator + inner
+        first = False
+        yield _encode_string(key)
+        yield " : "
+        yield from _iter_value(value, level + 1)
+    yield "\n" + INDENT * level + "}"
+
+
+def _iter_value(value: object, level: int) -> Iterator[str]:
+    kind = type(value)
+    if kind is Localization:
+        yield from _iter_localization(value, level)
+    elif kind is Entry or kind is Catalog:
+        yield from _iter_object(value._fields(), level)
+    elif kind is _Unit:
+        yield from _iter_object([("state", value[0]), ("value", value[1])], level)
+    elif isinstance(value, dict):
+        yield from _iter_object(list(value.items()), level)
+    elif isinstance(value, (list, tuple)):
+        if not value:
+            yield "[]"
+            return
+        inner = "\n" + INDENT * (level + 1)
+        yield "["
+        for index, item in enumerate(value):
+            yield inner if index == 0 else "," + inner
+            yield from _iter_value(item, level + 1)
+        yield "\n" + INDENT * level + "]"
+    else:
+        yield _encode_scalar(value)
+
+
+def _iter_localization(localization: Localization, level: int) -> Iterator[str]:
+    if localization._extra is None and localization.value is not None:
+        # Fast path for the overwhelmingly common plain string unit.
+        pad = INDENT * level
+        yield (
+            "{\n"
+            f"{pad}  \"stringUnit\" : {{\n"
+            f"{pad}    \"state\" : {_encode_scalar(localization.state)},\n"
+            f"{pad}    \"value\" : {_encode_string(localization.value)}\n"
+            f"{pad}  }}\n"
+            f"{pad}}}"
+        )
+        return
+    fields = list((localization._extra or {}).items())
+    if localization.value is not None:
+        fields.append(("stringUnit", _Unit((localization.state, localization.value))))
+        fields.sort(key=lambda item: item[0])
+    yield from _iter_object(fields, level)
+
+
+class _HasFloat(Exception):
+    pass
+
+
+def _plain(value: object, floats: bool = False) -> object:
+    """
+    The model as plain dicts and lists, in _iter_value's key order. Floats
+    raise _HasFloat unless floats is true: catalogs have none, and orjson
+    would format them differently.
+    """
+    kind = type(value)
+    if kind is Localization:
+        if value._extra is None and value.value is not None:
+            return {"stringUnit": {"state": value.state, "value": value.value}}
+        fields = list((value._extra or {}).items())
+        if value.value is not None:
+            fields.append(("stringUnit", _Unit((value.state, value.value))))
+            fields.sort(key=lambda item: item[0])
+        return {key: _plain(item, floats) for key, item in fields}
+    if kind is Entry or kind is Catalog:
+        return {key: _plain(item, floats) for key, item in value._fields()}
+    if kind is _Unit:
+        return {"state": value[0], "value": value[1]}
+    if isinstance(value, dict):
+        return {key: _plain(item, floats) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item, floats) for item in value]
+    if isinstance(value, float) and not floats:
+        raise _HasFloat
+    return value
+
+
+def iter_encode(value: Catalog | dict) -> Iterator[str]:
+    return _iter_value(value, 0)
+
+
+def dumps(value: Catalog | dict) -> str:
+    """Xcode's formatting: identical to json.dump(indent=2, ensure_ascii=False, separators=(",", " : "))."""
+    if json_codec.BACKEND == "orjson":
+        # Converting to plain data and letting orjson encode it beats the
+        # generator; without orjson the generator is the fastest writer.
+        try:
+            plain = _plain(value)
+        except _HasFloat:
+            pass
+        else:
+            return json_codec.dumps_xcode(plain, floats=False)
+    text = "".join(_iter_value(value, 0))
+    if json_codec.VERIFY:
+        json_codec.check_identical(text, json_codec.reference_dumps(_plain(value, floats=True)), "xcstrings")
+    return text
+
+
+def save(path: Path | str, value: Catalog | dict) -> None:
+    """Write atomically so an interrupted save never leaves a truncated catalog."""
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        with tmp_path.open("w", encoding="utf-8") as f:
+            f.write(dumps(value))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            tmp_path.unlink()
+        except OSError:
+            pass
+        raise
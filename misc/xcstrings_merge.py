@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Three-way git merge driver for .xcstrings catalogs.
+
+Entries are compared as unparsed text blocks (xcstrings.split_catalog), so
+keys changed on one side only are taken without parsing anything. Keys
+changed on both sides are parsed and merged field by field and language by
+language; a conflict is reported only when both sides changed the same cell
+differently. Conflicting cells keep our value, every conflict is printed
+with both values, and the driver exits 1 so git leaves the file unmerged.
+
+Register it once per clone:
+
+    git config merge.xcstrings.name "xcstrings three-way merge"
+    git config merge.xcstrings.driver "python3 misc/xcstrings_merge.py %O %A %B %P"
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+import localize_sort
+import xcstrings
+
+_FIELDS = ("comment", "extraction_state", "should_translate", "_extra")
+
+
+def eprint(message: str) -> None:
+    print(message, file=sys.stderr)
+
+
+class Conflict:
+    __slots__ = ("key", "cell", "ours", "theirs")
+
+    def __init__(self, key: str, cell: str | None, ours: object, theirs: object):
+        self.key = key
+        self.cell = cell
+        self.ours = ours
+        self.theirs = theirs
+
+    @staticmethod
+    def _describe(value: object) -> str:
+        if value is None:
+            return "<deleted>"
+        if isinstance(value, xcstrings.Localization):
+            if value.has_unit:
+                return f"{value.value!r} ({value.state})"
+            return "<variations>"
+        if isinstance(value, xcstrings.Entry):
+            return "<entry>"
+        return json.dumps(value, ensure_ascii=False)
+
+    def __str__(self) -> str:
+        if not self.key and self.cell is None:
+            return "conflict: top-level catalog fields (sourceLanguage, version) differ"
+        location = f" [{self.cell}]" if self.cell else ""
+        return (
+            f"conflict: {self.key!r}{location}: ours {self._describe(self.ours)}, "
+            f"theirs {self._describe(self.theirs)}"
+        )
+
+
+class MergeResult:
+    def __init__(self, text: str, conflicts: list[Conflict], merged_keys: int):
+        self.text = text
+        self.conflicts = conflicts
+        # Keys changed on both sides that needed a per-cell merge.
+        self.merged_keys = merged_keys
+
+
+def _encode(value: object) -> str | None:
+    return None if value is None else xcstrings.dumps(value)
+
+
+def _merge3(base: object, ours: object, theirs: object) -> tuple[object, bool]:
+    """(merged value, conflicted); a conflict keeps ours."""
+    ours_text = _encode(ours)
+    theirs_text = _encode(theirs)
+    if ours_text == theirs_text:
+        return ours, False
+    base_text = _encode(base)
+    if base_text == ours_text:
+        return theirs, False
+    if base_text == theirs_text:
+        return ours, False
+    return ours, True
+
+
+def merge_entry(
+    key: str, base: xcstrings.Entry, ours: xcstrings.Entry, theirs: xcstrings.Entry
+) -> tuple[xcstrings.Entry, list[Conflict]]:
+    conflicts = []
+    merged = xcstrings.Entry()
+    for field in _FIELDS:
+        value, conflicted = _merge3(
+            getattr(base, field), getattr(ours, field), getattr(theirs, field)
+        )
+        setattr(merged, field, value)
+        if conflicted:
+            conflicts.append(Conflict(key, field.lstrip("_"), getattr(ours, field), getattr(theirs, field)))
+
+    base_localizations = base.localizations or {}
+    ours_localizations = ours.localizations or {}
+    theirs_localizations = theirs.localizations or {}
+    localizations = {}
+    languages = dict.fromkeys([*ours_localizations, *theirs_localizations, *base_localizations])
+    for language in languages:
+        ours_cell = ours_localizations.get(language)
+        theirs_cell = theirs_localizations.get(language)
+        value, conflicted = _merge3(base_localizations.get(language), ours_cell, theirs_cell)
+        if conflicted:
+            conflicts.append(Conflict(key, language, ours_cell, theirs_cell))
+        if value is not None:
+            localizations[language] = value
+    if localizations or ours.localizations is not None or theirs.localizations is not None:
+        merged.localizations = xcstrings.sort_localizations(localizations)
+    return merged, conflicts
+
+
+def _merge_order(ours: list[str], theirs: list[str]) -> list[str]:
+    """
+    Interleave two key orders, placing keys only theirs has right after the
+    key that precedes them there; both inputs sorted gives a sorted result
+    without needing the comparator.
+    """
+    ours_keys = set(ours)
+    inserted: dict[str | None, list[str]] = {}
+    anchor = None
+    for key in theirs:
+        if key in ours_keys:
+            anchor = key
+        else:
+            inserted.setdefault(anchor, []).append(key)
+    order = list(inserted.get(None, ()))
+    for key in ours:
+        order.append(key)
+        order.extend(inserted.get(key, ()))
+    return order
+
+
+def merge_texts(base_text: str | None, ours_text: str, theirs_text: str, key_order: str = "auto") -> MergeResult:
+    """
+    Merge three catalog texts. key_order "sort" sorts keys with
+    localize_sort, "preserve" interleaves the sides' orders and "auto" sorts
+    only where Finder's comparator is available.
+    """
+    ours_head, ours_blocks, ours_tail = xcstrings.split_catalog(ours_text)
+    theirs_head, theirs_blocks, theirs_tail = xcstrings.split_catalog(theirs_text)
+    if base_text is not None and base_text.strip():
+        base_head, base_blocks, base_tail = xcstrings.split_catalog(base_text)
+    else:
+        base_head, base_blocks, base_tail = None, {}, None
+
+    conflicts = []
+    head, conflicted = _merge3(base_head, ours_head, theirs_head)
+    tail, tail_conflicted = _merge3(base_tail, ours_tail, theirs_tail)
+    if conflicted or tail_conflicted:
+        conflicts.append(Conflict("", None, None, None))
+
+    blocks: dict[str, str] = {}
+    merged_keys = 0
+    for key in dict.fromkeys([*ours_blocks, *theirs_blocks]):
+        ours_block = ours_blocks.get(key)
+        theirs_block = theirs_blocks.get(key)
+        base_block = base_blocks.get(key)
+        if ours_block == theirs_block or base_block == theirs_block:
+            block = ours_block
+        elif base_block == ours_block:
+            block = theirs_block
+        else:
+            ours_entry = xcstrings.parse_entry(ours_block) if ours_block is not None else None
+            theirs_entry = xcstrings.parse_entry(theirs_block) if theirs_block is not None else None
+            base_entry = xcstrings.parse_entry(base_block) if base_block is not None else xcstrings.Entry()
+            if not all(isinstance(entry, xcstrings.Entry) for entry in (ours_entry, theirs_entry, base_entry)):
+                # Deleted on one side and changed on the other: keep the changed entry.
+                conflicts.append(Conflict(key, None, ours_entry, theirs_entry))
+                block = ours_block if ours_block is not None else theirs_block
+            else:
+                entry, entry_conflicts = merge_entry(key, base_entry, ours_entry, theirs_entry)
+                conflicts.extend(entry_conflicts)
+                block = xcstrings.entry_block(entry)
+                merged_keys += 1
+        if block is not None:
+            blocks[key] = block
+
+    if key_order == "sort" or (key_order == "auto" and localize_sort.LOCALIZED_COMPARE):
+        order = localize_sort.sort_keys(blocks)
+    else:
+        order = [key for key in _merge_order(list(ours_blocks), list(theirs_blocks)) if key in blocks]
+    text = xcstrings.join_entries(head, ((key, blocks[key]) for key in order), tail)
+    return MergeResult(text, conflicts, merged_keys)
+
+
+def _read(path: str) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _write(path: str, text: str) -> None:
+    target = Path(path)
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, target)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Three-way merge of .xcstrings catalogs (git merge driver: %O %A %B %P)"
+    )
+    parser.add_argument("base", help="Common ancestor version (%%O)")
+    parser.add_argument("ours", help="Our version; receives the result (%%A)")
+    parser.add_argument("theirs", help="Their version (%%B)")
+    parser.add_argument("path", nargs="?", help="Path of the file in the repository (%%P), for messages")
+    parser.add_argument(
+        "--key-order",
+        choices=("auto", "sort", "preserve"),
+        default="auto",
+        help="auto sorts with Finder's comparator when available, otherwise keeps both sides' order",
+    )
+    args = parser.parse_args()
+    name = args.path or args.ours
+
+    try:
+        result = merge_texts(_read(args.base), _read(args.ours), _read(args.theirs), args.key_order)
+    except (OSError, ValueError) as exc:
+        # Leave %A untouched; git then reports an ordinary conflict.
+        eprint(f"xcstrings merge: cannot merge {name}: {exc}")
+        return 2
+
+    _write(args.ours, result.text)
+    if result.conflicts:
+        eprint(f"xcstrings merge: {len(result.conflicts)} conflicts in {name} (our values were kept):")
+        for conflict in result.conflicts:
+            eprint(f"  {conflict}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())